@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.db import get_db
-from app.core.password import get_password_hash
+from app.core.password import get_password_hash_async
 from app.core.security import get_current_user
 from app.schemas.admin_user import AdminUser, CreateUserRequest, UpdateUserRequest
 from app.services.user_service import (
@@ -38,7 +39,7 @@ def get_users(
 
 
 @router.post("", response_model=AdminUser)
-def create_user_item(
+async def create_user_item(
     payload: CreateUserRequest,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -55,16 +56,18 @@ def create_user_item(
             detail="Password too short"
         )
 
+    password_hash = await get_password_hash_async(payload.password)
     try:
-        user = create_user(
+        user = await run_in_threadpool(
+            create_user,
             db,
             payload.username,
             payload.email,
-            get_password_hash(payload.password),
+            password_hash,
             payload.role_group
         )
     except IntegrityError as exc:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名或邮箱已存在"
@@ -80,14 +83,14 @@ def create_user_item(
 
 
 @router.put("/{user_id}", response_model=AdminUser)
-def update_user_item(
+async def update_user_item(
     user_id: str,
     payload: UpdateUserRequest,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> AdminUser:
     _ensure_admin(current_user)
-    role = get_user_role(db, user_id)
+    role = await run_in_threadpool(get_user_role, db, user_id)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -104,10 +107,11 @@ def update_user_item(
             detail="Invalid role_group"
         )
 
-    password_hash = get_password_hash(payload.password) if payload.password else None
+    password_hash = await get_password_hash_async(payload.password) if payload.password else None
 
     try:
-        user = update_user(
+        user = await run_in_threadpool(
+            update_user,
             db,
             user_id,
             payload.username,
@@ -116,7 +120,7 @@ def update_user_item(
             password_hash
         )
     except IntegrityError as exc:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名或邮箱已存在"
@@ -1,13 +1,26 @@
-from datetime import date
-from typing import Any
+import hashlib
+import logging
+from datetime import date, timedelta
+from typing import Any, Callable, Hashable, TypeVar
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from app.core.security import get_current_user
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from app.core.db import get_async_engine
+from app.core.security import get_current_user_async
+from app.services import anime_guide_cache, anime_guide_snapshot
+from app.services.anime_crawler.calendar import week_start_of
 from app.services.anime_crawler.db import fetch_all, fetch_one, get_conn
+from app.services.anime_crawler.scheduler import add_crawl_complete_hook
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tools/anime-guide", tags=["anime-guide"])
 
+T = TypeVar("T")
+
 WEEKDAY_TEXT = {
     0: "星期日",
     1: "星期一",
@@ -19,9 +32,18 @@ WEEKDAY_TEXT = {
 }
 
 
-def _format_date_cn(value: date | None) -> str | None:
+def _iso(value: date | str | None) -> str | None:
+    # PostgreSQL 返回 date / datetime，SQLite（本地调试、测试）返回 ISO 字符串
+    if not value:
+        return None
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _format_date_cn(value: date | str | None) -> str | None:
     if not value:
         return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
     return f"{value.year}年{value.month}月{value.day}日"
 
 
@@ -32,123 +54,270 @@ def _rating_to_five(value: float | None) -> float:
     return round(min(max(numeric / 2.0, 0.0), 5.0), 1)
 
 
+def _load_generation(conn: Connection) -> str:
+    # 爬虫每次运行都会 upsert 日历（刷新 anime.updated_at），章节写入刷新 anime_episode.updated_at，
+    # 两者的最大值即可代表一次爬取产生的数据版本
+    row = fetch_one(
+        conn,
+        """
+        SELECT
+            (SELECT MAX(updated_at) FROM anime) AS anime_updated_at,
+            (SELECT MAX(updated_at) FROM anime_episode) AS episode_updated_at;
+        """,
+        {},
+    )
+    row = row or {}
+    raw = f"{row.get('anime_updated_at')}|{row.get('episode_updated_at')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(item.strip().removeprefix("W/") == target for item in if_none_match.split(","))
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+
+
+async def _run_loader(loader: Callable[..., T], *args: Any) -> T:
+    # 加载函数同时供接口（异步引擎）与快照生成（同步连接）使用：
+    # run_sync 在 asyncpg 连接上执行同步代码，等待数据库期间不占用线程池线程
+    async with get_async_engine().connect() as conn:
+        return await conn.run_sync(loader, *args)
+
+
+async def _load_generation_for_etag() -> str:
+    # 快照与数据同一时刻生成，直接使用清单中的版本号，避免查询数据库；
+    # 快照读写是同步文件 I/O，放到线程池执行，不阻塞事件循环
+    generation = await run_in_threadpool(anime_guide_snapshot.read_generation)
+    return generation or await _run_loader(_load_generation)
+
+
+async def _respond(
+    request: Request,
+    response: Response,
+    endpoint: str,
+    params: tuple[Hashable, ...],
+    loader: Callable[..., dict],
+    *args: Any,
+) -> Any:
+    # ETag 绑定数据版本而非响应内容；版本号本身也走缓存，命中 304 时不查询数据库
+    generation = await anime_guide_cache.get_or_load_async("generation", (), _load_generation_for_etag)
+    headers = {"ETag": f'W/"{generation}"', "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    async def load() -> dict:
+        snapshot = await run_in_threadpool(
+            anime_guide_snapshot.read_snapshot, anime_guide_snapshot.snapshot_key(endpoint, params)
+        )
+        return snapshot if snapshot is not None else await _run_loader(loader, *args)
+
+    return await anime_guide_cache.get_or_load_async(endpoint, params, load)
+
+
 @router.get("/calendar")
-def get_calendar_dates(
+async def get_calendar_dates(
+    request: Request,
+    response: Response,
     start: str = Query(..., description="YYYY-MM-DD"),
     end: str = Query(..., description="YYYY-MM-DD"),
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user_async),
 ) -> dict:
-    with get_conn() as conn:
-        rows = fetch_all(
-            conn,
-            """
-            SELECT DISTINCT air_date
-            FROM anime_airing_calendar
-            WHERE air_date BETWEEN :start AND :end
-            ORDER BY air_date;
-            """,
-            {"start": start, "end": end},
-        )
-    return {"dates": [row["air_date"].isoformat() for row in rows]}
+    start_date, end_date = _parse_date(start), _parse_date(end)
+    return await _respond(
+        request,
+        response,
+        "calendar",
+        (start_date.isoformat(), end_date.isoformat()),
+        _load_calendar_dates,
+        start_date,
+        end_date,
+    )
+
+
+def _load_calendar_dates(conn: Connection, start: date, end: date) -> dict:
+    rows = fetch_all(
+        conn,
+        """
+        SELECT DISTINCT air_date
+        FROM anime_airing_calendar
+        WHERE air_date BETWEEN :start AND :end
+        ORDER BY air_date;
+        """,
+        {"start": start, "end": end},
+    )
+    return {"dates": [_iso(row["air_date"]) for row in rows]}
 
 
 @router.get("/crawl-status")
-def get_crawl_status(current_user: dict = Depends(get_current_user)) -> dict:
-    with get_conn() as conn:
-        row = fetch_one(
-            conn,
-            """
-            SELECT MAX(last_crawled_at) AS last_crawled_at
-            FROM anime
-            WHERE last_crawled_at IS NOT NULL;
-            """,
-            {},
-        )
+async def get_crawl_status(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user_async),
+) -> dict:
+    return await _respond(request, response, "crawl-status", (), _load_crawl_status)
+
+
+def _load_crawl_status(conn: Connection) -> dict:
+    row = fetch_one(
+        conn,
+        """
+        SELECT MAX(last_crawled_at) AS last_crawled_at
+        FROM anime
+        WHERE last_crawled_at IS NOT NULL;
+        """,
+        {},
+    )
     last = row.get("last_crawled_at") if row else None
-    return {"lastCrawledAt": last.isoformat() if last else None}
+    return {"lastCrawledAt": _iso(last)}
+
+
+# 单日与区间更新列表共用的查询与行格式化
+_UPDATES_SELECT = """
+    SELECT
+        a.bgm_subject_id,
+        a.title,
+        a.title_zh,
+        a.rating,
+        a.cover_image_url,
+        c.weekday,
+        c.air_date,
+        COALESCE(c.episode_no, e.episode_no, a.latest_episode_no) AS episode_no
+    FROM anime_airing_calendar c
+    JOIN anime a ON a.id = c.anime_id
+    LEFT JOIN anime_episode e
+        ON e.anime_id = c.anime_id
+       AND e.air_date = c.air_date
+"""
+
+# 区间接口最多覆盖的天数（日历按月展示，留一点余量）
+UPDATES_RANGE_MAX_DAYS = 62
+
+
+def _format_update_item(row: dict, fallback_date: str) -> dict:
+    episode_no = row.get("episode_no")
+    return {
+        "id": str(row["bgm_subject_id"]),
+        "title": row.get("title") or "",
+        "chineseTitle": row.get("title_zh") or "",
+        "originalTitle": row.get("title") or "",
+        "coverUrl": row.get("cover_image_url") or "",
+        "weekday": row.get("weekday"),
+        "date": _iso(row.get("air_date")) or fallback_date,
+        "episode": f"第{episode_no}集" if episode_no else None,
+        "rating": _rating_to_five(row.get("rating")),
+        "updateTime": None,
+    }
 
 
 @router.get("/updates")
-def get_updates_by_date(
+async def get_updates_by_date(
+    request: Request,
+    response: Response,
     date_str: str = Query(..., alias="date"),
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user_async),
 ) -> dict:
-    with get_conn() as conn:
-        rows = fetch_all(
-            conn,
-            """
-            SELECT
-                a.bgm_subject_id,
-                a.title,
-                a.title_zh,
-                a.rating,
-                a.cover_image_url,
-                c.weekday,
-                c.air_date,
-                COALESCE(c.episode_no, e.episode_no, em.max_episode) AS episode_no
-            FROM anime_airing_calendar c
-            JOIN anime a ON a.id = c.anime_id
-            LEFT JOIN anime_episode e
-                ON e.anime_id = c.anime_id
-               AND e.air_date = c.air_date
-            LEFT JOIN LATERAL (
-                SELECT MAX(episode_no) AS max_episode
-                FROM anime_episode
-                WHERE anime_id = c.anime_id
-            ) em ON true
-            WHERE c.air_date = :air_date
-            ORDER BY a.rating DESC NULLS LAST;
-            """,
-            {"air_date": date_str},
-        )
-    items = []
+    air_date = _parse_date(date_str)
+    return await _respond(
+        request, response, "updates", (air_date.isoformat(),), _load_updates_by_date, air_date
+    )
+
+
+def _load_updates_by_date(conn: Connection, air_date: date) -> dict:
+    rows = fetch_all(
+        conn,
+        _UPDATES_SELECT
+        + """
+    WHERE c.air_date = :air_date
+    ORDER BY a.rating DESC NULLS LAST;
+""",
+        {"air_date": air_date},
+    )
+    return {"items": [_format_update_item(row, air_date.isoformat()) for row in rows]}
+
+
+@router.get("/updates/range")
+async def get_updates_by_range(
+    request: Request,
+    response: Response,
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str = Query(..., description="YYYY-MM-DD"),
+    current_user: dict = Depends(get_current_user_async),
+) -> dict:
+    start_date, end_date = _parse_date(start), _parse_date(end)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end_date - start_date).days + 1 > UPDATES_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail="Date range too large")
+    return await _respond(
+        request,
+        response,
+        "updates-range",
+        (start_date.isoformat(), end_date.isoformat()),
+        _load_updates_by_range,
+        start_date,
+        end_date,
+    )
+
+
+def _load_updates_by_range(conn: Connection, start: date, end: date) -> dict:
+    # 一次查询取回整个区间，按播出日期分组返回；没有更新的日期不出现在结果中
+    rows = fetch_all(
+        conn,
+        _UPDATES_SELECT
+        + """
+    WHERE c.air_date BETWEEN :start AND :end
+    ORDER BY c.air_date ASC, a.rating DESC NULLS LAST;
+""",
+        {"start": start, "end": end},
+    )
+    days: list[dict] = []
     for row in rows:
-        episode_no = row.get("episode_no")
-        items.append(
-            {
-                "id": str(row["bgm_subject_id"]),
-                "title": row.get("title") or "",
-                "chineseTitle": row.get("title_zh") or "",
-                "originalTitle": row.get("title") or "",
-                "coverUrl": row.get("cover_image_url") or "",
-                "weekday": row.get("weekday"),
-                "date": row.get("air_date").isoformat() if row.get("air_date") else date_str,
-                "episode": f"第{episode_no}集" if episode_no else None,
-                "rating": _rating_to_five(row.get("rating")),
-                "updateTime": None,
-            }
-        )
-    return {"items": items}
+        item = _format_update_item(row, start.isoformat())
+        if not days or days[-1]["date"] != item["date"]:
+            days.append({"date": item["date"], "items": []})
+        days[-1]["items"].append(item)
+    return {"days": days}
 
 
 @router.get("/weekday")
-def get_by_weekday(
+async def get_by_weekday(
+    request: Request,
+    response: Response,
     weekday: int = Query(..., ge=0, le=6),
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user_async),
 ) -> dict:
-    with get_conn() as conn:
-        rows = fetch_all(
-            conn,
-            """
-            SELECT
-                a.bgm_subject_id,
-                a.title,
-                a.title_zh,
-                a.rating,
-                a.cover_image_url,
-                a.weekday,
-                em.max_episode
-            FROM anime a
-            LEFT JOIN LATERAL (
-                SELECT MAX(episode_no) AS max_episode
-                FROM anime_episode
-                WHERE anime_id = a.id
-            ) em ON true
-            WHERE a.weekday = :weekday
-            ORDER BY rating DESC NULLS LAST;
-            """,
-            {"weekday": weekday},
-        )
+    return await _respond(request, response, "weekday", (weekday,), _load_by_weekday, weekday)
+
+
+def _load_by_weekday(conn: Connection, weekday: int) -> dict:
+    rows = fetch_all(
+        conn,
+        """
+        SELECT
+            a.bgm_subject_id,
+            a.title,
+            a.title_zh,
+            a.rating,
+            a.cover_image_url,
+            a.weekday,
+            a.latest_episode_no AS max_episode
+        FROM anime a
+        WHERE a.weekday = :weekday
+        ORDER BY rating DESC NULLS LAST;
+        """,
+        {"weekday": weekday},
+    )
     items = [
         {
             "id": str(row["bgm_subject_id"]),
@@ -168,48 +337,61 @@ def get_by_weekday(
 
 
 @router.get("/detail/{subject_id}")
-def get_detail(subject_id: int, current_user: dict = Depends(get_current_user)) -> dict:
-    with get_conn() as conn:
-        anime = fetch_one(
-            conn,
-            """
-            SELECT
-                id,
-                bgm_subject_id,
-                title,
-                title_zh,
-                summary,
-                start_date,
-                weekday,
-                total_episodes,
-                rating,
-                cover_image_url
-            FROM anime
-            WHERE bgm_subject_id = :sid
-            LIMIT 1;
-            """,
-            {"sid": subject_id},
-        )
-        if not anime:
-            raise HTTPException(status_code=404, detail="Not Found")
-
-        episodes = fetch_all(
-            conn,
-            """
-            SELECT episode_no
-            FROM anime_episode
-            WHERE anime_id = :anime_id
-            ORDER BY episode_no ASC;
-            """,
-            {"anime_id": anime["id"]},
-        )
+async def get_detail(
+    subject_id: int,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user_async),
+) -> dict:
+    # 404 以异常形式抛出，不会写入缓存
+    return await _respond(request, response, "detail", (subject_id,), _load_detail, subject_id)
+
+
+def _load_detail(conn: Connection, subject_id: int) -> dict:
+    anime = fetch_one(
+        conn,
+        """
+        SELECT
+            id,
+            bgm_subject_id,
+            title,
+            title_zh,
+            summary,
+            start_date,
+            weekday,
+            total_episodes,
+            rating,
+            cover_image_url
+        FROM anime
+        WHERE bgm_subject_id = :sid
+        LIMIT 1;
+        """,
+        {"sid": subject_id},
+    )
+    if not anime:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    episodes = fetch_all(
+        conn,
+        """
+        SELECT episode_no
+        FROM anime_episode
+        WHERE anime_id = :anime_id
+        ORDER BY episode_no ASC;
+        """,
+        {"anime_id": anime["id"]},
+    )
+
+    return {"detail": _format_detail(anime, [row["episode_no"] for row in episodes])}
 
-    episode_list = [row["episode_no"] for row in episodes]
+
+def _format_detail(anime: dict, episode_nos: list[int]) -> dict:
+    episode_list = episode_nos
     total_episodes = anime.get("total_episodes") or 0
     if total_episodes:
         episode_list = list(range(1, total_episodes + 1))
 
-    detail: dict[str, Any] = {
+    return {
         "id": str(anime["bgm_subject_id"]),
         "title": anime.get("title") or "",
         "coverUrl": anime.get("cover_image_url") or "",
@@ -222,4 +404,82 @@ def get_detail(subject_id: int, current_user: dict = Depends(get_current_user))
         "rating": _rating_to_five(anime.get("rating")),
     }
 
-    return {"detail": detail}
+
+def _load_all_details(conn: Connection) -> dict[int, dict]:
+    # 生成快照用：两次查询取回全部番剧与章节，避免逐个详情查询
+    anime_rows = fetch_all(
+        conn,
+        """
+        SELECT
+            id,
+            bgm_subject_id,
+            title,
+            title_zh,
+            summary,
+            start_date,
+            weekday,
+            total_episodes,
+            rating,
+            cover_image_url
+        FROM anime;
+        """,
+        {},
+    )
+    episode_rows = fetch_all(
+        conn,
+        """
+        SELECT anime_id, episode_no
+        FROM anime_episode
+        ORDER BY anime_id, episode_no ASC;
+        """,
+        {},
+    )
+    episodes: dict[Any, list[int]] = {}
+    for row in episode_rows:
+        episodes.setdefault(row["anime_id"], []).append(row["episode_no"])
+    return {
+        row["bgm_subject_id"]: {"detail": _format_detail(row, episodes.get(row["id"], []))}
+        for row in anime_rows
+    }
+
+
+def build_snapshots() -> None:
+    # 爬虫线程中执行，使用同步连接；同一事务内读取，快照之间保持一致
+    key = anime_guide_snapshot.snapshot_key
+    today = date.today()
+    week_start = week_start_of(today)
+    week_end = week_start + timedelta(days=6)
+    with get_conn() as conn:
+        payloads: dict[str, dict] = {key("crawl-status", ()): _load_crawl_status(conn)}
+        for weekday in range(7):
+            payloads[key("weekday", (weekday,))] = _load_by_weekday(conn, weekday)
+
+        # 本周（周日至周六，与爬虫写入的放送周、前端周视图一致）的区间与逐日更新
+        week = _load_updates_by_range(conn, week_start, week_end)
+        payloads[key("updates-range", (week_start.isoformat(), week_end.isoformat()))] = week
+        items_by_date = {day["date"]: day["items"] for day in week["days"]}
+        for offset in range(7):
+            day = (week_start + timedelta(days=offset)).isoformat()
+            payloads[key("updates", (day,))] = {"items": items_by_date.get(day, [])}
+
+        for subject_id, detail in _load_all_details(conn).items():
+            payloads[key("detail", (subject_id,))] = detail
+
+        generation = _load_generation(conn)
+
+    anime_guide_snapshot.write_snapshots(payloads, generation)
+
+
+def _on_crawl_complete() -> None:
+    # 先生成快照再清空缓存：反过来的话，清空后到快照写完之间的请求会把旧快照重新缓存
+    try:
+        build_snapshots()
+    except Exception as exc:
+        logger.exception("【快照】新番导视快照生成失败，接口回退实时查询：%s", exc)
+        anime_guide_snapshot.clear()
+    finally:
+        anime_guide_cache.invalidate()
+
+
+# 数据只在爬虫运行后变化，爬虫结束时重建快照并清空响应缓存
+add_crawl_complete_hook(_on_crawl_complete)
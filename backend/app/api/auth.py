@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.db import get_db
-from app.core.password import verify_password
-from app.core.security import create_access_token, get_current_user
+from app.core.password import verify_password_async
+from app.core.security import build_token_claims, create_access_token, get_current_user_async
 from app.schemas.user import CaptchaResponse, LoginRequest, LoginResponse, UserPublic
 from app.services.login_guard_service import (
     MAX_LOGIN_FAILURES,
@@ -29,7 +30,8 @@ def get_captcha() -> CaptchaResponse:
 
 
 @router.post("/auth/login", response_model=LoginResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse:
+async def login(payload: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse:
+    # async 接口：数据库查询走默认线程池，bcrypt 校验走独立的密码哈希线程池。
     lock_remaining_seconds = get_lock_remaining_seconds(payload.identifier)
     if lock_remaining_seconds > 0:
         minutes = (lock_remaining_seconds + 59) // 60
@@ -45,8 +47,8 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse
         )
 
     # 按邮箱登录，大小写不敏感。
-    user = get_user_by_identifier(db, payload.identifier)
-    if not user or not verify_password(payload.password, user["password_hash"]):
+    user = await run_in_threadpool(get_user_by_identifier, db, payload.identifier)
+    if not user or not await verify_password_async(payload.password, user["password_hash"]):
         lock_for_seconds = register_login_failure(payload.identifier)
         if lock_for_seconds > 0:
             raise HTTPException(
@@ -61,7 +63,8 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse
         )
 
     clear_login_failures(payload.identifier)
-    token = create_access_token(user["id"])
+    claims = await run_in_threadpool(build_token_claims, db, user)
+    token = create_access_token(user["id"], claims)
     return {
         "access_token": token,
         "token_type": "bearer",
@@ -75,7 +78,7 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse
 
 
 @router.get("/me", response_model=UserPublic)
-def me(current_user: dict = Depends(get_current_user)) -> UserPublic:
+async def me(current_user: dict = Depends(get_current_user_async)) -> UserPublic:
     # 返回当前登录用户信息。
     return {
         "id": str(current_user["id"]),
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 
-from app.core.db import get_engine
+from app.core.db import get_engine, get_pool_stats
+from app.core.password import get_hasher_stats
+from app.core.security import get_current_user
+from app.services import anime_guide_cache, dify_client, dify_listing_cache, user_cache
 
 router = APIRouter()
 
 
+def _ensure_admin(current_user: dict) -> None:
+    if current_user.get("role_group") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden",
+        )
+
+
 @router.get("/health")
 def health_check() -> dict:
     # 基础健康检查。
@@ -25,3 +36,35 @@ def health_db() -> dict:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(exc)
         ) from exc
+
+
+@router.get("/health/db/pool")
+def health_db_pool(current_user: dict = Depends(get_current_user)) -> dict:
+    # 连接池统计：借出次数、新建连接数、当前借出 / 溢出及峰值（含连接串主机 / 库名，仅 admin）。
+    _ensure_admin(current_user)
+    return {"engines": get_pool_stats()}
+
+
+@router.get("/health/cache")
+def health_cache(current_user: dict = Depends(get_current_user)) -> dict:
+    # 进程内缓存命中统计：鉴权用户缓存、新番导视响应缓存与 Dify 列表缓存。
+    _ensure_admin(current_user)
+    return {
+        "auth_user": user_cache.get_stats(),
+        "anime_guide": anime_guide_cache.get_stats(),
+        "dify_listing": dify_listing_cache.get_stats(),
+    }
+
+
+@router.get("/health/password-hasher")
+def health_password_hasher(current_user: dict = Depends(get_current_user)) -> dict:
+    # 密码哈希线程池：在途 / 排队数、峰值、拒绝次数与平均等待 / 计算耗时。
+    _ensure_admin(current_user)
+    return get_hasher_stats()
+
+
+@router.get("/health/dify")
+def health_dify(current_user: dict = Depends(get_current_user)) -> dict:
+    # Dify 代理请求：按工作流的请求 / 失败 / 重试次数与耗时，按 base URL 的连接复用情况。
+    _ensure_admin(current_user)
+    return dify_client.get_stats()
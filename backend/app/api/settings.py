@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.db import get_db
-from app.core.password import get_password_hash, verify_password
-from app.core.security import get_current_user
-from app.schemas.user import OkResponse, UpdateAccountRequest, UpdatePasswordRequest, UserPublic
+from app.core.password import get_password_hash_async, verify_password_async
+from app.core.security import build_token_claims, create_access_token, get_current_user
+from app.schemas.user import (
+    UpdateAccountRequest,
+    UpdateAccountResponse,
+    UpdatePasswordRequest,
+    UpdatePasswordResponse,
+)
 from app.services.user_service import get_user_with_password, update_user_account, update_user_password
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 
-@router.put("/account", response_model=UserPublic)
+@router.put("/account", response_model=UpdateAccountResponse)
 def update_account(
     payload: UpdateAccountRequest,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> UserPublic:
+) -> UpdateAccountResponse:
     # 更新账号信息（用户名/邮箱）。
     try:
         user = update_user_account(db, current_user["id"], payload.username, payload.email)
@@ -33,20 +39,22 @@ def update_account(
             detail="User not found"
         )
 
+    claims = build_token_claims(db, user)
     return {
         "id": str(user["id"]),
         "username": user["username"],
         "email": user["email"],
-        "role_group": user["role_group"]
+        "role_group": user["role_group"],
+        "access_token": create_access_token(user["id"], claims) if claims else None,
     }
 
 
-@router.put("/password", response_model=OkResponse)
-def update_password(
+@router.put("/password", response_model=UpdatePasswordResponse)
+async def update_password(
     payload: UpdatePasswordRequest,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> OkResponse:
+) -> UpdatePasswordResponse:
     # 更新密码，包含旧密码校验与二次确认。
     if payload.new_password != payload.new_password_confirm:
         raise HTTPException(
@@ -54,14 +62,19 @@ def update_password(
             detail="New password confirmation does not match"
         )
 
-    user = get_user_with_password(db, current_user["id"])
-    if not user or not verify_password(payload.old_password, user["password_hash"]):
+    user = await run_in_threadpool(get_user_with_password, db, current_user["id"])
+    if not user or not await verify_password_async(payload.old_password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Old password is incorrect"
         )
 
-    new_hash = get_password_hash(payload.new_password)
-    update_user_password(db, current_user["id"], new_hash)
+    new_hash = await get_password_hash_async(payload.new_password)
+    await run_in_threadpool(update_user_password, db, current_user["id"], new_hash)
 
-    return {"ok": True}
+    # 改密递增了 token_version，按新版本号重新签发令牌
+    claims = await run_in_threadpool(build_token_claims, db, user)
+    return {
+        "ok": True,
+        "access_token": create_access_token(user["id"], claims) if claims else None,
+    }
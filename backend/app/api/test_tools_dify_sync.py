@@ -0,0 +1,135 @@
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import tools
+from app.core.db import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.services.ai_workflow_session_store import FileSessionStore, create_sqlite_store
+
+WORKFLOW_ID = UUID("00000000-0000-0000-0000-000000000001")
+SYNC_URL = f"/tools/ai-workflows/{WORKFLOW_ID}/sessions/s1/sync-from-dify"
+WORKFLOW = {
+    "id": str(WORKFLOW_ID),
+    "name": "demo",
+    "visible_role_groups": ["admin"],
+    "is_active": True,
+    "dify_base_url": "http://dify.invalid/v1",
+    "dify_api_key": "key",
+    "dify_user_prefix": "webtool",
+    "dify_fixed_user": None,
+    "enable_session_sync": True,
+}
+
+
+class _FakeDb:
+    def execute(self, *_args, **_kwargs):
+        return None
+
+    def commit(self) -> None:
+        pass
+
+
+class FakeDify:
+    # 模拟 Dify /messages：从最新一页开始，first_id 向更早翻页
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+        self.pages = 0
+
+    def add(self, message_id: str, answer: str = "answer") -> None:
+        self.messages.append(
+            {
+                "id": message_id,
+                "query": f"q-{message_id}",
+                "answer": answer,
+                "created_at": 1_700_000_000 + len(self.messages),
+            }
+        )
+
+    def fetch_page(self, _workflow_id, _base_url, _api_key, params) -> tuple[list[dict], bool]:
+        self.pages += 1
+        items = self.messages
+        if params.get("first_id"):
+            ids = [item["id"] for item in items]
+            items = items[: ids.index(params["first_id"])]
+        page = items[-params["limit"]:]
+        return [dict(item) for item in page], len(items) > len(page)
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "filesystem":
+        return FileSessionStore(tmp_path)
+    return create_sqlite_store(tmp_path / "sessions.sqlite3")
+
+
+@pytest.fixture
+def dify(monkeypatch, store):
+    fake = FakeDify()
+    monkeypatch.setattr(tools, "_fetch_dify_message_page", fake.fetch_page)
+    monkeypatch.setattr(tools, "_fetch_workflow_by_id", lambda _db, _workflow_id: WORKFLOW)
+    monkeypatch.setattr(tools, "get_session_store", lambda: store)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "u1", "role_group": "admin"}
+    app.dependency_overrides[get_db] = lambda: _FakeDb()
+    yield fake
+    app.dependency_overrides.clear()
+
+
+def _sync(limit: int = 2) -> dict:
+    response = TestClient(app).post(SYNC_URL, json={"conversation_id": "c1", "limit": limit})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _stored(store) -> list[str]:
+    return [item["content"] for item in store.read_messages("u1", str(WORKFLOW_ID), "s1", 0, 1000)]
+
+
+def _expected(*message_ids: str) -> list[str]:
+    return [text for mid in message_ids for text in (f"q-{mid}", "answer")]
+
+
+def test_incremental_sync_stops_at_cursor(dify, store):
+    for mid in ("m1", "m2", "m3"):
+        dify.add(mid)
+    first = _sync()
+    assert first["imported_pairs"] == 3
+    assert first["last_message_id"] == "m3"
+
+    dify.add("m4")
+    dify.pages = 0
+    second = _sync()
+    assert second["imported_pairs"] == 1
+    assert dify.pages == 1
+    assert _stored(store) == _expected("m1", "m2", "m3", "m4")
+
+
+def test_sync_dedupes_when_cursor_message_is_gone(dify, store):
+    for mid in ("m1", "m2", "m3"):
+        dify.add(mid)
+    _sync()
+
+    # 游标消息在 Dify 中被删除：翻完全部历史，已导入的消息按 ID 去重
+    dify.messages = [item for item in dify.messages if item["id"] != "m3"]
+    dify.add("m4")
+    result = _sync()
+    assert result["imported_pairs"] == 1
+    assert result["last_message_id"] == "m4"
+    assert _stored(store) == _expected("m1", "m2", "m3", "m4")
+
+
+def test_sync_waits_for_streaming_answer(dify, store):
+    dify.add("m1")
+    dify.add("m2", answer="")
+    result = _sync()
+    assert result["imported_pairs"] == 1
+    assert result["last_message_id"] == "m1"
+
+    dify.messages[-1]["answer"] = "answer"
+    dify.add("m3")
+    result = _sync()
+    assert result["imported_pairs"] == 2
+    assert result["last_message_id"] == "m3"
+    assert _stored(store) == _expected("m1", "m2", "m3")
@@ -1,18 +1,16 @@
-import fcntl
-import json
+import logging
 import re
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-import requests
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
-from app.core.security import get_current_user
+from app.core.db import get_async_db, get_db
+from app.core.security import get_current_user, get_current_user_async
 from app.schemas.ai_workflow import (
     AIDifyConversationListResponse,
     AIDifyMessageListResponse,
@@ -20,15 +18,23 @@ from app.schemas.ai_workflow import (
     AIWorkflowItem,
     AIWorkflowSessionAppendRequest,
     AIWorkflowSessionAppendResponse,
+    AIWorkflowSessionListResponse,
+    AIWorkflowSessionMessageListResponse,
     AIWorkflowSyncFromDifyRequest,
     AIWorkflowSyncFromDifyResponse,
     AIWorkflowUpdateRequest,
 )
+from app.services import ai_workflow_session_log as session_log
+from app.services import dify_client, dify_listing_cache
+from app.services.ai_workflow_session_store import get_session_store
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-SESSION_LOG_ROOT = Path(__file__).resolve().parents[2] / "logs" / "ai_workflow_sessions"
 SAFE_FILENAME_RE = re.compile(r"^[A-Za-z0-9._-]+$")
+# sync-from-dify 单次最多翻页数（每页 payload.limit 条）
+DIFY_SYNC_MAX_PAGES = 20
 
 
 def _ensure_admin(current_user: dict) -> None:
@@ -114,12 +120,33 @@ def _resolve_dify_user(workflow: dict, current_user: dict) -> str:
     return f"{workflow['dify_user_prefix']}:{current_user_id}"
 
 
-def _build_session_file_path(workflow_id: UUID, session_id: str, user_identifier: str) -> Path:
-    safe_session_id = _safe_part(session_id, "session_id")
-    safe_workflow_id = _safe_part(str(workflow_id), "workflow_id")
-    user_dir = SESSION_LOG_ROOT / user_identifier
-    user_dir.mkdir(parents=True, exist_ok=True)
-    return user_dir / f"{safe_workflow_id}_{safe_session_id}.json"
+def _fetch_dify_message_page(
+    workflow_id: UUID, dify_base_url: str, dify_api_key: str, params: dict[str, Any]
+) -> tuple[list[dict], bool]:
+    # 返回 (按 created_at 升序的消息, has_more)；不依赖 Dify 单页内的排列顺序
+    result = dify_client.get_json(dify_base_url, dify_api_key, "/messages", params, workflow_id)
+
+    raw_items = result.get("data") or []
+    if not isinstance(raw_items, list):
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Invalid Dify messages payload"
+        )
+    items = [item for item in raw_items if isinstance(item, dict)]
+    items.sort(key=lambda item: item.get("created_at") if isinstance(item.get("created_at"), (int, float)) else 0)
+    return items, bool(result.get("has_more"))
+
+
+def _build_session_header(
+    workflow_id: UUID, workflow: dict, user_identifier: str, session_id: str, created_at: str
+) -> dict:
+    return session_log.build_header(
+        workflow_id=str(workflow_id),
+        workflow_name=workflow["name"],
+        user=user_identifier,
+        session_id=session_id,
+        created_at=created_at,
+    )
 
 
 @router.get("/")
@@ -133,9 +160,9 @@ def list_tools(current_user: dict = Depends(get_current_user)) -> dict:
 
 
 @router.get("/ai-workflows", response_model=list[AIWorkflowItem])
-def list_ai_workflows(
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def list_ai_workflows(
+    current_user: dict = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ) -> list[AIWorkflowItem]:
     is_admin = current_user.get("role_group") == "admin"
     role_group = current_user.get("role_group", "")
@@ -158,7 +185,7 @@ def list_ai_workflows(
             FROM public.ai_workflow
             ORDER BY sort_order ASC NULLS LAST, created_at DESC;
         """
-        rows = db.execute(text(sql)).mappings().all()
+        rows = (await db.execute(text(sql))).mappings().all()
     else:
         sql = """
             SELECT
@@ -179,11 +206,30 @@ def list_ai_workflows(
               AND :role_group = ANY(visible_role_groups)
             ORDER BY sort_order ASC NULLS LAST, created_at DESC;
         """
-        rows = db.execute(text(sql), {"role_group": role_group}).mappings().all()
+        rows = (await db.execute(text(sql), {"role_group": role_group})).mappings().all()
 
     return [_normalize_workflow_row_for_sync(row) for row in rows]
 
 
+# 需在 /ai-workflows/{workflow_id} 之前注册，避免 "sessions" 被当作 workflow_id 匹配
+@router.get("/ai-workflows/sessions", response_model=AIWorkflowSessionListResponse)
+def list_ai_workflow_sessions(
+    limit: int = 20,
+    offset: int = 0,
+    current_user: dict = Depends(get_current_user),
+) -> AIWorkflowSessionListResponse:
+    limit = min(max(limit, 1), 100)
+    offset = max(offset, 0)
+    user_identifier = str(current_user.get("id") or current_user.get("username") or "unknown")
+    sessions = get_session_store().list_sessions(user_identifier, limit + 1, offset)
+    return {
+        "data": sessions[:limit],
+        "has_more": len(sessions) > limit,
+        "limit": limit,
+        "offset": offset,
+    }
+
+
 @router.get("/ai-workflows/{workflow_id}", response_model=AIWorkflowItem)
 def get_ai_workflow(
     workflow_id: UUID,
@@ -348,6 +394,8 @@ def update_ai_workflow(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
+    # base URL / API Key / 用户规则可能已变，丢弃该工作流的列表缓存
+    dify_listing_cache.invalidate(workflow_id)
     return _normalize_workflow_row(row)
 
 
@@ -374,6 +422,7 @@ def delete_ai_workflow(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
+    dify_listing_cache.invalidate(workflow_id)
     return {"ok": True}
 
 
@@ -405,41 +454,12 @@ def append_ai_workflow_session_message(
 
     user_identifier = str(current_user.get("id") or current_user.get("username") or "unknown")
     safe_session_id = _safe_part(session_id, "session_id")
-    session_file = _build_session_file_path(workflow_id, safe_session_id, user_identifier)
-
     now_iso = datetime.now(timezone.utc).isoformat()
-    with session_file.open("a+", encoding="utf-8") as file:
-        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
-        try:
-            file.seek(0)
-            raw = file.read().strip()
-            if raw:
-                data = json.loads(raw)
-            else:
-                data = {
-                    "workflow_id": str(workflow_id),
-                    "workflow_name": workflow["name"],
-                    "user": user_identifier,
-                    "session_id": safe_session_id,
-                    "created_at": now_iso,
-                    "messages": [],
-                }
-
-            data.setdefault("messages", [])
-            data["messages"].append(
-                {
-                    "role": payload.role,
-                    "content": payload.content,
-                    "ts": now_iso,
-                }
-            )
-
-            file.seek(0)
-            file.truncate()
-            json.dump(data, file, ensure_ascii=False, indent=2)
-            file.write("\n")
-        finally:
-            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    get_session_store().append(
+        _build_session_header(workflow_id, workflow, user_identifier, safe_session_id, now_iso),
+        [session_log.build_message(payload.role, payload.content, now_iso)],
+    )
+    dify_listing_cache.invalidate(workflow_id, _resolve_dify_user(workflow, current_user))
 
     return {
         "ok": True,
@@ -448,6 +468,35 @@ def append_ai_workflow_session_message(
     }
 
 
+@router.get(
+    "/ai-workflows/{workflow_id}/sessions/{session_id}/messages",
+    response_model=AIWorkflowSessionMessageListResponse,
+)
+def list_ai_workflow_session_messages(
+    workflow_id: UUID,
+    session_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    current_user: dict = Depends(get_current_user),
+) -> AIWorkflowSessionMessageListResponse:
+    # 只能读取自己的会话，按 seq 升序分页
+    limit = min(max(limit, 1), 500)
+    offset = max(offset, 0)
+    user_identifier = str(current_user.get("id") or current_user.get("username") or "unknown")
+    safe_session_id = _safe_part(session_id, "session_id")
+    messages = get_session_store().read_messages(
+        user_identifier, str(workflow_id), safe_session_id, offset, limit + 1
+    )
+    return {
+        "data": messages[:limit],
+        "has_more": len(messages) > limit,
+        "offset": offset,
+        "limit": limit,
+        "workflow_id": workflow_id,
+        "session_id": safe_session_id,
+    }
+
+
 @router.post(
     "/ai-workflows/{workflow_id}/sessions/{session_id}/sync-from-dify",
     response_model=AIWorkflowSyncFromDifyResponse,
@@ -492,98 +541,94 @@ def sync_ai_workflow_session_from_dify(
     safe_session_id = _safe_part(session_id, "session_id")
     dify_user = payload.user or _resolve_dify_user(workflow, current_user)
 
-    try:
-        response = requests.get(
-            f"{dify_base_url.rstrip('/')}/messages",
-            headers={"Authorization": f"Bearer {dify_api_key}"},
-            params={
-                "conversation_id": payload.conversation_id,
-                "user": dify_user,
-                "limit": payload.limit,
-            },
-            timeout=20,
-        )
-    except requests.RequestException as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Failed to call Dify /messages"
-        ) from exc
+    store = get_session_store()
+    store_key = (current_user_id, str(workflow_id), safe_session_id)
+    cursor_id = store.get_sync_cursor(*store_key, payload.conversation_id)
 
-    if response.status_code >= 400:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Dify /messages failed: HTTP {response.status_code}"
-        )
-
-    try:
-        result = response.json()
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Invalid JSON from Dify /messages"
-        ) from exc
-
-    raw_items = result.get("data") or []
-    if not isinstance(raw_items, list):
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Invalid Dify messages payload"
-        )
+    # 从最新一页开始，用 first_id 向更早翻页，遇到游标即停止
+    pages: list[list[dict]] = []
+    params: dict[str, Any] = {
+        "conversation_id": payload.conversation_id,
+        "user": dify_user,
+        "limit": payload.limit,
+    }
+    has_more = False
+    for _ in range(DIFY_SYNC_MAX_PAGES):
+        items, has_more = _fetch_dify_message_page(workflow_id, dify_base_url, dify_api_key, params)
+        if not items:
+            has_more = False
+            break
+        item_ids = [item.get("id") for item in items]
+        if cursor_id and cursor_id in item_ids:
+            pages.append(items[item_ids.index(cursor_id) + 1:])
+            has_more = False
+            break
+        pages.append(items)
+        if not has_more or not items[0].get("id"):
+            break
+        params["first_id"] = items[0]["id"]
+    if has_more:
+        logger.warning(
+            "【AI 工作流】Dify 同步达到翻页上限，更早的消息未导入 workflow=%s conversation=%s pages=%s",
+            workflow_id,
+            payload.conversation_id,
+            DIFY_SYNC_MAX_PAGES,
+        )
+
+    # 页按从新到旧获取，落盘时按时间升序写入
+    fetched = [item for items in reversed(pages) for item in items]
+    # 始终按已落库的 Dify 消息 ID 去重：游标消息在 Dify 中被删除时会翻到更早的历史
+    seen_ids = store.find_dify_message_ids(
+        *store_key, [item["id"] for item in fetched if item.get("id")]
+    )
 
-    session_file = _build_session_file_path(workflow_id, safe_session_id, current_user_id)
     now_iso = datetime.now(timezone.utc).isoformat()
     imported_pairs = 0
-    imported_messages = 0
-
-    with session_file.open("a+", encoding="utf-8") as file:
-        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
-        try:
-            file.seek(0)
-            raw = file.read().strip()
-            if raw:
-                data = json.loads(raw)
-            else:
-                data = {
-                    "workflow_id": str(workflow_id),
-                    "workflow_name": workflow["name"],
-                    "user": current_user_id,
-                    "session_id": safe_session_id,
-                    "created_at": now_iso,
-                    "messages": [],
-                }
-
-            data.setdefault("messages", [])
-
-            # Dify /messages 默认倒序返回，落盘时按时间升序写入
-            for item in reversed(raw_items):
-                created_at = item.get("created_at")
-                ts_iso = now_iso
-                if isinstance(created_at, (int, float)):
-                    ts_iso = datetime.fromtimestamp(created_at, tz=timezone.utc).isoformat()
-                elif isinstance(created_at, str) and created_at.strip():
-                    ts_iso = created_at.strip()
-
-                query = (item.get("query") or "").strip()
-                answer = (item.get("answer") or "").strip()
-                if query:
-                    data["messages"].append(
-                        {"role": "user", "content": query, "ts": ts_iso}
-                    )
-                    imported_messages += 1
-                if answer:
-                    data["messages"].append(
-                        {"role": "assistant", "content": answer, "ts": ts_iso}
-                    )
-                    imported_messages += 1
-                if query or answer:
-                    imported_pairs += 1
-
-            file.seek(0)
-            file.truncate()
-            json.dump(data, file, ensure_ascii=False, indent=2)
-            file.write("\n")
-        finally:
-            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    messages: list[dict] = []
+    # 游标只推进到第一条未完成（answer 仍在流式生成）的消息之前；
+    # 该消息及之后的消息本次不导入，下次同步从游标处按顺序补齐
+    next_cursor_id = cursor_id
+    pending = False
+
+    for item in fetched:
+        message_id = item.get("id")
+        query = (item.get("query") or "").strip()
+        answer = (item.get("answer") or "").strip()
+        if pending or (query and not answer and item.get("status") != "error"):
+            pending = True
+            continue
+        if message_id:
+            next_cursor_id = message_id
+            if message_id in seen_ids:
+                continue
+            seen_ids.add(message_id)
+
+        created_at = item.get("created_at")
+        ts_iso = now_iso
+        if isinstance(created_at, (int, float)):
+            ts_iso = datetime.fromtimestamp(created_at, tz=timezone.utc).isoformat()
+        elif isinstance(created_at, str) and created_at.strip():
+            ts_iso = created_at.strip()
+
+        if query:
+            messages.append(session_log.build_message("user", query, ts_iso, message_id))
+        if answer:
+            messages.append(session_log.build_message("assistant", answer, ts_iso, message_id))
+        if query or answer:
+            imported_pairs += 1
+
+    # 消息与新游标一次写入，中途失败不会出现游标前移而消息缺失
+    cursor = (
+        (payload.conversation_id, next_cursor_id)
+        if next_cursor_id and next_cursor_id != cursor_id
+        else None
+    )
+    imported_messages = store.append(
+        _build_session_header(workflow_id, workflow, current_user_id, safe_session_id, now_iso),
+        messages,
+        cursor,
+    )
+    dify_listing_cache.invalidate(workflow_id, dify_user)
 
     db.execute(
         text(
@@ -604,7 +649,9 @@ def sync_ai_workflow_session_from_dify(
         "conversation_id": payload.conversation_id,
         "imported_pairs": imported_pairs,
         "imported_messages": imported_messages,
-        "has_more": bool(result.get("has_more")),
+        "has_more": has_more,
+        "fetched_pages": len(pages),
+        "last_message_id": next_cursor_id,
     }
 
 
@@ -665,32 +712,12 @@ def list_dify_conversations(
     if last_id:
         params["last_id"] = last_id
 
-    try:
-        response = requests.get(
-            f"{dify_base_url.rstrip('/')}/conversations",
-            headers={"Authorization": f"Bearer {dify_api_key}"},
-            params=params,
-            timeout=20,
-        )
-    except requests.RequestException as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Failed to call Dify /conversations"
-        ) from exc
-
-    if response.status_code >= 400:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Dify /conversations failed: HTTP {response.status_code}"
-        )
-
-    try:
-        result = response.json()
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Invalid JSON from Dify /conversations"
-        ) from exc
+    result = dify_listing_cache.get_or_load(
+        workflow_id,
+        dify_user,
+        ("/conversations", limit, last_id, sort_by),
+        lambda: dify_client.get_json(dify_base_url, dify_api_key, "/conversations", params, workflow_id),
+    )
 
     rows = result.get("data") or []
     if not isinstance(rows, list):
@@ -777,32 +804,12 @@ def list_dify_messages(
     if first_id:
         params["first_id"] = first_id
 
-    try:
-        response = requests.get(
-            f"{dify_base_url.rstrip('/')}/messages",
-            headers={"Authorization": f"Bearer {dify_api_key}"},
-            params=params,
-            timeout=20,
-        )
-    except requests.RequestException as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Failed to call Dify /messages"
-        ) from exc
-
-    if response.status_code >= 400:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Dify /messages failed: HTTP {response.status_code}"
-        )
-
-    try:
-        result = response.json()
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Invalid JSON from Dify /messages"
-        ) from exc
+    result = dify_listing_cache.get_or_load(
+        workflow_id,
+        dify_user,
+        ("/messages", normalized_conversation_id, limit, first_id),
+        lambda: dify_client.get_json(dify_base_url, dify_api_key, "/messages", params, workflow_id),
+    )
 
     rows = result.get("data") or []
     if not isinstance(rows, list):
@@ -0,0 +1,20 @@
+import os
+import tempfile
+from pathlib import Path
+
+from app.services.anime_crawler.fixture_server import FixtureServer
+
+# 多个模块在导入时读取配置（数据库地址、Bangumi 地址、缓存与快照目录），而 app.main 会导入全部路由和爬虫；
+# 因此在收集任何用例之前统一设置：临时 SQLite 文件与离线语料，不访问 bangumi.tv。
+# 接口用例不连接数据库，依赖均在用例中替换。
+WORK_DIR = Path(tempfile.mkdtemp(prefix="webtool_test_"))
+FIXTURE_SERVER = FixtureServer()
+os.environ["DATABASE_URL"] = f"sqlite:///{WORK_DIR / 'crawler.db'}"
+os.environ["BANGUMI_BASE_URL"] = FIXTURE_SERVER.base_url
+os.environ["BANGUMI_FALLBACK_BASE_URL"] = FIXTURE_SERVER.base_url
+os.environ["BANGUMI_HTTP_CACHE_DIR"] = str(WORK_DIR / "http_cache")
+# 爬虫结束回调会重建 / 清空导视快照，不能碰开发机上真实的快照目录
+os.environ["ANIME_GUIDE_SNAPSHOT_DIR"] = str(WORK_DIR / "anime_guide_snapshot")
+# 本地 fixture 服务器无需礼貌限速，放开 async 引擎的令牌桶
+os.environ["BANGUMI_ASYNC_RATE_PER_SECOND"] = "1000"
+os.environ["BANGUMI_ASYNC_BURST"] = "1000"
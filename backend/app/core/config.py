@@ -18,10 +18,59 @@ SUPABASE_JWT_PUBLIC_KEY = get_env("SUPABASE_JWT_PUBLIC_KEY")
 # PostgreSQL 连接地址。
 DATABASE_URL = get_env("DATABASE_URL")
 
+# 数据库连接池（进程内共享引擎，API 与爬虫共用）。
+# pool_recycle 默认 30 分钟，避免 Supabase 连接池回收空闲连接后出现失效连接。
+DB_POOL_SIZE = int(get_env("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(get_env("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SECONDS = int(get_env("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_TIMEOUT_SECONDS = int(get_env("DB_POOL_TIMEOUT_SECONDS", "30"))
+
 # JWT 配置（用于后端自签发）。
 JWT_SECRET = get_env("JWT_SECRET", "dev-secret-change-me")
 JWT_ALGORITHM = get_env("JWT_ALGORITHM", "HS256")
 JWT_EXPIRES_MINUTES = int(get_env("JWT_EXPIRES_MINUTES", "60"))
+# 令牌格式：minimal = 只含 sub/exp，每个请求加载用户；
+# claims = 额外携带 username/email/role_group 与用户令牌版本 ver，鉴权只校验版本号（需执行
+# docs/database/app-users-token-version-migration.sql）。
+JWT_CLAIMS_MODE = get_env("JWT_CLAIMS_MODE", "minimal").strip().lower() or "minimal"
+# claims 模式下令牌版本号的缓存时间（秒）：其它进程吊销令牌后最多延迟这么久生效。
+JWT_TOKEN_VERSION_CHECK_SECONDS = int(get_env("JWT_TOKEN_VERSION_CHECK_SECONDS", "30"))
+
+# 密码哈希（bcrypt）独立线程池：线程数与最大排队数，超出排队上限的请求直接返回 503。
+PASSWORD_HASH_WORKERS = max(int(get_env("PASSWORD_HASH_WORKERS", "2")), 1)
+PASSWORD_HASH_MAX_QUEUE = max(int(get_env("PASSWORD_HASH_MAX_QUEUE", "32")), 0)
+
+# 鉴权用户缓存：get_current_user 按用户 ID 缓存用户行（秒，0 表示关闭）与最大条目数。
+# 本进程内的资料 / 密码 / 删除操作会立即失效；多 worker 部署时其它进程最多延迟一个 TTL。
+AUTH_USER_CACHE_TTL_SECONDS = int(get_env("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(get_env("AUTH_USER_CACHE_MAX_ENTRIES", "1024"))
+
+# 新番导视只读接口的进程内缓存：TTL（秒，0 表示关闭）与最大条目数。
+# 爬虫运行结束时会整体清空，TTL 只兜底其它进程（如手动脚本）写入的数据。
+ANIME_GUIDE_CACHE_TTL_SECONDS = int(get_env("ANIME_GUIDE_CACHE_TTL_SECONDS", "600"))
+ANIME_GUIDE_CACHE_MAX_ENTRIES = int(get_env("ANIME_GUIDE_CACHE_MAX_ENTRIES", "512"))
+
+# 新番导视静态快照：爬虫结束时把星期列表、本周每日更新与全部详情写成 gzip JSON，
+# 接口优先读取快照，缺失时回退实时查询。目录留空则使用 logs/anime_guide_snapshot。
+ANIME_GUIDE_SNAPSHOT_ENABLED = get_env("ANIME_GUIDE_SNAPSHOT_ENABLED", "1").lower() not in ("0", "false", "no")
+ANIME_GUIDE_SNAPSHOT_DIR = get_env("ANIME_GUIDE_SNAPSHOT_DIR")
+
+# AI 工作流会话存储：filesystem（默认，logs/ai_workflow_sessions 下的 JSONL）、
+# sqlite（内嵌 SQLite WAL，单机多 worker）、postgres（DATABASE_URL，多容器部署）。
+# SQLite 文件路径留空则使用 logs/ai_workflow_sessions.sqlite3。
+AI_SESSION_STORE = get_env("AI_SESSION_STORE", "filesystem").strip().lower() or "filesystem"
+AI_SESSION_SQLITE_PATH = get_env("AI_SESSION_SQLITE_PATH")
+
+# Dify API 共享客户端：每个 base URL 的 keep-alive 连接数上限、连接 / 读取超时（秒）、
+# GET 请求的最大重试次数（连接错误与 429/502/503/504）。
+DIFY_HTTP_POOL_MAXSIZE = int(get_env("DIFY_HTTP_POOL_MAXSIZE", "10"))
+DIFY_HTTP_CONNECT_TIMEOUT_SECONDS = float(get_env("DIFY_HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+DIFY_HTTP_READ_TIMEOUT_SECONDS = float(get_env("DIFY_HTTP_READ_TIMEOUT_SECONDS", "20"))
+DIFY_HTTP_RETRIES = int(get_env("DIFY_HTTP_RETRIES", "2"))
+
+# Dify 会话 / 消息列表的短 TTL 缓存（秒，0 关闭）与最大条目数；并发的相同请求合并为一次上游调用。
+DIFY_LISTING_CACHE_TTL_SECONDS = float(get_env("DIFY_LISTING_CACHE_TTL_SECONDS", "5"))
+DIFY_LISTING_CACHE_MAX_ENTRIES = int(get_env("DIFY_LISTING_CACHE_MAX_ENTRIES", "256"))
 
 # CORS：逗号分隔的来源列表，例如：
 # CORS_ALLOW_ORIGINS=https://example.com,https://www.example.com
@@ -1,15 +1,155 @@
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+import threading
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+)
+
+
+@dataclass
+class _PoolCounters:
+    checkouts: int = 0
+    connects: int = 0
+    peak_checked_out: int = 0
+    peak_overflow: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+# 进程内引擎注册表：同一个连接串只创建一次引擎（连接池），API 会话与爬虫共用。
+# 异步引擎（asyncpg）单独登记，供 async 只读接口使用，并发受连接池而非线程池限制。
+_engines: dict[str, Engine] = {}
+_async_engines: dict[str, AsyncEngine] = {}
+_counters: dict[str, _PoolCounters] = {}
+_engines_lock = threading.Lock()
+
+
+def _pool_kwargs(url: str) -> dict:
+    # SQLite（本地调试 / 基准测试）使用 SQLAlchemy 默认连接池，不支持以下参数
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
 
 
-def get_engine() -> Engine:
-    # 在应用启动或首次访问时创建连接引擎。
-    if not DATABASE_URL:
+def _track_pool(engine: Engine, counters: _PoolCounters) -> None:
+    pool = engine.pool
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(_dbapi_conn, _record) -> None:
+        with counters.lock:
+            counters.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(_dbapi_conn, _record, _proxy) -> None:
+        checked_out = getattr(pool, "checkedout", lambda: 0)()
+        overflow = getattr(pool, "overflow", lambda: 0)()
+        with counters.lock:
+            counters.checkouts += 1
+            counters.peak_checked_out = max(counters.peak_checked_out, checked_out)
+            counters.peak_overflow = max(counters.peak_overflow, overflow)
+
+
+def get_engine(url: str | None = None) -> Engine:
+    # 首次访问时创建连接引擎，之后复用同一个连接池。
+    url = url or DATABASE_URL
+    if not url:
         raise ValueError("DATABASE_URL is not set")
-    return create_engine(DATABASE_URL, pool_pre_ping=True)
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url, pool_pre_ping=True, **_pool_kwargs(url))
+            counters = _PoolCounters()
+            _track_pool(engine, counters)
+            _engines[url] = engine
+            _counters[url] = counters
+        return engine
+
+
+def _async_url(url: str) -> str:
+    # 同一个 DATABASE_URL 换成异步驱动：PostgreSQL -> asyncpg，SQLite -> aiosqlite（本地调试）
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        # asyncpg 不认识 libpq 的 sslmode，对应参数为 ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def get_async_engine(url: str | None = None) -> AsyncEngine:
+    # 与同步引擎相同的连接池参数；首次访问时创建，之后复用。
+    url = url or DATABASE_URL
+    if not url:
+        raise ValueError("DATABASE_URL is not set")
+    with _engines_lock:
+        engine = _async_engines.get(url)
+        if engine is None:
+            engine = create_async_engine(_async_url(url), pool_pre_ping=True, **_pool_kwargs(url))
+            counters = _PoolCounters()
+            _track_pool(engine.sync_engine, counters)
+            _async_engines[url] = engine
+            _counters[f"async:{url}"] = counters
+        return engine
+
+
+def get_pool_stats() -> list[dict]:
+    with _engines_lock:
+        items = [(url, engine, _counters[url], False) for url, engine in _engines.items()]
+        items += [
+            (url, engine.sync_engine, _counters[f"async:{url}"], True)
+            for url, engine in _async_engines.items()
+        ]
+    stats: list[dict] = []
+    for _url, engine, counters, is_async in items:
+        pool = engine.pool
+        with counters.lock:
+            item = {
+                "url": engine.url.render_as_string(hide_password=True),
+                "async": is_async,
+                "pool": type(pool).__name__,
+                "checkouts": counters.checkouts,
+                "connects": counters.connects,
+                "peak_checked_out": counters.peak_checked_out,
+                "peak_overflow": counters.peak_overflow,
+            }
+        # QueuePool 才有容量 / 借出 / 溢出信息，SQLite 的连接池没有这些方法
+        for key in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, key, None)
+            item[key] = method() if callable(method) else None
+        stats.append(item)
+    return stats
+
+
+def dispose_engines() -> None:
+    with _engines_lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.dispose()
+
+
+async def dispose_async_engines() -> None:
+    with _engines_lock:
+        engines = list(_async_engines.values())
+    for engine in engines:
+        await engine.dispose()
 
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
@@ -26,3 +166,9 @@ def get_db():
         yield session
     finally:
         session.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    # async 接口使用的会话；查询期间不占用线程池线程。
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
@@ -1,8 +1,20 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from app.core.config import PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS
+
 # 统一密码哈希/校验策略，便于后续替换算法。
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return _pwd_context.verify(plain_password, password_hash)
@@ -10,3 +22,109 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
 
 def get_password_hash(plain_password: str) -> str:
     return _pwd_context.hash(plain_password)
+
+
+# bcrypt 是 CPU 密集操作：接口通过下面的 async 版本把计算放到独立的小线程池，
+# 不占用 FastAPI 默认线程池（新番导视等同步接口共用）。排队数超过上限时直接返回 503，
+# 避免登录洪峰无限堆积。
+
+
+@dataclass
+class _HasherStats:
+    submitted: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    rejected: int = 0
+    pending: int = 0
+    peak_pending: int = 0
+    total_wait_ms: float = 0.0
+    total_run_ms: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_stats = _HasherStats()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+        return _executor
+
+
+async def _run_in_hasher(func: Callable[..., T], *args: str) -> T:
+    with _stats.lock:
+        # pending 包含正在计算与排队等待的任务
+        if _stats.pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+            _stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="认证请求过多，请稍后再试"
+            )
+        _stats.submitted += 1
+        _stats.pending += 1
+        _stats.peak_pending = max(_stats.peak_pending, _stats.pending)
+    submitted_at = time.perf_counter()
+
+    def _task() -> T:
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with _stats.lock:
+                _stats.total_wait_ms += (started_at - submitted_at) * 1000
+                _stats.total_run_ms += (finished_at - started_at) * 1000
+
+    def _on_done(future: Future) -> None:
+        # 按任务本身结束计数：请求被取消（客户端断开）时任务可能仍在排队或计算
+        with _stats.lock:
+            _stats.pending -= 1
+            if future.cancelled():
+                _stats.cancelled += 1
+            else:
+                _stats.completed += 1
+
+    future = _get_executor().submit(_task)
+    future.add_done_callback(_on_done)
+    # 等待方被取消时，尚未开始的任务随之取消；已在计算的任务跑完后再计数
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await _run_in_hasher(verify_password, plain_password, password_hash)
+
+
+async def get_password_hash_async(plain_password: str) -> str:
+    return await _run_in_hasher(get_password_hash, plain_password)
+
+
+def get_hasher_stats() -> dict:
+    with _stats.lock:
+        completed = _stats.completed
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_queue": PASSWORD_HASH_MAX_QUEUE,
+            "pending": _stats.pending,
+            "queued": max(_stats.pending - PASSWORD_HASH_WORKERS, 0),
+            "peak_pending": _stats.peak_pending,
+            "submitted": _stats.submitted,
+            "completed": completed,
+            "cancelled": _stats.cancelled,
+            "rejected": _stats.rejected,
+            "avg_wait_ms": round(_stats.total_wait_ms / completed, 2) if completed else 0.0,
+            "avg_run_ms": round(_stats.total_run_ms / completed, 2) if completed else 0.0,
+        }
+
+
+def shutdown_password_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Mapping, Optional
 
 import jwt
 from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.config import JWT_ALGORITHM, JWT_EXPIRES_MINUTES, JWT_SECRET
-from app.core.db import get_db
-from app.services.user_service import get_user_by_id
+from app.core.config import JWT_ALGORITHM, JWT_CLAIMS_MODE, JWT_EXPIRES_MINUTES, JWT_SECRET
+from app.core.db import get_async_db, get_db
+from app.services import user_cache
+from app.services.user_service import (
+    get_user_by_id,
+    get_user_by_id_async,
+    get_user_token_version,
+    get_user_token_version_async,
+)
 
 
 def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
@@ -20,13 +27,28 @@ def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
     return parts[1]
 
 
-def create_access_token(user_id: str) -> str:
-    # 生成短期访问令牌，sub 存用户 ID。
+def create_access_token(user_id: str, claims: Optional[Mapping[str, Any]] = None) -> str:
+    # 生成短期访问令牌，sub 存用户 ID；claims 模式额外携带用户信息与令牌版本号。
     expire_at = datetime.utcnow() + timedelta(minutes=JWT_EXPIRES_MINUTES)
     payload = {"sub": str(user_id), "exp": expire_at}
+    if claims:
+        payload.update(claims)
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def build_token_claims(db: Session, user: Mapping[str, Any]) -> Optional[dict]:
+    # minimal 模式返回 None，令牌只含 sub/exp。
+    if JWT_CLAIMS_MODE != "claims":
+        return None
+    version = get_user_token_version(db, user["id"])
+    return {
+        "username": user["username"],
+        "email": user["email"],
+        "role_group": user["role_group"],
+        "ver": version or 0,
+    }
+
+
 def decode_access_token(token: str) -> dict:
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
@@ -37,31 +59,77 @@ def decode_access_token(token: str) -> dict:
         ) from exc
 
 
-def get_current_user(
-    authorization: Optional[str] = Header(default=None),
-    db: Session = Depends(get_db),
-) -> dict:
-    # 校验 JWT 并加载当前用户。
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Unauthorized"
+    )
+
+
+def _decode_authorization(authorization: Optional[str]) -> tuple[str, dict]:
+    # 解析并校验 Bearer 令牌，返回 (用户 ID, payload)。
     token = _extract_bearer_token(authorization)
     if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized"
-        )
+        raise _unauthorized()
 
     payload = decode_access_token(token)
     user_id = payload.get("sub")
     if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized"
-        )
+        raise _unauthorized()
+    return str(user_id), payload
+
+
+def _uses_claims(payload: dict) -> bool:
+    return JWT_CLAIMS_MODE == "claims" and "ver" in payload
+
 
-    user = get_user_by_id(db, user_id)
+def get_current_user(
+    authorization: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+) -> dict:
+    # 校验 JWT 并加载当前用户。
+    user_id, payload = _decode_authorization(authorization)
+
+    # 命中缓存时不查询数据库；用户变更时由 user_service 失效
+    if _uses_claims(payload):
+        version = user_cache.get_token_version(user_id, lambda: get_user_token_version(db, user_id))
+        return _user_from_claims(user_id, payload, version)
+
+    user = user_cache.get_or_load(user_id, lambda: get_user_by_id(db, user_id))
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized"
+        raise _unauthorized()
+
+    return user
+
+
+async def get_current_user_async(
+    authorization: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    # async 接口使用的版本：缓存未命中时经异步引擎查询，不占用线程池。
+    user_id, payload = _decode_authorization(authorization)
+
+    if _uses_claims(payload):
+        version = await user_cache.get_token_version_async(
+            user_id, lambda: get_user_token_version_async(db, user_id)
         )
+        return _user_from_claims(user_id, payload, version)
+
+    user = await user_cache.get_or_load_async(user_id, lambda: get_user_by_id_async(db, user_id))
+    if not user:
+        raise _unauthorized()
 
     return user
+
+
+def _user_from_claims(user_id: str, payload: dict, version: Optional[int]) -> dict:
+    # 用户信息直接取自已验签的令牌，只校验令牌版本号（带短期缓存），
+    # 版本号不一致（改密码 / 改权限组）或用户已删除时拒绝。
+    if version is None or version != payload.get("ver"):
+        raise _unauthorized()
+    return {
+        "id": user_id,
+        "username": payload.get("username") or "",
+        "email": payload.get("email") or "",
+        "role_group": payload.get("role_group") or "",
+    }
@@ -11,6 +11,9 @@ from app.api.health import router as health_router
 from app.api.settings import router as settings_router
 from app.api.tools import router as tools_router
 from app.core.config import CORS_ALLOW_ORIGINS
+from app.core.db import dispose_async_engines, dispose_engines
+from app.core.password import shutdown_password_executor
+from app.services import dify_client
 from app.services.anime_crawler.scheduler import shutdown_crawler_scheduler, start_on_startup
 
 logging.basicConfig(
@@ -45,5 +48,9 @@ def on_startup() -> None:
 
 
 @app.on_event("shutdown")
-def on_shutdown() -> None:
+async def on_shutdown() -> None:
     shutdown_crawler_scheduler()
+    dispose_engines()
+    await dispose_async_engines()
+    shutdown_password_executor()
+    dify_client.close_sessions()
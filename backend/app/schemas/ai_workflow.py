@@ -191,6 +191,38 @@ class AIWorkflowSessionAppendResponse(BaseModel):
     session_id: str
 
 
+class AIWorkflowSessionSummary(BaseModel):
+    workflow_id: UUID
+    workflow_name: str | None = None
+    session_id: str
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    message_count: int
+
+
+class AIWorkflowSessionListResponse(BaseModel):
+    data: list[AIWorkflowSessionSummary]
+    has_more: bool
+    limit: int
+    offset: int
+
+
+class AIWorkflowSessionMessage(BaseModel):
+    seq: int
+    role: str
+    content: str
+    ts: str | None = None
+
+
+class AIWorkflowSessionMessageListResponse(BaseModel):
+    data: list[AIWorkflowSessionMessage]
+    has_more: bool
+    offset: int
+    limit: int
+    workflow_id: UUID
+    session_id: str
+
+
 class AIWorkflowSyncFromDifyRequest(BaseModel):
     conversation_id: str
     limit: int = 100
@@ -230,6 +262,8 @@ class AIWorkflowSyncFromDifyResponse(BaseModel):
     imported_pairs: int
     imported_messages: int
     has_more: bool
+    fetched_pages: int = 0
+    last_message_id: str | None = None
 
 
 class AIDifyConversationItem(BaseModel):
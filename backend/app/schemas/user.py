@@ -27,6 +27,11 @@ class LoginResponse(BaseModel):
     user: UserPublic
 
 
+class UpdateAccountResponse(UserPublic):
+    # claims 模式下旧令牌随版本号递增失效，返回携带新用户名 / 邮箱的令牌；minimal 模式为空
+    access_token: str | None = None
+
+
 class UpdateAccountRequest(BaseModel):
     username: str
     email: EmailStr
@@ -40,3 +45,8 @@ class UpdatePasswordRequest(BaseModel):
 
 class OkResponse(BaseModel):
     ok: bool
+
+
+class UpdatePasswordResponse(OkResponse):
+    # claims 模式下改密会使旧令牌失效，返回新令牌以保持当前会话登录；minimal 模式为空
+    access_token: str | None = None
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# AI 工作流会话日志（JSONL，只追加）：
+#   第 1 行  {"type": "header", "version": 1, "workflow_id", "workflow_name", "user", "session_id", "created_at"}
+#   其后每行 {"type": "message", "role", "content", "ts"}（从 Dify 同步的消息另带 dify_message_id）
+#   Dify 同步游标 {"type": "cursor", "conversation_id", "last_message_id"}，与同批消息一起写入，以最后一条为准
+# 追加只在文件末尾写入新行（与会话长度无关），读取逐行流式解析。
+# 旧格式 {workflow_id}_{session_id}.json（整体 JSON，messages 数组）在首次追加时自动转换，
+# 也可用 migrate_ai_workflow_sessions.py 批量转换。
+
+SESSION_LOG_ROOT = Path(__file__).resolve().parents[2] / "logs" / "ai_workflow_sessions"
+FORMAT_VERSION = 1
+SESSION_SUFFIX = ".jsonl"
+LEGACY_SUFFIX = ".json"
+
+_HEADER_FIELDS = ("workflow_id", "workflow_name", "user", "session_id", "created_at")
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def build_header(**fields: Any) -> dict:
+    return {"type": "header", "version": FORMAT_VERSION, **{key: fields.get(key) for key in _HEADER_FIELDS}}
+
+
+def build_message(role: str, content: str, ts: str, dify_message_id: str | None = None) -> dict:
+    message = {"type": "message", "role": role, "content": content, "ts": ts}
+    if dify_message_id:
+        message["dify_message_id"] = dify_message_id
+    return message
+
+
+def build_cursor(conversation_id: str, last_message_id: str) -> dict:
+    return {"type": "cursor", "conversation_id": conversation_id, "last_message_id": last_message_id}
+
+
+def legacy_path(path: Path) -> Path:
+    return path.with_suffix(LEGACY_SUFFIX)
+
+
+def append_messages(path: Path, header: dict, messages: Iterable[dict], cursor: dict | None = None) -> int:
+    # 文件为空时先写 header；多条消息（及同步游标）合并为一次 write，持锁期间完成
+    lines = [_dumps(message) for message in messages]
+    count = len(lines)
+    if cursor:
+        lines.append(_dumps(cursor))
+    if not lines:
+        return 0
+
+    legacy = legacy_path(path)
+    if legacy.exists():
+        migrate_file(legacy)
+
+    with path.open("ab+") as file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            size = file.seek(0, os.SEEK_END)
+            prefix = ""
+            if size == 0:
+                prefix = _dumps(header)
+            else:
+                file.seek(size - 1)
+                if file.read(1) != b"\n":
+                    # 上次写入中断留下半行：先补换行，残缺行由读取方跳过，不与新记录粘连
+                    prefix = "\n"
+            file.write((prefix + "".join(lines)).encode("utf-8"))
+            file.flush()
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    return count
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    try:
+        file = path.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for line_no, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("【会话日志】跳过损坏的行 file=%s line=%s", path, line_no)
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def read_header(path: Path) -> dict | None:
+    # 只读取第一条记录，不解析消息
+    for record in iter_records(path):
+        return record if record.get("type") == "header" else None
+    return None
+
+
+def iter_messages(path: Path) -> Iterator[dict]:
+    for record in iter_records(path):
+        if record.get("type") == "message":
+            yield record
+
+
+def convert_legacy(data: dict) -> tuple[dict, list[dict]]:
+    header = build_header(**data)
+    created_at = data.get("created_at") or ""
+    messages = [
+        build_message(item.get("role") or "", item.get("content") or "", item.get("ts") or created_at)
+        for item in data.get("messages") or []
+        if isinstance(item, dict)
+    ]
+    return header, messages
+
+
+def migrate_file(legacy: Path, *, keep_legacy: bool = False) -> Path | None:
+    # 旧 JSON 转为 JSONL：先写临时文件再替换，完成后删除（或保留为 .json.bak）旧文件。
+    # 持有旧文件的排他锁，并发转换时后来者发现旧文件已删除即跳过。
+    target = legacy.with_suffix(SESSION_SUFFIX)
+    try:
+        file = legacy.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    with file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            if os.fstat(file.fileno()).st_nlink == 0:
+                return None
+            if target.exists() and target.stat().st_size > 0:
+                logger.warning("【会话日志】目标已存在，跳过转换 file=%s", legacy)
+                return None
+            raw = file.read().strip()
+            data = json.loads(raw) if raw else {}
+            header, messages = convert_legacy(data)
+
+            tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+            with tmp.open("w", encoding="utf-8") as out:
+                out.write(_dumps(header))
+                out.writelines(_dumps(message) for message in messages)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, target)
+
+            if keep_legacy:
+                legacy.rename(legacy.with_name(legacy.name + ".bak"))
+            else:
+                legacy.unlink()
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    logger.info("【会话日志】已转换为 JSONL file=%s messages=%s", target, len(messages))
+    return target
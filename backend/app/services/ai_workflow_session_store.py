@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import bindparam, create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import AI_SESSION_SQLITE_PATH, AI_SESSION_STORE
+from app.core.db import get_engine
+from app.services import ai_workflow_session_log as session_log
+
+logger = logging.getLogger(__name__)
+
+# AI 工作流会话存储：append / sync-from-dify 写入，会话列表与消息分页读取。
+#   filesystem -> logs/ai_workflow_sessions/{user}/{workflow_id}_{session_id}.jsonl（默认，单机）
+#   sqlite     -> 内嵌 SQLite（WAL），单机多 worker 共享，无需 fcntl
+#   postgres   -> DATABASE_URL，多容器部署共享（需执行 docs/database/ai-workflow-session-store-migration.sql）
+# 数据库实现中三种操作都走索引：会话按 (user, workflow, session) 唯一键定位，
+# 列表按 (user, updated_at) 索引，消息按 (session, seq) 主键分页，同步去重按 (session, dify_message_id) 索引。
+# 从 Dify 同步时另记录每个 (会话, conversation_id) 的游标（最后导入的 Dify 消息 ID），与消息同一次写入。
+
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS ai_workflow_session (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_identifier TEXT NOT NULL,
+        workflow_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        workflow_name TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        message_count INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (user_identifier, workflow_id, session_id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_ai_workflow_session_user_updated_at
+        ON ai_workflow_session (user_identifier, updated_at DESC)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ai_workflow_session_message (
+        session_pk INTEGER NOT NULL REFERENCES ai_workflow_session(id) ON DELETE CASCADE,
+        seq INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        ts TEXT,
+        dify_message_id TEXT,
+        PRIMARY KEY (session_pk, seq)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_ai_workflow_session_message_dify_id
+        ON ai_workflow_session_message (session_pk, dify_message_id)
+        WHERE dify_message_id IS NOT NULL
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ai_workflow_session_sync_cursor (
+        session_pk INTEGER NOT NULL REFERENCES ai_workflow_session(id) ON DELETE CASCADE,
+        conversation_id TEXT NOT NULL,
+        last_message_id TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (session_pk, conversation_id)
+    )
+    """,
+]
+
+_SESSION_MATCH = """
+    s.user_identifier = :user
+    AND s.workflow_id = :workflow_id
+    AND s.session_id = :session_id
+"""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class SessionStore(ABC):
+    backend = ""
+
+    @abstractmethod
+    def append(self, header: dict, messages: list[dict], cursor: tuple[str, str] | None = None) -> int:
+        # cursor = (conversation_id, last_message_id)，与消息原子写入
+        ...
+
+    @abstractmethod
+    def get_sync_cursor(
+        self, user: str, workflow_id: str, session_id: str, conversation_id: str
+    ) -> str | None:
+        ...
+
+    @abstractmethod
+    def find_dify_message_ids(
+        self, user: str, workflow_id: str, session_id: str, message_ids: list[str]
+    ) -> set[str]:
+        # 返回 message_ids 中已导入该会话的 Dify 消息 ID
+        ...
+
+    @abstractmethod
+    def list_sessions(self, user: str, limit: int, offset: int) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def read_messages(
+        self, user: str, workflow_id: str, session_id: str, offset: int, limit: int
+    ) -> list[dict]:
+        ...
+
+
+class FileSessionStore(SessionStore):
+    backend = "filesystem"
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def session_path(self, user: str, workflow_id: str, session_id: str) -> Path:
+        return self.root / user / f"{workflow_id}_{session_id}{session_log.SESSION_SUFFIX}"
+
+    def append(self, header: dict, messages: list[dict], cursor: tuple[str, str] | None = None) -> int:
+        path = self.session_path(header["user"], header["workflow_id"], header["session_id"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cursor_record = session_log.build_cursor(*cursor) if cursor else None
+        return session_log.append_messages(path, header, messages, cursor_record)
+
+    def get_sync_cursor(
+        self, user: str, workflow_id: str, session_id: str, conversation_id: str
+    ) -> str | None:
+        last_message_id = None
+        for record in session_log.iter_records(self.session_path(user, workflow_id, session_id)):
+            if record.get("type") == "cursor" and record.get("conversation_id") == conversation_id:
+                last_message_id = record.get("last_message_id")
+        return last_message_id
+
+    def find_dify_message_ids(
+        self, user: str, workflow_id: str, session_id: str, message_ids: list[str]
+    ) -> set[str]:
+        # 文件没有索引，只能流式扫描一遍
+        wanted = set(message_ids)
+        if not wanted:
+            return set()
+        return {
+            item["dify_message_id"]
+            for item in session_log.iter_messages(self.session_path(user, workflow_id, session_id))
+            if item.get("dify_message_id") in wanted
+        }
+
+    def list_sessions(self, user: str, limit: int, offset: int) -> list[dict]:
+        # 目录即按用户的索引；消息数需要逐行统计，只对当前页的文件执行
+        files = sorted(
+            (self.root / user).glob(f"*{session_log.SESSION_SUFFIX}"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        sessions: list[dict] = []
+        for path in files[offset:offset + limit]:
+            header = session_log.read_header(path) or {}
+            # header 缺失（首次写入中断）时从文件名 {workflow_id}_{session_id} 还原
+            workflow_id, _, session_id = path.stem.partition("_")
+            updated_at = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+            sessions.append(
+                {
+                    "workflow_id": header.get("workflow_id") or workflow_id,
+                    "workflow_name": header.get("workflow_name"),
+                    "session_id": header.get("session_id") or session_id,
+                    "created_at": header.get("created_at"),
+                    "updated_at": updated_at.isoformat(),
+                    "message_count": sum(1 for _ in session_log.iter_messages(path)),
+                }
+            )
+        return sessions
+
+    def read_messages(
+        self, user: str, workflow_id: str, session_id: str, offset: int, limit: int
+    ) -> list[dict]:
+        path = self.session_path(user, workflow_id, session_id)
+        messages = islice(enumerate(session_log.iter_messages(path)), offset, offset + limit)
+        return [
+            {"seq": seq, "role": item.get("role"), "content": item.get("content"), "ts": item.get("ts")}
+            for seq, item in messages
+        ]
+
+
+class SqlSessionStore(SessionStore):
+    def __init__(self, engine: Engine, backend: str) -> None:
+        self.engine = engine
+        self.backend = backend
+
+    def append(self, header: dict, messages: list[dict], cursor: tuple[str, str] | None = None) -> int:
+        if not messages and not cursor:
+            return 0
+        now_iso = _now_iso()
+        with self.engine.begin() as conn:
+            # upsert 同时锁定会话行并预留 seq 区间，并发追加不会分到相同序号
+            row = conn.execute(
+                text(
+                    """
+                    INSERT INTO ai_workflow_session (
+                        user_identifier, workflow_id, session_id, workflow_name,
+                        created_at, updated_at, message_count
+                    )
+                    VALUES (:user, :workflow_id, :session_id, :workflow_name, :created_at, :now, :count)
+                    ON CONFLICT (user_identifier, workflow_id, session_id) DO UPDATE SET
+                        message_count = ai_workflow_session.message_count + excluded.message_count,
+                        updated_at = excluded.updated_at
+                    RETURNING id, message_count
+                    """
+                ),
+                {
+                    "user": header["user"],
+                    "workflow_id": header["workflow_id"],
+                    "session_id": header["session_id"],
+                    "workflow_name": header.get("workflow_name"),
+                    "created_at": header.get("created_at") or now_iso,
+                    "now": now_iso,
+                    "count": len(messages),
+                },
+            ).one()
+            session_pk, first_seq = row[0], row[1] - len(messages)
+            if messages:
+                conn.execute(
+                    text(
+                        """
+                        INSERT INTO ai_workflow_session_message (
+                            session_pk, seq, role, content, ts, dify_message_id
+                        )
+                        VALUES (:session_pk, :seq, :role, :content, :ts, :dify_message_id)
+                        """
+                    ),
+                    [
+                        {
+                            "session_pk": session_pk,
+                            "seq": first_seq + index,
+                            "role": item["role"],
+                            "content": item["content"],
+                            "ts": item.get("ts"),
+                            "dify_message_id": item.get("dify_message_id"),
+                        }
+                        for index, item in enumerate(messages)
+                    ],
+                )
+            if cursor:
+                conn.execute(
+                    text(
+                        """
+                        INSERT INTO ai_workflow_session_sync_cursor (
+                            session_pk, conversation_id, last_message_id, updated_at
+                        )
+                        VALUES (:session_pk, :conversation_id, :last_message_id, :now)
+                        ON CONFLICT (session_pk, conversation_id) DO UPDATE SET
+                            last_message_id = excluded.last_message_id,
+                            updated_at = excluded.updated_at
+                        """
+                    ),
+                    {
+                        "session_pk": session_pk,
+                        "conversation_id": cursor[0],
+                        "last_message_id": cursor[1],
+                        "now": now_iso,
+                    },
+                )
+        return len(messages)
+
+    def get_sync_cursor(
+        self, user: str, workflow_id: str, session_id: str, conversation_id: str
+    ) -> str | None:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text(
+                    f"""
+                    SELECT c.last_message_id
+                    FROM ai_workflow_session s
+                    JOIN ai_workflow_session_sync_cursor c ON c.session_pk = s.id
+                    WHERE {_SESSION_MATCH}
+                      AND c.conversation_id = :conversation_id
+                    """
+                ),
+                {
+                    "user": user,
+                    "workflow_id": workflow_id,
+                    "session_id": session_id,
+                    "conversation_id": conversation_id,
+                },
+            ).scalar()
+
+    def find_dify_message_ids(
+        self, user: str, workflow_id: str, session_id: str, message_ids: list[str]
+    ) -> set[str]:
+        if not message_ids:
+            return set()
+        # (session_pk, dify_message_id) 索引按 ID 逐个定位，与会话已有消息数无关
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    f"""
+                    SELECT m.dify_message_id
+                    FROM ai_workflow_session s
+                    JOIN ai_workflow_session_message m ON m.session_pk = s.id
+                    WHERE {_SESSION_MATCH}
+                      AND m.dify_message_id IN :message_ids
+                    """
+                ).bindparams(bindparam("message_ids", expanding=True)),
+                {
+                    "user": user,
+                    "workflow_id": workflow_id,
+                    "session_id": session_id,
+                    "message_ids": list(dict.fromkeys(message_ids)),
+                },
+            ).scalars().all()
+        return set(rows)
+
+    def list_sessions(self, user: str, limit: int, offset: int) -> list[dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    """
+                    SELECT workflow_id, workflow_name, session_id, created_at, updated_at, message_count
+                    FROM ai_workflow_session
+                    WHERE user_identifier = :user
+                    ORDER BY updated_at DESC
+                    LIMIT :limit OFFSET :offset
+                    """
+                ),
+                {"user": user, "limit": limit, "offset": offset},
+            ).mappings().all()
+        return [
+            {
+                **row,
+                "workflow_id": str(row["workflow_id"]),
+                "created_at": _iso(row["created_at"]),
+                "updated_at": _iso(row["updated_at"]),
+            }
+            for row in rows
+        ]
+
+    def read_messages(
+        self, user: str, workflow_id: str, session_id: str, offset: int, limit: int
+    ) -> list[dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    f"""
+                    SELECT m.seq, m.role, m.content, m.ts
+                    FROM ai_workflow_session s
+                    JOIN ai_workflow_session_message m ON m.session_pk = s.id
+                    WHERE {_SESSION_MATCH}
+                      AND m.seq >= :offset
+                    ORDER BY m.seq
+                    LIMIT :limit
+                    """
+                ),
+                {
+                    "user": user,
+                    "workflow_id": workflow_id,
+                    "session_id": session_id,
+                    "offset": offset,
+                    "limit": limit,
+                },
+            ).mappings().all()
+        return [dict(row) for row in rows]
+
+
+def create_sqlite_store(path: Path) -> SqlSessionStore:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record) -> None:
+        # WAL：读不阻塞写；busy_timeout 让多 worker 并发写入时排队而不是直接报错
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    with engine.begin() as conn:
+        for statement in SQLITE_SCHEMA:
+            conn.execute(text(statement))
+    return SqlSessionStore(engine, "sqlite")
+
+
+def create_store(backend: str) -> SessionStore:
+    if backend == "filesystem":
+        return FileSessionStore(session_log.SESSION_LOG_ROOT)
+    if backend == "sqlite":
+        default_path = session_log.SESSION_LOG_ROOT.with_suffix(".sqlite3")
+        return create_sqlite_store(Path(AI_SESSION_SQLITE_PATH) if AI_SESSION_SQLITE_PATH else default_path)
+    if backend == "postgres":
+        return SqlSessionStore(get_engine(), "postgres")
+    raise ValueError(f"Unknown AI_SESSION_STORE: {backend}")
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_store(AI_SESSION_STORE)
+            logger.info("【会话存储】使用 %s", _store.backend)
+        return _store
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import httpx
+
+from .calendar import (
+    CALENDAR_URL,
+    FALLBACK_CALENDAR_URL,
+    parse_calendar_entries,
+    save_calendar_entries,
+)
+from .episode import mark_episodes_crawled, parse_episodes, save_episodes
+from .http_cache import FetchedPage, build_page, conditional_headers, remember
+from .http_client import DEFAULT_HEADERS, REQUEST_TIMEOUT_SECONDS, resolve_ssl_verify
+from .outcome import SubjectOutcome, WriteStatus
+from .planner import CrawlPlan, plan_crawl
+from .settings import ASYNC_BURST, ASYNC_CONCURRENCY, ASYNC_RATE_PER_SECOND, BASE_URL
+from .subject import mark_subject_crawled, parse_subject, save_subject
+
+logger = logging.getLogger(__name__)
+
+# 与同步客户端的 Retry 策略保持一致
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+
+@dataclass
+class AsyncCrawlResult:
+    subject_ids: list[int] = field(default_factory=list)
+    outcomes: list[SubjectOutcome] = field(default_factory=list)
+    calendar_error: Exception | None = None
+    request_count: int = 0
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: int) -> None:
+        self._rate = rate
+        self._capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class _Fetcher:
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+        self._semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        self._bucket = _TokenBucket(ASYNC_RATE_PER_SECOND, ASYNC_BURST)
+        self.request_count = 0
+
+    async def _send(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        for attempt in range(MAX_RETRIES + 1):
+            await self._bucket.acquire()
+            response: httpx.Response | None = None
+            try:
+                async with self._semaphore:
+                    self.request_count += 1
+                    response = await self._client.get(url, headers=headers)
+            except httpx.TransportError:
+                if attempt >= MAX_RETRIES:
+                    raise
+            if response is not None:
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= MAX_RETRIES:
+                    response.raise_for_status()
+                    return response
+            await asyncio.sleep(BACKOFF_FACTOR * (2**attempt))
+        raise RuntimeError(f"unreachable: {url}")
+
+    async def get_page(self, url: str, keep_body: bool = False) -> FetchedPage:
+        # 条件请求缓存按 URL 读写磁盘文件，放到线程中执行，不阻塞事件循环
+        headers = await asyncio.to_thread(conditional_headers, url)
+        response = await self._send(url, headers)
+        page = await asyncio.to_thread(
+            build_page, url, response.status_code, response.headers, response.content, keep_body
+        )
+        if keep_body and page.not_modified and page.html is None:
+            response = await self._send(url, {})
+            page = await asyncio.to_thread(
+                build_page, url, response.status_code, response.headers, response.content, keep_body
+            )
+        return page
+
+
+# 写入阶段：解析结果排队后由单个 writer 顺序落库，抓取协程不等待数据库
+class _Writer:
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def submit(
+        self,
+        write: Callable[[], WriteStatus],
+        on_done: Callable[[WriteStatus | None, Exception | None], None],
+    ) -> None:
+        self._queue.put_nowait((write, on_done))
+
+    async def close(self) -> None:
+        await self._queue.put(None)
+
+    async def run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            write, on_done = item
+            try:
+                # 数据库驱动是同步的，写入放到单个工作线程，避免阻塞事件循环
+                status = await asyncio.to_thread(write)
+            except Exception as exc:
+                on_done(None, exc)
+            else:
+                on_done(status, None)
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        verify=resolve_ssl_verify(),
+        trust_env=False,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=ASYNC_CONCURRENCY,
+            max_keepalive_connections=ASYNC_CONCURRENCY,
+        ),
+    )
+
+
+async def _crawl_calendar(fetcher: _Fetcher) -> list[int]:
+    logger.info("【日历】开始爬取（async）：%s", CALENDAR_URL)
+    page = await fetcher.get_page(CALENDAR_URL, keep_body=True)
+    # HTML 解析是 CPU 密集操作，与写库一样放到线程中，其余请求在此期间继续收发
+    entries = await asyncio.to_thread(parse_calendar_entries, page.html or "")
+    if not entries:
+        logger.warning("【日历】未解析到 coverList，尝试备用域名：%s", FALLBACK_CALENDAR_URL)
+        page = await fetcher.get_page(FALLBACK_CALENDAR_URL, keep_body=True)
+        entries = await asyncio.to_thread(parse_calendar_entries, page.html or "")
+    subject_ids = await asyncio.to_thread(save_calendar_entries, entries)
+    await asyncio.to_thread(remember, page, True)
+    return subject_ids
+
+
+async def _crawl_subject(
+    plan: CrawlPlan,
+    fetcher: _Fetcher,
+    writer: _Writer,
+    outcome: SubjectOutcome,
+) -> None:
+    sid = plan.subject_id
+    def _record(
+        apply_status: Callable[[WriteStatus], None],
+    ) -> Callable[[WriteStatus | None, Exception | None], None]:
+        def _on_done(status: WriteStatus | None, exc: Exception | None) -> None:
+            if status is not None:
+                apply_status(status)
+            elif outcome.error is None:
+                outcome.error = exc
+                logger.error("【调度】写入 subject_id=%s 失败：%s", sid, exc, exc_info=exc)
+
+        return _on_done
+
+    try:
+        if plan.crawl_detail:
+            url = f"{BASE_URL}/subject/{sid}"
+            logger.info("【详情】开始爬取：%s", url)
+            detail_page = await fetcher.get_page(url)
+            if detail_page.not_modified:
+                # 304 也要记录抓取时间，与 200 一样经 writer 落库
+                writer.submit(
+                    lambda: mark_subject_crawled(sid), _record(outcome.apply_detail_status)
+                )
+            else:
+                payload = await asyncio.to_thread(parse_subject, detail_page.html or "", sid)
+
+                def _write_detail() -> WriteStatus:
+                    status = save_subject(payload)
+                    remember(detail_page)
+                    return status
+
+                writer.submit(_write_detail, _record(outcome.apply_detail_status))
+        else:
+            outcome.detail_skipped = True
+
+        if plan.crawl_episodes:
+            url = f"{BASE_URL}/subject/{sid}/ep"
+            logger.info("【章节】开始爬取：%s", url)
+            episode_page = await fetcher.get_page(url)
+            if episode_page.not_modified:
+                writer.submit(
+                    lambda: mark_episodes_crawled(sid), _record(outcome.apply_episode_status)
+                )
+            else:
+                episodes = await asyncio.to_thread(parse_episodes, episode_page.html or "", sid)
+
+                def _write_episodes() -> WriteStatus:
+                    status = save_episodes(sid, episodes)
+                    remember(episode_page)
+                    return status
+
+                writer.submit(_write_episodes, _record(outcome.apply_episode_status))
+        else:
+            outcome.episode_skip_reason = plan.episode_reason
+            logger.info("【章节】跳过：subject_id=%s reason=%s", sid, plan.episode_reason)
+    except Exception as exc:
+        outcome.error = exc
+        logger.exception("【调度】处理 subject_id=%s 失败：%s", sid, exc)
+
+
+async def _run() -> AsyncCrawlResult:
+    result = AsyncCrawlResult()
+    async with _build_client() as client:
+        fetcher = _Fetcher(client)
+        try:
+            result.subject_ids = await _crawl_calendar(fetcher)
+        except Exception as exc:
+            logger.exception("【调度】日历爬取失败：%s", exc)
+            result.calendar_error = exc
+            result.request_count = fetcher.request_count
+            return result
+
+        result.outcomes = [SubjectOutcome(subject_id=sid) for sid in result.subject_ids]
+        try:
+            plans = await asyncio.to_thread(plan_crawl, result.subject_ids)
+        except Exception as exc:
+            logger.exception("【调度】生成抓取计划失败：%s", exc)
+            for outcome in result.outcomes:
+                outcome.error = exc
+            result.request_count = fetcher.request_count
+            return result
+
+        writer = _Writer()
+        writer_task = asyncio.create_task(writer.run())
+        await asyncio.gather(
+            *[
+                _crawl_subject(plans[outcome.subject_id], fetcher, writer, outcome)
+                for outcome in result.outcomes
+            ]
+        )
+        await writer.close()
+        await writer_task
+        result.request_count = fetcher.request_count
+    return result
+
+
+def run_async_crawl() -> AsyncCrawlResult:
+    # 调度任务运行在 APScheduler / 后台线程中，没有现成事件循环，这里独立运行一次
+    result = asyncio.run(_run())
+    logger.info(
+        "【调度】async 引擎完成：番剧数=%s，HTTP 请求数=%s",
+        len(result.subject_ids),
+        result.request_count,
+    )
+    return result
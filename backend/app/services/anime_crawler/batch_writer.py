@@ -0,0 +1,69 @@
+from typing import Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+DEFAULT_PAGE_SIZE = 500
+
+
+# 批量 upsert：收集多行后拼成一条 INSERT ... VALUES (...), (...) ON CONFLICT ... [RETURNING]，
+# 远程 Supabase 下把逐行往返压缩为每批一次。
+class BatchUpsert:
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        conflict_columns: Sequence[str],
+        update_sql: str,
+        returning: str | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
+        self.table = table
+        self.columns = list(columns)
+        self.conflict_columns = list(conflict_columns)
+        self.update_sql = update_sql
+        self.returning = returning
+        self.page_size = page_size
+        # 同一批次内冲突键重复会触发 "cannot affect row a second time"，按键去重且后写覆盖先写，
+        # 与逐行执行时的最终结果一致
+        self._rows: dict[tuple, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, row: dict) -> None:
+        key = tuple(row[col] for col in self.conflict_columns)
+        self._rows.pop(key, None)
+        self._rows[key] = {col: row.get(col) for col in self.columns}
+
+    def _build_sql(self, row_count: int) -> str:
+        values_sql = ",\n".join(
+            "    (" + ", ".join(f":{col}_{idx}" for col in self.columns) + ")"
+            for idx in range(row_count)
+        )
+        sql = (
+            f"INSERT INTO {self.table} (\n"
+            f"    {', '.join(self.columns)}\n"
+            f") VALUES\n"
+            f"{values_sql}\n"
+            f"ON CONFLICT ({', '.join(self.conflict_columns)})\n"
+            f"DO UPDATE SET\n"
+            f"    {self.update_sql}"
+        )
+        if self.returning:
+            sql += f"\nRETURNING {self.returning}"
+        return sql
+
+    def flush(self, conn: Connection) -> list[dict]:
+        rows = list(self._rows.values())
+        self._rows.clear()
+        returned: list[dict] = []
+        for start in range(0, len(rows), self.page_size):
+            page = rows[start : start + self.page_size]
+            params = {
+                f"{col}_{idx}": row[col] for idx, row in enumerate(page) for col in self.columns
+            }
+            result = conn.execute(text(self._build_sql(len(page))), params)
+            if self.returning:
+                returned.extend(dict(item) for item in result.mappings().all())
+        return returned
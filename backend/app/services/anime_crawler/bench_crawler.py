@@ -0,0 +1,306 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "../../.."))
+if CURRENT_DIR in sys.path:
+    sys.path.remove(CURRENT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+import argparse  # noqa: E402
+import logging  # noqa: E402
+import re  # noqa: E402
+import shutil  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+from collections import Counter  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from app.services.anime_crawler.fixture_server import DEFAULT_CORPUS_DIR, FixtureServer  # noqa: E402
+
+# 端到端爬虫基准：启动本地 fixture 服务器，把爬虫指向它后完整执行 run_crawler_once，
+# 统计耗时、页面吞吐与每个番剧的数据库语句数。
+#
+#   python app/services/anime_crawler/bench_crawler.py run --latency-ms 80 --workers 4
+#   python app/services/anime_crawler/bench_crawler.py run --database-url postgresql+psycopg2://... --reset
+#   python app/services/anime_crawler/bench_crawler.py record --out /tmp/bgm_corpus --limit 20
+#
+# 默认使用临时 SQLite 文件；PostgreSQL 需预先按 docs/database 建好表，且应使用独立的测试库。
+
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE anime (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        bgm_subject_id INTEGER NOT NULL UNIQUE,
+        bgm_url TEXT,
+        title TEXT,
+        title_zh TEXT,
+        summary TEXT,
+        start_date TEXT,
+        weekday INTEGER,
+        total_episodes INTEGER,
+        rating REAL,
+        rating_count INTEGER,
+        cover_image_url TEXT,
+        status TEXT,
+        season TEXT,
+        last_crawled_at TEXT,
+        crawl_version INTEGER,
+        detail_content_hash TEXT,
+        episode_content_hash TEXT,
+        episodes_crawled_at TEXT,
+        latest_episode_no INTEGER,
+        episode_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE anime_episode (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        anime_id TEXT NOT NULL REFERENCES anime(id) ON DELETE CASCADE,
+        episode_no INTEGER NOT NULL,
+        title TEXT,
+        air_date TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (anime_id, episode_no)
+    )
+    """,
+    """
+    CREATE TABLE anime_airing_calendar (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        anime_id TEXT NOT NULL REFERENCES anime(id) ON DELETE CASCADE,
+        air_date TEXT NOT NULL,
+        weekday INTEGER,
+        episode_no INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (anime_id, air_date)
+    )
+    """,
+    """
+    CREATE TABLE crawler_run_logs (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        log_path TEXT,
+        run_type TEXT,
+        crawler_name TEXT,
+        status TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        duration_ms INTEGER,
+        summary TEXT,
+        error_message TEXT,
+        command TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+SQLITE_TABLES = ["anime_airing_calendar", "anime_episode", "anime", "crawler_run_logs"]
+
+# 爬虫 SQL 面向 PostgreSQL，SQLite 下仅改写少量类型转换语法
+_PG_CAST = re.compile(r"::\w+")
+_PG_UUID_CAST = re.compile(r"CAST\((\?) AS uuid\)")
+
+
+def _install_sqlite_compat(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record) -> None:
+        dbapi_conn.create_function("NOW", 0, lambda: datetime.now(timezone.utc).isoformat())
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _rewrite(_conn, _cursor, statement, parameters, _context, _executemany):
+        statement = _PG_UUID_CAST.sub(r"\1", _PG_CAST.sub("", statement))
+        return statement, parameters
+
+
+def _install_statement_counter(engine) -> Counter:
+    from sqlalchemy import event
+
+    counter: Counter = Counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _count(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+        counter[verb] += 1
+
+    return counter
+
+
+def _reset_database(engine, is_sqlite: bool) -> None:
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        if is_sqlite:
+            for table in SQLITE_TABLES:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            for ddl in SQLITE_SCHEMA:
+                conn.execute(text(ddl))
+        else:
+            conn.execute(text("TRUNCATE anime_airing_calendar, anime_episode, anime CASCADE"))
+
+
+def _latest_summary(engine) -> tuple[str | None, str | None]:
+    from sqlalchemy import text
+
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text(
+                    "SELECT status, summary FROM crawler_run_logs "
+                    "ORDER BY started_at DESC LIMIT 1"
+                )
+            ).first()
+    except Exception:
+        return None, None
+    return (row[0], row[1]) if row else (None, None)
+
+
+def _run(args: argparse.Namespace) -> None:
+    work_dir = Path(tempfile.mkdtemp(prefix="anime_crawler_bench_"))
+    cache_dir = work_dir / "http_cache"
+    database_url = args.database_url or f"sqlite:///{work_dir / 'bench.db'}"
+    is_sqlite = database_url.startswith("sqlite")
+
+    server = FixtureServer(args.corpus, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    # 爬虫模块在导入时读取配置，必须先设置环境变量再导入
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["BANGUMI_BASE_URL"] = server.base_url
+    os.environ["BANGUMI_FALLBACK_BASE_URL"] = server.base_url
+    os.environ["BANGUMI_HTTP_CACHE_DIR"] = str(cache_dir)
+
+    from app.services.anime_crawler.db import get_engine
+    from app.services.anime_crawler.scheduler import RUN_LOG_DIR, run_crawler_once
+
+    engine = get_engine()
+    if is_sqlite:
+        _install_sqlite_compat(engine)
+    statements = _install_statement_counter(engine)
+    existing_logs = set(RUN_LOG_DIR.glob("*.txt")) if RUN_LOG_DIR.exists() else set()
+
+    print(f"fixture server={server.base_url} corpus={args.corpus} latency={args.latency_ms}ms")
+    print(f"database={'sqlite (临时文件)' if is_sqlite else database_url.split('@')[-1]}")
+    print(f"engine={args.engine or '默认'} workers={args.workers or '默认'} runs={args.runs} warm={args.warm}")
+
+    server.start()
+    try:
+        for index in range(args.runs):
+            fresh = index == 0 or not args.warm
+            if fresh:
+                if is_sqlite or args.reset:
+                    _reset_database(engine, is_sqlite)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            server.stats.reset()
+            statements.clear()
+
+            started = time.perf_counter()
+            run_crawler_once(
+                run_type="manual",
+                command="benchmark: bench_crawler",
+                workers=args.workers,
+                engine=args.engine,
+            )
+            wall_seconds = time.perf_counter() - started
+
+            http = server.stats.snapshot()
+            db_counts = dict(statements)
+            db_total = sum(db_counts.values())
+            status, summary = _latest_summary(engine)
+            match = re.search(r"番剧总数=(\d+)", summary or "")
+            subject_count = int(match.group(1)) if match else 0
+
+            label = "cold" if fresh else "warm"
+            print(f"\n=== run {index + 1} ({label}) 状态={status or 'N/A'} ===")
+            print(f"耗时: {wall_seconds:.2f}s")
+            print(
+                f"页面: {http['requests']} 次请求（304={http['not_modified']}，404={http['not_found']}），"
+                f"{http['bytes_sent'] / 1024:.0f}KB，{http['requests'] / wall_seconds:.1f} 页/秒"
+            )
+            per_subject = f"{db_total / subject_count:.2f}" if subject_count else "N/A"
+            breakdown = "，".join(f"{verb}={count}" for verb, count in sorted(db_counts.items()))
+            print(f"DB 语句: {db_total}（{breakdown or '无'}），番剧={subject_count}，每番剧={per_subject}")
+            if summary and args.verbose:
+                print(f"汇总: {summary}")
+    finally:
+        server.stop()
+        if not args.keep_logs and RUN_LOG_DIR.exists():
+            for path in set(RUN_LOG_DIR.glob("*.txt")) - existing_logs:
+                path.unlink(missing_ok=True)
+        if args.keep_db and is_sqlite:
+            print(f"\nSQLite 数据保留在：{work_dir / 'bench.db'}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _record(args: argparse.Namespace) -> None:
+    # 录制只抓页面不写库，爬虫模块导入时仍要求 DATABASE_URL 存在
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    from app.services.anime_crawler.calendar import CALENDAR_URL, parse_calendar_entries
+    from app.services.anime_crawler.http_client import REQUEST_TIMEOUT_SECONDS, get_session
+    from app.services.anime_crawler.settings import BASE_URL
+
+    out_dir: Path = args.out
+    out_dir.mkdir(parents=True, exist_ok=True)
+    session = get_session()
+
+    def _save(url: str, filename: str) -> str:
+        resp = session.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        html = resp.content.decode("utf-8", errors="ignore")
+        (out_dir / filename).write_text(html, encoding="utf-8")
+        print(f"saved {filename} <- {url}")
+        time.sleep(args.interval)
+        return html
+
+    entries = parse_calendar_entries(_save(CALENDAR_URL, "calendar.html"))
+    subject_ids = list(dict.fromkeys(entry["bgm_subject_id"] for entry in entries))
+    for sid in subject_ids[: args.limit]:
+        try:
+            _save(f"{BASE_URL}/subject/{sid}", f"subject_{sid}.html")
+            _save(f"{BASE_URL}/subject/{sid}/ep", f"subject_{sid}_ep.html")
+        except Exception as exc:
+            print(f"error: subject_id={sid} {exc}")
+    print(f"\n=== 完成：日历番剧数={len(subject_ids)}，录制={min(len(subject_ids), args.limit)} ===")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="新番爬虫端到端基准")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="对本地 fixture 服务器执行 run_crawler_once")
+    run_parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR, help="语料目录")
+    run_parser.add_argument("--database-url", help="默认使用临时 SQLite 文件")
+    run_parser.add_argument("--reset", action="store_true", help="PostgreSQL：每次冷启动前清空番剧表")
+    run_parser.add_argument("--latency-ms", type=float, default=50.0, help="每个请求的模拟延迟")
+    run_parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟随机抖动范围")
+    run_parser.add_argument("--engine", choices=["sync", "async"], help="抓取引擎，默认读取环境变量")
+    run_parser.add_argument("--workers", type=int, help="sync 引擎并发数，默认读取环境变量")
+    run_parser.add_argument("--runs", type=int, default=1, help="运行次数")
+    run_parser.add_argument(
+        "--warm", action="store_true", help="保留数据库与条件请求缓存，测量增量运行"
+    )
+    run_parser.add_argument("--keep-db", action="store_true", help="保留 SQLite 文件")
+    run_parser.add_argument("--keep-logs", action="store_true", help="保留本次运行生成的日志文件")
+    run_parser.add_argument("--verbose", action="store_true", help="输出爬虫日志与运行汇总")
+
+    record_parser = subparsers.add_parser("record", help="从 bangumi.tv 录制语料")
+    record_parser.add_argument("--out", type=Path, required=True, help="输出目录")
+    record_parser.add_argument("--limit", type=int, default=20, help="最多录制的番剧数")
+    record_parser.add_argument("--interval", type=float, default=1.0, help="请求间隔（秒）")
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if getattr(args, "verbose", False) else logging.WARNING,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    if args.command == "record":
+        _record(args)
+    else:
+        _run(args)
+
+
+if __name__ == "__main__":
+    main()
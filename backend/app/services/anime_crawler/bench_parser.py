@@ -0,0 +1,84 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "../../.."))
+if CURRENT_DIR in sys.path:
+    sys.path.remove(CURRENT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+# 解析基准不访问数据库，但爬虫模块导入时要求 DATABASE_URL 存在
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.anime_crawler.calendar import parse_calendar_entries  # noqa: E402
+from app.services.anime_crawler.episode import parse_episodes  # noqa: E402
+from app.services.anime_crawler.html_parser import available_backends, set_backend  # noqa: E402
+from app.services.anime_crawler.subject import parse_subject  # noqa: E402
+
+FIXTURE_DIR = os.path.join(CURRENT_DIR, "fixtures")
+
+
+def _parser_for(filename: str):
+    if filename.startswith("calendar"):
+        return parse_calendar_entries
+    match = re.match(r"subject_(\d+)(_ep)?\.html$", filename)
+    if not match:
+        return None
+    subject_id = int(match.group(1))
+    if match.group(2):
+        return lambda html: parse_episodes(html, subject_id)
+
+    def _parse(html: str) -> dict:
+        payload = parse_subject(html, subject_id)
+        payload.pop("last_crawled_at", None)
+        return payload
+
+    return _parse
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Bangumi 页面解析后端基准")
+    arg_parser.add_argument("--rounds", type=int, default=20, help="每个页面每个后端的解析次数")
+    args = arg_parser.parse_args()
+
+    backends = available_backends()
+    print("可用后端:", ", ".join(backends))
+    fixtures = sorted(name for name in os.listdir(FIXTURE_DIR) if name.endswith(".html"))
+
+    header = f"{'page':<28}{'size':>9}" + "".join(f"{name:>16}" for name in backends)
+    print(header)
+    print("-" * len(header))
+    totals = {name: 0.0 for name in backends}
+    for filename in fixtures:
+        parse = _parser_for(filename)
+        if parse is None:
+            continue
+        with open(os.path.join(FIXTURE_DIR, filename), "r", encoding="utf-8") as file:
+            html = file.read()
+
+        baseline = None
+        cells = []
+        for name in backends:
+            set_backend(name)
+            result = parse(html)
+            if baseline is None:
+                baseline = result
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                parse(html)
+            per_page_ms = (time.perf_counter() - started) * 1000 / args.rounds
+            totals[name] += per_page_ms
+            mark = "" if result == baseline else " !"
+            cells.append(f"{per_page_ms:>12.2f}ms{mark:<2}")
+        print(f"{filename:<28}{len(html) // 1024:>7}KB" + "".join(cells))
+
+    print("-" * len(header))
+    print(f"{'total':<28}{'':>9}" + "".join(f"{totals[name]:>14.2f}ms" for name in backends))
+    print("注：结果与 html.parser 不一致的单元格标记为 !")
+
+
+if __name__ == "__main__":
+    main()
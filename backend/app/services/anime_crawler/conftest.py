@@ -0,0 +1,60 @@
+import shutil
+
+import pytest
+from sqlalchemy import text
+
+# 环境变量（临时 SQLite、fixture 服务器地址、缓存目录）已在 app/conftest.py 中先于导入设置
+from app.conftest import FIXTURE_SERVER, WORK_DIR
+from app.services import anime_guide_snapshot
+from app.services.anime_crawler import scheduler
+from app.services.anime_crawler.bench_crawler import _install_sqlite_compat, _reset_database
+from app.services.anime_crawler.db import get_engine
+from app.services.anime_crawler.settings import HTTP_CACHE_DIR
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    FIXTURE_SERVER.start()
+    yield FIXTURE_SERVER
+    FIXTURE_SERVER.stop()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = get_engine()
+    _install_sqlite_compat(engine)
+    return engine
+
+
+@pytest.fixture
+def crawler_db(engine, fixture_server, tmp_path, monkeypatch):
+    # 每个用例从空库、空条件请求缓存开始，运行日志写到临时目录
+    reset_crawl_state(engine)
+    monkeypatch.setattr(scheduler, "RUN_LOG_DIR", tmp_path / "logs")
+    fixture_server.stats.reset()
+    return engine
+
+
+def reset_crawl_state(engine) -> None:
+    # 条件请求缓存与库一起清空，否则空库会收到 304 而不写入任何详情
+    _reset_database(engine, is_sqlite=True)
+    shutil.rmtree(HTTP_CACHE_DIR, ignore_errors=True)
+    anime_guide_snapshot.clear()
+
+
+def run_crawl(engine_name: str = "sync", workers: int | None = None) -> tuple[str, str]:
+    scheduler.run_crawler_once(
+        run_type="manual", command="pytest", workers=workers, engine=engine_name
+    )
+    with get_engine().connect() as conn:
+        row = conn.execute(
+            text("SELECT status, summary FROM crawler_run_logs ORDER BY started_at DESC LIMIT 1")
+        ).first()
+    return row[0], row[1]
+
+
+def subject_ids(engine) -> list[int]:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT bgm_subject_id FROM anime ORDER BY bgm_subject_id"))
+        return [row[0] for row in rows]
@@ -0,0 +1,9 @@
+import hashlib
+import json
+from typing import Any
+
+
+# 对解析后的结构化数据做归一化哈希，页面上的动态片段（时间戳、广告位等）不会影响结果
+def compute_content_hash(value: Any) -> str:
+    normalized = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
@@ -2,21 +2,19 @@ import os
 from contextlib import contextmanager
 from typing import Iterator
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Connection, Engine
 
+from app.core.db import get_engine as get_shared_engine
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is missing in environment")
 
-_engine: Engine | None = None
-
 
 def get_engine() -> Engine:
-    global _engine
-    if _engine is None:
-        _engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-    return _engine
+    # 与 API 的 SessionLocal 共用进程内同一个引擎 / 连接池
+    return get_shared_engine(DATABASE_URL)
 
 
 @contextmanager
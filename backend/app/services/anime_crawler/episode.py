@@ -1,52 +1,55 @@
 import logging
-import os
 import re
+from dataclasses import dataclass
 from datetime import date
+from typing import Callable, Iterable
 
-import requests
-from bs4 import BeautifulSoup
+from bs4 import Tag
 from sqlalchemy import text
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
+from .batch_writer import BatchUpsert
+from .content_hash import compute_content_hash
 from .db import get_conn, fetch_one
+from .html_parser import first_descendant, get_backend, lexbor_tree, make_soup
+from .http_cache import remember
+from .http_client import fetch_page
+from .outcome import WriteStatus
+from .settings import BASE_URL
 
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://bangumi.tv"
-
-
-def _build_session() -> requests.Session:
-    session = requests.Session()
-    session.trust_env = False
-    verify_env = os.getenv("BANGUMI_SSL_VERIFY", "1").lower()
-    if verify_env in ("0", "false", "no"):
-        session.verify = False
-    ca_bundle = os.getenv("BANGUMI_CA_BUNDLE")
-    if ca_bundle:
-        session.verify = ca_bundle
-
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
-    )
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    return session
-
-
-def _get_html(url: str) -> str:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; galileocat-webtool/1.0; +https://bangumi.tv)",
-        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-    }
-    session = _build_session()
-    resp = session.get(url, headers=headers, timeout=20)
-    resp.raise_for_status()
-    return resp.content.decode("utf-8", errors="ignore")
+# 每次抓取章节页都记录时间（包括 304 与内容未变化），调度据此判断同日重复抓取
+TOUCH_EPISODES_SQL = "UPDATE anime SET episodes_crawled_at = NOW() WHERE bgm_subject_id = :sid"
+
+EPISODE_KEEP_SELECTORS = (
+    "title",
+    "#episode_list",
+    "#eplist",
+    "#subject_prg_list",
+    "#sectionEp",
+    ".line_list",
+    "[data-ep]",
+    "[data-episode-no]",
+)
+
+EPISODE_ITEM_SELECTORS = (
+    "#episode_list li",
+    "#eplist li",
+    "#subject_prg_list li",
+    "#sectionEp li",
+    ".line_list li",
+    "[data-ep], [data-episode-no]",
+)
+
+
+@dataclass
+class EpisodeItemFields:
+    classes: list[str]
+    data_ep: str | None
+    ep_text: str | None
+    link_text: str | None
+    title: str
+    text: str
 
 
 def _parse_air_date(text: str) -> str | None:
@@ -61,24 +64,85 @@ def _parse_air_date(text: str) -> str | None:
     return None
 
 
-def crawl_bangumi_episodes(subject_id: int) -> None:
-    url = f"{BASE_URL}/subject/{subject_id}/ep"
-    logger.info("【章节】开始爬取：%s", url)
+def _select_items(select: Callable[[str], list]) -> list:
+    for selector in EPISODE_ITEM_SELECTORS:
+        items = select(selector)
+        if items:
+            return items
+    return []
+
+
+def _soup_item_fields(item: Tag) -> EpisodeItemFields:
+    ep_tag = item.find(class_="ep") or item.find(class_="sort")
+    h6 = item.find("h6")
+    link = h6.find("a", href=True) if h6 else None
+    title_tag = (item.find("a", class_="l") or link) if h6 else item.find("a", href=True)
+    return EpisodeItemFields(
+        classes=item.get("class") or [],
+        data_ep=item.get("data-ep") or item.get("data-episode-no"),
+        ep_text=ep_tag.get_text(strip=True) if ep_tag else None,
+        link_text=link.get_text(strip=True) if link else None,
+        title=title_tag.get_text(strip=True) if title_tag else "",
+        text=item.get_text(" ", strip=True),
+    )
 
-    html = _get_html(url)
-    soup = BeautifulSoup(html, "html.parser")
 
-    items = soup.select("#episode_list li")
-    if not items:
-        items = soup.select("#eplist li")
-    if not items:
-        items = soup.select("#subject_prg_list li")
-    if not items:
-        items = soup.select("#sectionEp li")
-    if not items:
-        items = soup.select(".line_list li")
-    if not items:
-        items = soup.select("[data-ep], [data-episode-no]")
+def _lexbor_item_fields(item) -> EpisodeItemFields:
+    attrs = item.attributes
+    ep_tag = first_descendant(item, ".ep") or first_descendant(item, ".sort")
+    h6 = first_descendant(item, "h6")
+    link = first_descendant(h6, "a[href]") if h6 else None
+    title_tag = (first_descendant(item, "a.l") or link) if h6 else first_descendant(item, "a[href]")
+    return EpisodeItemFields(
+        classes=(attrs.get("class") or "").split(),
+        data_ep=attrs.get("data-ep") or attrs.get("data-episode-no"),
+        ep_text=ep_tag.text(strip=True) if ep_tag else None,
+        link_text=link.text(strip=True) if link else None,
+        title=title_tag.text(strip=True) if title_tag else "",
+        text=item.text(deep=True, separator=" ", strip=True),
+    )
+
+
+def _build_episode(fields: EpisodeItemFields) -> dict | None:
+    if "cat" in fields.classes:
+        return None
+    data_ep = fields.data_ep
+    episode_no = int(data_ep) if data_ep and str(data_ep).isdigit() else None
+    if not episode_no and fields.ep_text:
+        m = re.search(r"(\d+)", fields.ep_text)
+        if m:
+            episode_no = int(m.group(1))
+    if not episode_no and fields.link_text:
+        m = re.match(r"^(\d+)", fields.link_text)
+        if not m:
+            m = re.match(r"^(\d+)[\\.|\\s]", fields.link_text)
+        if m:
+            episode_no = int(m.group(1))
+    if not episode_no:
+        return None
+
+    air_date = _parse_air_date(fields.text)
+    return {"episode_no": episode_no, "title": fields.title, "air_date": air_date}
+
+
+def _collect_episodes(fields_iter: Iterable[EpisodeItemFields]) -> list[dict]:
+    episodes: list[dict] = []
+    for fields in fields_iter:
+        episode = _build_episode(fields)
+        if episode:
+            episodes.append(episode)
+    return episodes
+
+
+def parse_episodes(html: str, subject_id: int) -> list[dict]:
+    if get_backend() == "selectolax":
+        # 长章节列表逐项 find 是主要耗时，selectolax 后端直接在 lexbor 树上取字段
+        items = _select_items(lexbor_tree(html).css)
+        if items:
+            return _collect_episodes(_lexbor_item_fields(item) for item in items)
+
+    soup = make_soup(html, EPISODE_KEEP_SELECTORS)
+    items = _select_items(soup.select)
 
     if not items:
         title = soup.title.get_text(strip=True) if soup.title else ""
@@ -95,92 +159,97 @@ def crawl_bangumi_episodes(subject_id: int) -> None:
             snippet = node.get_text(" ", strip=True)[:300]
             logger.warning("【章节】候选容器[%s]片段：%s", idx, snippet)
 
+    return _collect_episodes(_soup_item_fields(item) for item in items)
+
+
+def save_episodes(subject_id: int, episodes: list[dict]) -> WriteStatus:
+    content_hash = compute_content_hash(episodes)
     with get_conn() as conn:
         anime = fetch_one(
             conn,
-            "SELECT id FROM anime WHERE bgm_subject_id = :sid LIMIT 1",
+            "SELECT id, episode_content_hash FROM anime WHERE bgm_subject_id = :sid LIMIT 1",
             {"sid": subject_id},
         )
         if not anime:
             logger.warning("【章节】未找到番剧记录：subject_id=%s", subject_id)
-            return
-
-        inserted = 0
-        for item in items:
-            if item.get("class") and "cat" in item.get("class"):
-                continue
-            data_ep = item.get("data-ep") or item.get("data-episode-no")
-            episode_no = int(data_ep) if data_ep and str(data_ep).isdigit() else None
-            if not episode_no:
-                ep_tag = item.find(class_="ep") or item.find(class_="sort")
-                if ep_tag:
-                    m = re.search(r"(\d+)", ep_tag.get_text(strip=True))
-                    if m:
-                        episode_no = int(m.group(1))
-            if not episode_no:
-                title_tag = item.find("h6")
-                if title_tag:
-                    link = title_tag.find("a", href=True)
-                    if link:
-                        ep_text = link.get_text(strip=True)
-                        m = re.match(r"^(\d+)", ep_text)
-                        if not m:
-                            m = re.match(r"^(\d+)[\\.|\\s]", ep_text)
-                        if m:
-                            episode_no = int(m.group(1))
-            if not episode_no:
-                continue
-
-            title_tag = item.find("a", class_="l") or item.find("h6").find("a", href=True) if item.find("h6") else item.find("a", href=True)
-            title = title_tag.get_text(strip=True) if title_tag else ""
-
-            air_date = _parse_air_date(item.get_text(" ", strip=True))
-
-            conn.execute(
-                text(
-                    "INSERT INTO anime_episode (\n"
-                    "    anime_id, episode_no, title, air_date\n"
-                    ") VALUES (\n"
-                    "    :anime_id, :episode_no, :title, :air_date\n"
-                    ")\n"
-                    "ON CONFLICT (anime_id, episode_no)\n"
-                    "DO UPDATE SET\n"
-                    "    title = EXCLUDED.title,\n"
-                    "    air_date = EXCLUDED.air_date,\n"
-                    "    updated_at = NOW();\n"
-                ),
-                {
-                    "anime_id": anime["id"],
-                    "episode_no": episode_no,
-                    "title": title,
-                    "air_date": air_date,
-                },
-            )
-            inserted += 1
-
+            return "updated"
+        if episodes and anime.get("episode_content_hash") == content_hash:
+            conn.execute(text(TOUCH_EPISODES_SQL), {"sid": subject_id})
+            logger.info("【章节】内容未变化，跳过写入：subject_id=%s", subject_id)
+            return "unchanged"
+
+        episode_upsert = BatchUpsert(
+            "anime_episode",
+            ["anime_id", "episode_no", "title", "air_date"],
+            ["anime_id", "episode_no"],
+            "title = EXCLUDED.title,\n"
+            "    air_date = EXCLUDED.air_date,\n"
+            "    updated_at = NOW()",
+        )
+        calendar_upsert = BatchUpsert(
+            "anime_airing_calendar",
+            ["anime_id", "air_date", "weekday", "episode_no"],
+            ["anime_id", "air_date"],
+            "episode_no = EXCLUDED.episode_no,\n"
+            "    weekday = EXCLUDED.weekday",
+        )
+        for episode in episodes:
+            air_date = episode["air_date"]
+            episode_upsert.add({"anime_id": anime["id"], **episode})
             if air_date:
                 year, month, day = [int(part) for part in air_date.split("-")]
                 weekday = (date(year, month, day).weekday() + 1) % 7
-                conn.execute(
-                    text(
-                        "INSERT INTO anime_airing_calendar (\n"
-                        "    anime_id, air_date, weekday, episode_no\n"
-                        ") VALUES (\n"
-                        "    :anime_id, :air_date, :weekday, :episode_no\n"
-                        ")\n"
-                        "ON CONFLICT (anime_id, air_date)\n"
-                        "DO UPDATE SET\n"
-                        "    episode_no = EXCLUDED.episode_no,\n"
-                        "    weekday = EXCLUDED.weekday;\n"
-                    ),
+                calendar_upsert.add(
                     {
                         "anime_id": anime["id"],
                         "air_date": air_date,
                         "weekday": weekday,
-                        "episode_no": episode_no,
-                    },
+                        "episode_no": episode["episode_no"],
+                    }
                 )
 
+        inserted = len(episode_upsert)
+        episode_upsert.flush(conn)
+        calendar_upsert.flush(conn)
+
+        conn.execute(text(TOUCH_EPISODES_SQL), {"sid": subject_id})
+        if inserted:
+            # 记录哈希并同步最新集数 / 集数统计；不更新 updated_at，避免 ETag 无意义变化
+            conn.execute(
+                text(
+                    "UPDATE anime\n"
+                    "SET\n"
+                    "    episode_content_hash = :hash,\n"
+                    "    latest_episode_no = (\n"
+                    "        SELECT MAX(episode_no) FROM anime_episode WHERE anime_id = :anime_id\n"
+                    "    ),\n"
+                    "    episode_count = (\n"
+                    "        SELECT COUNT(1) FROM anime_episode WHERE anime_id = :anime_id\n"
+                    "    )\n"
+                    "WHERE id = :anime_id"
+                ),
+                {"hash": content_hash, "anime_id": anime["id"]},
+            )
+
     logger.info("【章节】更新完成：subject_id=%s", subject_id)
     if inserted == 0:
         logger.warning("【章节】未写入任何集数：subject_id=%s", subject_id)
+    return "updated"
+
+
+def mark_episodes_crawled(subject_id: int) -> WriteStatus:
+    with get_conn() as conn:
+        conn.execute(text(TOUCH_EPISODES_SQL), {"sid": subject_id})
+    logger.info("【章节】页面未变更（304），跳过写入：subject_id=%s", subject_id)
+    return "not_modified"
+
+
+def crawl_bangumi_episodes(subject_id: int) -> WriteStatus:
+    url = f"{BASE_URL}/subject/{subject_id}/ep"
+    logger.info("【章节】开始爬取：%s", url)
+    page = fetch_page(url)
+    if page.not_modified:
+        return mark_episodes_crawled(subject_id)
+    status = save_episodes(subject_id, parse_episodes(page.html or "", subject_id))
+    remember(page)
+    return status
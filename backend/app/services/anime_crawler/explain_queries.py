@@ -0,0 +1,297 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "../../.."))
+if CURRENT_DIR in sys.path:
+    sys.path.remove(CURRENT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+import argparse  # noqa: E402
+import ast  # noqa: E402
+import json  # noqa: E402
+import re  # noqa: E402
+import statistics  # noqa: E402
+from dataclasses import asdict, dataclass, field  # noqa: E402
+from datetime import date, timedelta  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+# 执行计划检查：从源码中提取新番导视接口与爬虫日志服务的全部 SQL，
+# 在 PostgreSQL 上逐条执行 EXPLAIN (ANALYZE, BUFFERS)，汇总耗时 / 缓冲区 / 扫描方式，
+# 并可与保存的基线对比，报告计划退化（新增顺序扫描、不再使用索引、耗时或缓冲区显著上升）。
+#
+#   python app/services/anime_crawler/explain_queries.py
+#   python app/services/anime_crawler/explain_queries.py --save-baseline explain_baseline.json
+#   python app/services/anime_crawler/explain_queries.py --baseline explain_baseline.json
+#
+# EXPLAIN ANALYZE 会真实执行语句，这里只提取只读查询，并在回滚的事务中执行。
+
+QUERY_SOURCES = [
+    Path(PROJECT_ROOT) / "app" / "api" / "anime_guide.py",
+    Path(PROJECT_ROOT) / "app" / "services" / "crawler_log_service.py",
+]
+QUERY_CALLS = {"fetch_one", "fetch_all"}
+
+_BIND_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+@dataclass
+class SourceQuery:
+    query_id: str
+    sql: str
+    params: list[str]
+
+
+@dataclass
+class PlanSummary:
+    query_id: str
+    execution_ms: float
+    planning_ms: float
+    total_cost: float
+    shared_hit: int
+    shared_read: int
+    nodes: list[str] = field(default_factory=list)
+    seq_scans: list[str] = field(default_factory=list)
+    indexes: list[str] = field(default_factory=list)
+
+    @property
+    def buffers(self) -> int:
+        return self.shared_hit + self.shared_read
+
+
+def _resolve_sql(node: ast.AST, constants: dict[str, str]) -> str | None:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = _resolve_sql(node.left, constants)
+        right = _resolve_sql(node.right, constants)
+        if left is not None and right is not None:
+            return left + right
+    return None
+
+
+def extract_queries(path: Path) -> list[SourceQuery]:
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    constants: dict[str, str] = {}
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+            target = stmt.targets[0]
+            value = _resolve_sql(stmt.value, constants)
+            if isinstance(target, ast.Name) and value is not None:
+                constants[target.id] = value
+
+    queries: list[SourceQuery] = []
+    for func in ast.walk(tree):
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        calls = [
+            node
+            for node in ast.walk(func)
+            if isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in QUERY_CALLS
+            and len(node.args) >= 2
+        ]
+        for index, call in enumerate(sorted(calls, key=lambda item: item.lineno), start=1):
+            sql = _resolve_sql(call.args[1], constants)
+            query_id = f"{path.stem}.{func.name}"
+            if len(calls) > 1:
+                query_id = f"{query_id}#{index}"
+            if sql is None:
+                print(f"[跳过] {query_id}：SQL 不是静态字符串（行 {call.lineno}）")
+                continue
+            if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                continue
+            queries.append(SourceQuery(query_id, sql, sorted(set(_BIND_PARAM.findall(sql)))))
+    return queries
+
+
+def _sample_params(conn) -> dict[str, object]:
+    from sqlalchemy import text
+
+    anime = conn.execute(
+        text("SELECT id::text, bgm_subject_id, weekday FROM anime ORDER BY updated_at DESC LIMIT 1")
+    ).first()
+    latest_air_date = conn.execute(text("SELECT MAX(air_date) FROM anime_airing_calendar")).scalar()
+    log = conn.execute(
+        text("SELECT id::text, crawler_name FROM crawler_run_logs ORDER BY started_at DESC LIMIT 1")
+    ).first()
+
+    end = latest_air_date or date.today()
+    return {
+        "anime_id": anime[0] if anime else "00000000-0000-0000-0000-000000000000",
+        "sid": anime[1] if anime else 0,
+        "weekday": anime[2] if anime and anime[2] is not None else 1,
+        "air_date": end.isoformat(),
+        "start": (end - timedelta(days=6)).isoformat(),
+        "end": end.isoformat(),
+        "id": log[0] if log else "00000000-0000-0000-0000-000000000000",
+        "crawler_name": log[1] if log else "anime_guide",
+        "limit": 15,
+        "offset": 0,
+    }
+
+
+def _walk_plan(node: dict, summary: PlanSummary) -> None:
+    node_type = node.get("Node Type", "?")
+    relation = node.get("Relation Name")
+    index_name = node.get("Index Name")
+    label = node_type
+    if index_name:
+        label += f" using {index_name}"
+        summary.indexes.append(index_name)
+    if relation:
+        label += f" on {relation}"
+    if node_type == "Seq Scan" and relation:
+        summary.seq_scans.append(relation)
+    summary.nodes.append(label)
+    for child in node.get("Plans", []):
+        _walk_plan(child, summary)
+
+
+def explain(conn, query: SourceQuery, params: dict[str, object], runs: int) -> PlanSummary:
+    from sqlalchemy import text
+
+    statement = text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query.sql.strip().rstrip(";"))
+    bound = {name: params[name] for name in query.params}
+    timings: list[float] = []
+    plan: dict = {}
+    for _ in range(max(runs, 1)):
+        raw = conn.execute(statement, bound).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        timings.append(float(plan.get("Execution Time", 0.0)))
+
+    root = plan["Plan"]
+    summary = PlanSummary(
+        query_id=query.query_id,
+        execution_ms=round(statistics.median(timings), 3),
+        planning_ms=round(float(plan.get("Planning Time", 0.0)), 3),
+        total_cost=float(root.get("Total Cost", 0.0)),
+        shared_hit=int(root.get("Shared Hit Blocks", 0)),
+        shared_read=int(root.get("Shared Read Blocks", 0)),
+    )
+    _walk_plan(root, summary)
+    return summary
+
+
+def find_regressions(
+    current: PlanSummary,
+    baseline: dict | None,
+    ratio: float,
+    min_ms: float,
+    min_buffers: int,
+) -> list[str]:
+    if not baseline:
+        return []
+    problems: list[str] = []
+    for relation in sorted(set(current.seq_scans) - set(baseline.get("seq_scans", []))):
+        problems.append(f"新增顺序扫描 {relation}")
+    for index_name in sorted(set(baseline.get("indexes", [])) - set(current.indexes)):
+        problems.append(f"不再使用索引 {index_name}")
+
+    base_ms = float(baseline.get("execution_ms", 0.0))
+    if current.execution_ms > base_ms * ratio and current.execution_ms - base_ms >= min_ms:
+        problems.append(f"耗时 {base_ms:.2f}ms -> {current.execution_ms:.2f}ms")
+    base_buffers = int(baseline.get("shared_hit", 0)) + int(baseline.get("shared_read", 0))
+    if current.buffers > base_buffers * ratio and current.buffers - base_buffers >= min_buffers:
+        problems.append(f"缓冲区 {base_buffers} -> {current.buffers} blocks")
+    base_cost = float(baseline.get("total_cost", 0.0))
+    if base_cost and current.total_cost > base_cost * ratio:
+        problems.append(f"估算代价 {base_cost:.1f} -> {current.total_cost:.1f}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="新番导视 / 爬虫日志 SQL 执行计划检查")
+    parser.add_argument("--database-url", help="默认读取 DATABASE_URL")
+    parser.add_argument("--runs", type=int, default=3, help="每条语句执行次数，耗时取中位数")
+    parser.add_argument("--baseline", type=Path, help="与该基线文件对比并报告退化")
+    parser.add_argument("--save-baseline", type=Path, help="把本次结果保存为基线")
+    parser.add_argument("--ratio", type=float, default=2.0, help="耗时 / 缓冲区 / 代价超过基线的倍数视为退化")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="耗时至少增加多少毫秒才报告")
+    parser.add_argument("--min-buffers", type=int, default=100, help="缓冲区至少增加多少块才报告")
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="覆盖自动选取的绑定参数，例如 --param air_date=2026-01-06",
+    )
+    parser.add_argument("--verbose", action="store_true", help="打印完整计划节点")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.services.anime_crawler.db import get_engine
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"EXPLAIN (ANALYZE, BUFFERS) 仅支持 PostgreSQL，当前为 {engine.dialect.name}")
+
+    queries = [query for path in QUERY_SOURCES for query in extract_queries(path)]
+    baseline: dict = {}
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+
+    results: list[PlanSummary] = []
+    regressions: dict[str, list[str]] = {}
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            params = _sample_params(conn)
+            for item in args.param:
+                name, _, value = item.partition("=")
+                params[name] = int(value) if value.lstrip("-").isdigit() else value
+            print(f"查询数={len(queries)} runs={args.runs} 参数={params}")
+            print()
+            for query in queries:
+                missing = [name for name in query.params if name not in params]
+                if missing:
+                    print(f"[跳过] {query.query_id}：缺少参数 {missing}")
+                    continue
+                summary = explain(conn, query, params, args.runs)
+                results.append(summary)
+                problems = find_regressions(
+                    summary, baseline.get(query.query_id), args.ratio, args.min_ms, args.min_buffers
+                )
+                flag = "!" if problems else " "
+                print(
+                    f"{flag} {summary.query_id:<52} {summary.execution_ms:>9.3f}ms "
+                    f"plan={summary.planning_ms:.3f}ms buffers={summary.buffers:<6} "
+                    f"cost={summary.total_cost:.1f}"
+                )
+                if summary.seq_scans:
+                    print(f"    顺序扫描：{', '.join(sorted(set(summary.seq_scans)))}")
+                if args.verbose:
+                    for node in summary.nodes:
+                        print(f"    - {node}")
+                for problem in problems:
+                    print(f"    退化：{problem}")
+                if problems:
+                    regressions[query.query_id] = problems
+        finally:
+            transaction.rollback()
+
+    if args.baseline:
+        missing_ids = sorted(set(baseline) - {summary.query_id for summary in results})
+        for query_id in missing_ids:
+            print(f"  基线中的 {query_id} 本次未执行（查询已删除或改名）")
+
+    if args.save_baseline:
+        payload = {summary.query_id: asdict(summary) for summary in results}
+        args.save_baseline.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"\n基线已保存：{args.save_baseline}")
+
+    if regressions:
+        print(f"\n发现 {len(regressions)} 条查询计划退化")
+        raise SystemExit(1)
+    print("\n未发现计划退化" if args.baseline else "\n完成（未指定 --baseline，不做对比）")
+
+
+if __name__ == "__main__":
+    main()
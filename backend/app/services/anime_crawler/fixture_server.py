@@ -0,0 +1,239 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)
+# 直接以脚本运行时，本目录的 calendar.py 会遮蔽标准库 calendar
+if CURRENT_DIR in sys.path:
+    sys.path.remove(CURRENT_DIR)
+
+import argparse  # noqa: E402
+import hashlib  # noqa: E402
+import random  # noqa: E402
+import re  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+from dataclasses import dataclass, field  # noqa: E402
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+# 离线 Bangumi 替身服务器：按录制的语料目录返回 calendar / subject / ep 页面，
+# 支持可配置的响应延迟与 ETag/304，供爬虫基准测试使用，不访问 bangumi.tv。
+#
+# 语料目录约定：
+#   calendar.html              -> /calendar
+#   subject_<id>.html          -> /subject/<id>
+#   subject_<id>_ep.html       -> /subject/<id>/ep
+# 没有对应 id 的页面时，使用目录中排序第一的同类页面兜底。
+
+DEFAULT_CORPUS_DIR = Path(__file__).resolve().parent / "fixtures"
+
+_SUBJECT_PATH = re.compile(r"^/subject/(\d+)(/ep)?/?$")
+_SUBJECT_FILE = re.compile(r"^subject_(\d+)(_ep)?\.html$")
+
+
+class FixtureCorpus:
+    def __init__(self, corpus_dir: Path) -> None:
+        self.corpus_dir = corpus_dir
+        self.calendar: bytes | None = None
+        self.subjects: dict[int, bytes] = {}
+        self.episodes: dict[int, bytes] = {}
+        for path in sorted(corpus_dir.glob("*.html")):
+            body = path.read_bytes()
+            if path.name == "calendar.html":
+                self.calendar = body
+                continue
+            match = _SUBJECT_FILE.match(path.name)
+            if not match:
+                continue
+            target = self.episodes if match.group(2) else self.subjects
+            target[int(match.group(1))] = body
+        if self.calendar is None:
+            raise FileNotFoundError(f"calendar.html not found in {corpus_dir}")
+        self._default_subject = next(iter(self.subjects.values()), None)
+        self._default_episodes = next(iter(self.episodes.values()), None)
+
+    def resolve(self, path: str) -> bytes | None:
+        if path.rstrip("/") == "/calendar":
+            return self.calendar
+        match = _SUBJECT_PATH.match(path)
+        if not match:
+            return None
+        subject_id = int(match.group(1))
+        if match.group(2):
+            return self.episodes.get(subject_id, self._default_episodes)
+        return self.subjects.get(subject_id, self._default_subject)
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    not_modified: int = 0
+    not_found: int = 0
+    bytes_sent: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, status: int, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            if status == 304:
+                self.not_modified += 1
+            elif status == 404:
+                self.not_found += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "not_found": self.not_found,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.not_modified = 0
+            self.not_found = 0
+            self.bytes_sent = 0
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server: "_FixtureHTTPServer"
+    protocol_version = "HTTP/1.1"
+    # 响应头与正文分两次写出，关闭 Nagle 避免与 delayed ACK 叠加出约 40ms 的额外延迟
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        server = self.server
+        if server.latency_seconds > 0:
+            jitter = random.uniform(-server.jitter_seconds, server.jitter_seconds)
+            time.sleep(max(server.latency_seconds + jitter, 0.0))
+
+        path = self.path.split("?", 1)[0]
+        body = server.corpus.resolve(path)
+        if body is None:
+            self._reply(404, b"not found", {"Content-Type": "text/plain; charset=utf-8"})
+            return
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if server.etag_enabled and self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", {"ETag": etag})
+            return
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if server.etag_enabled:
+            headers["ETag"] = etag
+        self._reply(200, body, headers)
+
+    def _reply(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        self.server.stats.record(status, len(body))
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        corpus: FixtureCorpus,
+        latency_seconds: float,
+        jitter_seconds: float,
+        etag_enabled: bool,
+    ) -> None:
+        super().__init__(address, _FixtureHandler)
+        self.corpus = corpus
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.etag_enabled = etag_enabled
+        self.stats = ServerStats()
+
+
+class FixtureServer:
+    def __init__(
+        self,
+        corpus_dir: Path = DEFAULT_CORPUS_DIR,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        etag_enabled: bool = True,
+    ) -> None:
+        self._httpd = _FixtureHTTPServer(
+            (host, port),
+            FixtureCorpus(corpus_dir),
+            latency_ms / 1000,
+            jitter_ms / 1000,
+            etag_enabled,
+        )
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> ServerStats:
+        return self._httpd.stats
+
+    @property
+    def corpus(self) -> FixtureCorpus:
+        return self._httpd.corpus
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fixture-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线 Bangumi 替身服务器")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_DIR, help="语料目录")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟随机抖动范围")
+    parser.add_argument("--no-etag", action="store_true", help="不返回 ETag / 304")
+    args = parser.parse_args()
+
+    server = FixtureServer(
+        args.corpus, args.host, args.port, args.latency_ms, args.jitter_ms, not args.no_etag
+    )
+    print(f"fixture server: {server.base_url} corpus={args.corpus}")
+    print(f"爬虫指向本服务：BANGUMI_BASE_URL={server.base_url} BANGUMI_FALLBACK_BASE_URL={server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import importlib.util
+import logging
+from typing import Sequence
+
+from bs4 import BeautifulSoup
+
+from .settings import HTML_PARSER
+
+logger = logging.getLogger(__name__)
+
+# 可插拔 HTML 解析层：
+# - html.parser：纯 Python 内置解析器，最慢但无额外依赖
+# - lxml：C 实现的 BeautifulSoup tree builder，整页解析
+# - selectolax：先用 lexbor 按选择器裁剪出需要的节点，再把小片段交给 BeautifulSoup，
+#   解析逻辑（select / find）保持一份
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+
+_backend: str | None = None
+
+
+def _is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def available_backends() -> list[str]:
+    backends = ["html.parser"]
+    if _is_installed("lxml"):
+        backends.append("lxml")
+    if _is_installed("selectolax"):
+        backends.append("selectolax")
+    return backends
+
+
+def _resolve_backend(name: str) -> str:
+    installed = available_backends()
+    if name == "auto":
+        return installed[-1]
+    if name in installed:
+        return name
+    if name not in PARSER_BACKENDS:
+        logger.warning("【解析】未知解析后端 %s，回退 auto", name)
+    else:
+        logger.warning("【解析】解析后端 %s 未安装，回退 auto", name)
+    return installed[-1]
+
+
+def get_backend() -> str:
+    global _backend
+    if _backend is None:
+        _backend = _resolve_backend(HTML_PARSER)
+        logger.info("【解析】HTML 解析后端=%s", _backend)
+    return _backend
+
+
+def set_backend(name: str) -> str:
+    # 供基准脚本切换后端，返回实际生效的后端
+    global _backend
+    _backend = _resolve_backend(name)
+    return _backend
+
+
+def _tree_builder() -> str:
+    return "lxml" if _is_installed("lxml") else "html.parser"
+
+
+def _extract_fragment(html: str, keep: Sequence[str]) -> str:
+    tree = lexbor_tree(html)
+    parts: list[str] = []
+    kept: set[int] = set()
+    # 组合选择器按文档顺序返回，保证 find_previous 等依赖顺序的逻辑不变；
+    # 已保留节点的后代不再重复输出
+    for node in tree.css(", ".join(keep)):
+        parent = node.parent
+        nested = False
+        while parent is not None:
+            if parent.mem_id in kept:
+                nested = True
+                break
+            parent = parent.parent
+        if nested:
+            continue
+        kept.add(node.mem_id)
+        parts.append(node.html or "")
+    return "".join(parts)
+
+
+def make_soup(html: str, keep: Sequence[str] = ()) -> BeautifulSoup:
+    backend = get_backend()
+    if backend == "selectolax" and keep:
+        fragment = _extract_fragment(html, keep)
+        # 未命中任何目标节点时回退整页解析，保留原有的兜底与调试日志行为
+        if fragment:
+            return BeautifulSoup(f"<html><body>{fragment}</body></html>", _tree_builder())
+        return BeautifulSoup(html, _tree_builder())
+    if backend == "selectolax":
+        return BeautifulSoup(html, _tree_builder())
+    return BeautifulSoup(html, backend)
+
+
+def lexbor_tree(html: str):
+    from selectolax.lexbor import LexborHTMLParser
+
+    return LexborHTMLParser(html)
+
+
+def first_descendant(node, selector: str):
+    # lexbor 在节点上执行 css 会匹配节点自身，这里与 BeautifulSoup.find 一致只取后代
+    for match in node.css(selector):
+        if match.mem_id != node.mem_id:
+            return match
+    return None
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Mapping
+
+from .settings import HTTP_CACHE_DIR, HTTP_CACHE_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# 条件请求缓存：按 URL 落盘保存 ETag / Last-Modified，下次抓取时带上
+# If-None-Match / If-Modified-Since，304 时跳过解析与写库。
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: str | None
+    not_modified: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+_stats_lock = threading.Lock()
+_stats = {"hit": 0, "miss": 0}
+
+
+def _entry_path(url: str) -> Path:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return HTTP_CACHE_DIR / f"{digest}.json"
+
+
+def _load_entry(url: str) -> dict | None:
+    if not HTTP_CACHE_ENABLED:
+        return None
+    path = _entry_path(url)
+    try:
+        with path.open("r", encoding="utf-8") as file:
+            entry = json.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("【缓存】读取失败 url=%s err=%s", url, exc)
+        return None
+    return entry if entry.get("url") == url else None
+
+
+def conditional_headers(url: str) -> dict[str, str]:
+    entry = _load_entry(url)
+    if not entry:
+        return {}
+    headers: dict[str, str] = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def build_page(
+    url: str,
+    status_code: int,
+    headers: Mapping[str, str],
+    content: bytes,
+    keep_body: bool = False,
+) -> FetchedPage:
+    if status_code == 304:
+        entry = _load_entry(url) or {}
+        _record("hit")
+        # keep_body 的页面（如日历）在 304 时返回上次保存的正文，仍需重新解析
+        return FetchedPage(
+            url=url,
+            html=entry.get("body") if keep_body else None,
+            not_modified=True,
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+        )
+
+    _record("miss")
+    # 强制按 UTF-8 解码，避免 weekday 标题乱码导致解析失败
+    return FetchedPage(
+        url=url,
+        html=content.decode("utf-8", errors="ignore"),
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+    )
+
+
+def remember(page: FetchedPage, keep_body: bool = False) -> None:
+    # 仅在写库成功后调用，避免写库失败后下次被 304 跳过
+    if not HTTP_CACHE_ENABLED or page.not_modified:
+        return
+    if not page.etag and not page.last_modified:
+        return
+    entry = {
+        "url": page.url,
+        "etag": page.etag,
+        "last_modified": page.last_modified,
+        "stored_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if keep_body:
+        entry["body"] = page.html
+    path = _entry_path(page.url)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    try:
+        HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        logger.warning("【缓存】写入失败 url=%s err=%s", page.url, exc)
+
+
+def _record(kind: str) -> None:
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats["hit"] = 0
+        _stats["miss"] = 0
+
+
+def get_stats() -> dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def format_stats() -> str:
+    stats = get_stats()
+    return f"命中(304)={stats['hit']}，未命中={stats['miss']}"
@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .http_cache import FetchedPage, build_page, conditional_headers
+from .settings import (
+    HTTP_MIN_INTERVAL_SECONDS,
+    HTTP_PER_HOST_LIMIT,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; galileocat-webtool/1.0; +https://bangumi.tv)",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+REQUEST_TIMEOUT_SECONDS = 20
+
+
+# 同一 host 的并发上限 + 最小请求间隔，避免并发抓取时对 Bangumi 造成压力
+class _HostLimiter:
+    def __init__(self, max_concurrency: int, min_interval: float) -> None:
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_allowed_at = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._semaphore:
+            if self._min_interval > 0:
+                with self._lock:
+                    now = time.monotonic()
+                    wait_seconds = self._next_allowed_at - now
+                    self._next_allowed_at = max(now, self._next_allowed_at) + self._min_interval
+                if wait_seconds > 0:
+                    time.sleep(wait_seconds)
+            yield
+
+
+_limiters_lock = threading.Lock()
+_limiters: dict[str, _HostLimiter] = {}
+
+
+def _get_host_limiter(url: str) -> _HostLimiter:
+    host = urlsplit(url).netloc.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _HostLimiter(HTTP_PER_HOST_LIMIT, HTTP_MIN_INTERVAL_SECONDS)
+            _limiters[host] = limiter
+        return limiter
+
+
+# 记录每个响应所属的 urllib3 连接池，用于统计每个 host 的连接复用情况
+class _PoolTrackingAdapter(HTTPAdapter):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._pools_lock = threading.Lock()
+        self._pools_by_host: dict[str, list[Any]] = defaultdict(list)
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        response = super().send(request, **kwargs)
+        pool = getattr(response.raw, "_pool", None)
+        host = getattr(pool, "host", None)
+        if pool is not None and host:
+            with self._pools_lock:
+                pools = self._pools_by_host[host]
+                if all(item is not pool for item in pools):
+                    pools.append(pool)
+        return response
+
+    def connection_stats(self) -> dict[str, dict[str, int]]:
+        stats: dict[str, dict[str, int]] = {}
+        with self._pools_lock:
+            for host, pools in self._pools_by_host.items():
+                # num_requests 含重试；num_connections 为实际新建的 TCP/TLS 连接数
+                request_count = sum(getattr(pool, "num_requests", 0) for pool in pools)
+                connection_count = sum(getattr(pool, "num_connections", 0) for pool in pools)
+                stats[host] = {
+                    "requests": request_count,
+                    "connections": connection_count,
+                    "reused": max(request_count - connection_count, 0),
+                }
+        return stats
+
+
+def resolve_ssl_verify() -> bool | str:
+    verify: bool | str = True
+    verify_env = os.getenv("BANGUMI_SSL_VERIFY", "1").lower()
+    if verify_env in ("0", "false", "no"):
+        verify = False
+    ca_bundle = os.getenv("BANGUMI_CA_BUNDLE")
+    if ca_bundle:
+        verify = ca_bundle
+    return verify
+
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+_adapter: _PoolTrackingAdapter | None = None
+
+
+def _build_session() -> tuple[requests.Session, _PoolTrackingAdapter]:
+    session = requests.Session()
+    session.trust_env = False
+    session.headers.update(DEFAULT_HEADERS)
+    session.verify = resolve_ssl_verify()
+
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = _PoolTrackingAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+def get_session() -> requests.Session:
+    global _session, _adapter
+    with _session_lock:
+        if _session is None:
+            _session, _adapter = _build_session()
+        return _session
+
+
+def _send(url: str, headers: dict[str, str]) -> requests.Response:
+    session = get_session()
+    with _get_host_limiter(url).slot():
+        resp = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+    resp.raise_for_status()
+    return resp
+
+
+def fetch_page(url: str, keep_body: bool = False) -> FetchedPage:
+    resp = _send(url, conditional_headers(url))
+    page = build_page(url, resp.status_code, resp.headers, resp.content, keep_body)
+    if keep_body and page.not_modified and page.html is None:
+        # 缓存正文缺失时退回无条件请求
+        resp = _send(url, {})
+        page = build_page(url, resp.status_code, resp.headers, resp.content, keep_body)
+    return page
+
+
+def get_connection_stats() -> dict[str, dict[str, int]]:
+    with _session_lock:
+        adapter = _adapter
+    return adapter.connection_stats() if adapter else {}
+
+
+def format_connection_stats(stats: dict[str, dict[str, int]] | None = None) -> str:
+    stats = get_connection_stats() if stats is None else stats
+    if not stats:
+        return "无"
+    parts: list[str] = []
+    for host, item in sorted(stats.items()):
+        parts.append(
+            f"{host}:请求{item['requests']}/新建连接{item['connections']}/复用{item['reused']}"
+        )
+    return "，".join(parts)
+
+
+def close_session() -> None:
+    # 关闭共享会话，下一次请求时重新建池（统计随之清零）
+    global _session, _adapter
+    with _session_lock:
+        session = _session
+        _session = None
+        _adapter = None
+    if session is not None:
+        session.close()
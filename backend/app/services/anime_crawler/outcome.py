@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from typing import Literal
+
+# updated = 已写库；not_modified = 304 未下载正文；unchanged = 内容哈希未变，跳过写库
+WriteStatus = Literal["updated", "not_modified", "unchanged"]
+
+
+# 单个番剧在一次调度中的处理结果，由调度线程统一汇总计数
+@dataclass
+class SubjectOutcome:
+    subject_id: int
+    detail_crawled: bool = False
+    detail_skipped: bool = False
+    detail_not_modified: bool = False
+    detail_unchanged: bool = False
+    episode_crawled: bool = False
+    episode_not_modified: bool = False
+    episode_unchanged: bool = False
+    episode_skip_reason: str | None = None
+    error: Exception | None = None
+
+    def apply_detail_status(self, status: WriteStatus) -> None:
+        self.detail_crawled = status == "updated"
+        self.detail_not_modified = status == "not_modified"
+        self.detail_unchanged = status == "unchanged"
+
+    def apply_episode_status(self, status: WriteStatus) -> None:
+        self.episode_crawled = status == "updated"
+        self.episode_not_modified = status == "not_modified"
+        self.episode_unchanged = status == "unchanged"
@@ -0,0 +1,151 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import bindparam, text
+
+from .calendar import week_start_of
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+DETAIL_REFRESH_DAYS = 7
+
+# 一次查询取回所有番剧的判定依据，替代逐个番剧 1 + 4 次查询；
+# IN 使用 expanding bind，PostgreSQL 与 SQLite（基准测试）通用
+PLAN_SQL = text(
+    """
+    WITH target AS (
+        SELECT id, bgm_subject_id, weekday, last_crawled_at, episodes_crawled_at
+        FROM anime
+        WHERE bgm_subject_id IN :subject_ids
+    ),
+    ep AS (
+        SELECT
+            e.anime_id,
+            COUNT(1) AS episode_count,
+            MAX(e.updated_at) AS last_episode_updated_at
+        FROM anime_episode e
+        JOIN target t ON t.id = e.anime_id
+        GROUP BY e.anime_id
+    ),
+    cal AS (
+        SELECT c.anime_id, COUNT(1) AS week_episode_count
+        FROM anime_airing_calendar c
+        JOIN target t ON t.id = c.anime_id
+        WHERE c.episode_no IS NOT NULL
+          AND c.air_date BETWEEN :week_start AND :week_end
+        GROUP BY c.anime_id
+    )
+    SELECT
+        t.bgm_subject_id,
+        t.weekday,
+        t.last_crawled_at,
+        COALESCE(ep.episode_count, 0) AS episode_count,
+        -- 迁移前抓取过的番剧还没有 episodes_crawled_at，回退到章节行的更新时间
+        COALESCE(t.episodes_crawled_at, ep.last_episode_updated_at) AS episodes_crawled_at,
+        COALESCE(cal.week_episode_count, 0) AS week_episode_count
+    FROM target t
+    LEFT JOIN ep ON ep.anime_id = t.id
+    LEFT JOIN cal ON cal.anime_id = t.id;
+    """
+).bindparams(bindparam("subject_ids", expanding=True))
+
+
+@dataclass
+class CrawlPlan:
+    subject_id: int
+    crawl_detail: bool
+    crawl_episodes: bool
+    episode_reason: str
+
+
+def _parse_timestamp(value: object) -> datetime | None:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except Exception:
+            return None
+    return value if isinstance(value, datetime) else None
+
+
+def _decide_detail(row: dict | None, threshold_days: int) -> bool:
+    if not row or not row.get("last_crawled_at"):
+        return True
+    last = _parse_timestamp(row["last_crawled_at"])
+    if last is None:
+        return True
+    delta = datetime.now(last.tzinfo) - last
+    return delta.days >= threshold_days
+
+
+def _decide_episodes(row: dict | None, today: date) -> tuple[bool, str]:
+    if not row:
+        return True, "anime_not_found"
+    if not row.get("episode_count"):
+        return True, "no_episode_data"
+
+    weekday = row.get("weekday")
+    last_crawled_at = _parse_timestamp(row.get("episodes_crawled_at"))
+    if isinstance(last_crawled_at, datetime):
+        now = datetime.now(last_crawled_at.tzinfo) if last_crawled_at.tzinfo else datetime.now()
+        # 09:00 / 21:00 两次调度避免同日重复抓取同一番剧
+        if now.date() == last_crawled_at.date():
+            return False, "already_crawled_today"
+
+    today_weekday = (today.weekday() + 1) % 7
+    if isinstance(weekday, int):
+        # Bangumi 周更为主：默认只在更新日当天和次日窗口抓取
+        allowed_weekdays = {today_weekday, (today_weekday - 1) % 7}
+        if weekday not in allowed_weekdays:
+            return False, "outside_update_window"
+    elif isinstance(last_crawled_at, datetime):
+        now = datetime.now(last_crawled_at.tzinfo) if last_crawled_at.tzinfo else datetime.now()
+        # 未识别 weekday 时，至少间隔 3 天再补抓
+        if (now - last_crawled_at).days < 3:
+            return False, "unknown_weekday_cooldown"
+
+    if row.get("week_episode_count"):
+        return False, "episode_known_this_week"
+    return True, "need_refresh"
+
+
+def plan_crawl(
+    subject_ids: list[int], detail_threshold_days: int = DETAIL_REFRESH_DAYS
+) -> dict[int, CrawlPlan]:
+    if not subject_ids:
+        return {}
+
+    today = date.today()
+    week_start = week_start_of(today)
+    week_end = week_start + timedelta(days=6)
+
+    with get_conn() as conn:
+        result = conn.execute(
+            PLAN_SQL,
+            {
+                "subject_ids": list(subject_ids),
+                "week_start": week_start.isoformat(),
+                "week_end": week_end.isoformat(),
+            },
+        )
+        rows = [dict(row) for row in result.mappings().all()]
+
+    rows_by_sid = {row["bgm_subject_id"]: row for row in rows}
+    plans: dict[int, CrawlPlan] = {}
+    for sid in subject_ids:
+        row = rows_by_sid.get(sid)
+        crawl_episodes, reason = _decide_episodes(row, today)
+        plans[sid] = CrawlPlan(
+            subject_id=sid,
+            crawl_detail=_decide_detail(row, detail_threshold_days),
+            crawl_episodes=crawl_episodes,
+            episode_reason=reason,
+        )
+    logger.info(
+        "【调度】抓取计划：番剧数=%s，需抓详情=%s，需抓章节=%s",
+        len(plans),
+        sum(1 for plan in plans.values() if plan.crawl_detail),
+        sum(1 for plan in plans.values() if plan.crawl_episodes),
+    )
+    return plans
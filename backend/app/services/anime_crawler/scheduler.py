@@ -1,22 +1,31 @@
 import logging
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
-from datetime import date, datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Literal, Optional, Tuple
+from typing import Callable, Iterable, Iterator, Literal, Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy import text
 
+from .async_engine import run_async_crawl
 from .calendar import crawl_bangumi_calendar
 from .episode import crawl_bangumi_episodes
 from .subject import crawl_bangumi_subject
 from .db import fetch_all, fetch_one, get_conn
+from .http_cache import format_stats as format_http_cache_stats
+from .http_cache import reset_stats as reset_http_cache_stats
+from .http_client import close_session, format_connection_stats
+from .outcome import SubjectOutcome
+from .planner import CrawlPlan, plan_crawl
+from .settings import CRAWLER_ENGINE, CRAWLER_WORKERS
 
 logger = logging.getLogger(__name__)
 
 _scheduler: Optional[BackgroundScheduler] = None
+_crawl_complete_hooks: list[Callable[[], None]] = []
 
 
 def _detect_backend_root() -> Path:
@@ -34,6 +43,7 @@ RUN_LOG_PATH_PREFIX = "logs/anime_crawler"
 LOGS_ROOT = BACKEND_ROOT / "logs"
 LOG_RETENTION_DAYS = 30
 CrawlerRunType = Literal["manual", "scheduled", "autostart"]
+CrawlerEngine = Literal["sync", "async"]
 SKIP_REASON_LABELS: dict[str, str] = {
     "already_crawled_today": "今日已抓取",
     "outside_update_window": "不在更新窗口",
@@ -228,99 +238,78 @@ def _update_run_log_row(
         logger.exception("【调度】写入 crawler_run_logs 失败（finish）：%s", exc)
 
 
-def _should_crawl_detail(subject_id: int, threshold_days: int = 7) -> bool:
-    with get_conn() as conn:
-        row = fetch_one(
-            conn,
-            "SELECT last_crawled_at FROM anime WHERE bgm_subject_id = :sid LIMIT 1",
-            {"sid": subject_id},
-        )
-    if not row or not row.get("last_crawled_at"):
-        return True
+def add_crawl_complete_hook(hook: Callable[[], None]) -> None:
+    # 每次 run_crawler_once 结束（无论成功失败）后调用，用于清理读接口缓存等
+    if hook not in _crawl_complete_hooks:
+        _crawl_complete_hooks.append(hook)
 
-    from datetime import datetime
 
-    last = row["last_crawled_at"]
-    if isinstance(last, str):
+def _notify_crawl_complete() -> None:
+    for hook in list(_crawl_complete_hooks):
         try:
-            last = datetime.fromisoformat(last.replace("Z", "+00:00"))
-        except Exception:
-            return True
-    delta = datetime.now(last.tzinfo) - last
-    return delta.days >= threshold_days
-
-
-def _should_crawl_episodes(subject_id: int) -> Tuple[bool, str]:
-    with get_conn() as conn:
-        row = fetch_one(
-            conn,
-            "SELECT id, weekday FROM anime WHERE bgm_subject_id = :sid LIMIT 1",
-            {"sid": subject_id},
-        )
-        if not row:
-            return True, "anime_not_found"
-        anime_id = row["id"]
-        weekday = row.get("weekday")
-        count_row = fetch_one(
-            conn,
-            "SELECT COUNT(1) AS cnt FROM anime_episode WHERE anime_id = :aid",
-            {"aid": anime_id},
-        )
-        if not count_row or count_row.get("cnt", 0) == 0:
-            return True, "no_episode_data"
+            hook()
+        except Exception as exc:
+            logger.exception("【调度】爬取完成回调执行失败：%s", exc)
 
-        latest_row = fetch_one(
-            conn,
-            "SELECT MAX(updated_at) AS last_updated_at FROM anime_episode WHERE anime_id = :aid",
-            {"aid": anime_id},
-        )
-        last_updated_at = latest_row.get("last_updated_at") if latest_row else None
-        if isinstance(last_updated_at, str):
-            try:
-                last_updated_at = datetime.fromisoformat(last_updated_at.replace("Z", "+00:00"))
-            except Exception:
-                last_updated_at = None
-        if isinstance(last_updated_at, datetime):
-            now = datetime.now(last_updated_at.tzinfo) if last_updated_at.tzinfo else datetime.now()
-            # 09:00 / 21:00 两次调度避免同日重复抓取同一番剧
-            if now.date() == last_updated_at.date():
-                return False, "already_crawled_today"
-
-        today = date.today()
-        today_weekday = (today.weekday() + 1) % 7
-        if isinstance(weekday, int):
-            # Bangumi 周更为主：默认只在更新日当天和次日窗口抓取
-            allowed_weekdays = {today_weekday, (today_weekday - 1) % 7}
-            if weekday not in allowed_weekdays:
-                return False, "outside_update_window"
-        elif isinstance(last_updated_at, datetime):
-            now = datetime.now(last_updated_at.tzinfo) if last_updated_at.tzinfo else datetime.now()
-            # 未识别 weekday 时，至少间隔 3 天再补抓
-            if (now - last_updated_at).days < 3:
-                return False, "unknown_weekday_cooldown"
-
-        sunday_offset = (today.weekday() + 1) % 7
-        week_start = today - timedelta(days=sunday_offset)
-        week_end = week_start + timedelta(days=6)
-        cal_row = fetch_one(
-            conn,
-            "SELECT COUNT(1) AS cnt FROM anime_airing_calendar "
-            "WHERE anime_id = :aid AND episode_no IS NOT NULL "
-            "AND air_date BETWEEN :start AND :end",
-            {"aid": anime_id, "start": week_start.isoformat(), "end": week_end.isoformat()},
-        )
-        if cal_row and cal_row.get("cnt", 0) > 0:
-            return False, "episode_known_this_week"
-        return True, "need_refresh"
+
+def _process_subject(plan: CrawlPlan) -> SubjectOutcome:
+    subject_id = plan.subject_id
+    outcome = SubjectOutcome(subject_id=subject_id)
+    try:
+        if plan.crawl_detail:
+            outcome.apply_detail_status(crawl_bangumi_subject(subject_id))
+        else:
+            outcome.detail_skipped = True
+
+        if plan.crawl_episodes:
+            outcome.apply_episode_status(crawl_bangumi_episodes(subject_id))
+        else:
+            outcome.episode_skip_reason = plan.episode_reason
+            logger.info("【章节】跳过：subject_id=%s reason=%s", subject_id, plan.episode_reason)
+    except Exception as exc:
+        outcome.error = exc
+        logger.exception("【调度】处理 subject_id=%s 失败：%s", subject_id, exc)
+    return outcome
+
+
+def _iter_subject_outcomes(subject_ids: list[int], workers: int) -> Iterator[SubjectOutcome]:
+    try:
+        plans = list(plan_crawl(subject_ids).values())
+    except Exception as exc:
+        logger.exception("【调度】生成抓取计划失败：%s", exc)
+        for sid in subject_ids:
+            yield SubjectOutcome(subject_id=sid, error=exc)
+        return
+
+    if workers <= 1 or len(plans) <= 1:
+        for plan in plans:
+            yield _process_subject(plan)
+        return
+
+    # 同一 host 的并发由 http_client 的礼貌限流控制，这里只限制总并发
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(plans)),
+        thread_name_prefix="anime-crawler",
+    ) as executor:
+        yield from executor.map(_process_subject, plans)
 
 
 def run_crawler_once(
-    run_type: CrawlerRunType = "scheduled", command: str | None = None
+    run_type: CrawlerRunType = "scheduled",
+    command: str | None = None,
+    workers: int | None = None,
+    engine: CrawlerEngine | None = None,
 ) -> None:
     started_at = datetime.now(timezone.utc)
+    worker_count = workers if workers and workers > 0 else CRAWLER_WORKERS
+    engine_name = engine or CRAWLER_ENGINE
+    if engine_name not in ("sync", "async"):
+        logger.warning("【调度】未知抓取引擎 %s，回退为 sync", engine_name)
+        engine_name = "sync"
     _ensure_run_log_dir()
     log_path, log_file = _build_run_log_path(started_at)
     file_handler = _attach_run_file_handler(log_file)
+    reset_http_cache_stats()
     run_id = _insert_run_log_row(
         log_path=log_path,
         run_type=run_type,
@@ -331,50 +320,68 @@ def run_crawler_once(
     subject_ids: list[int] = []
     detail_crawled = 0
     detail_skipped = 0
+    detail_not_modified = 0
+    detail_unchanged = 0
     episode_crawled = 0
     episode_skipped = 0
+    episode_not_modified = 0
+    episode_unchanged = 0
     subject_failed = 0
     skip_reason_counter: Counter[str] = Counter()
     errors: list[str] = []
     run_failed = False
 
     logger.info(
-        "【调度】开始执行一次爬取任务 run_type=%s log_path=%s run_id=%s",
+        "【调度】开始执行一次爬取任务 run_type=%s log_path=%s run_id=%s engine=%s workers=%s",
         run_type,
         log_path,
         run_id or "N/A",
+        engine_name,
+        worker_count,
     )
     try:
-        try:
-            subject_ids = crawl_bangumi_calendar()
-        except Exception as exc:
-            run_failed = True
-            errors.append(f"calendar_failed: {exc}")
-            logger.exception("【调度】日历爬取失败：%s", exc)
-            subject_ids = []
-
-        for sid in subject_ids:
+        outcomes: Iterable[SubjectOutcome]
+        if engine_name == "async":
+            async_result = run_async_crawl()
+            subject_ids = async_result.subject_ids
+            outcomes = async_result.outcomes
+            if async_result.calendar_error is not None:
+                run_failed = True
+                errors.append(f"calendar_failed: {async_result.calendar_error}")
+        else:
             try:
-                if _should_crawl_detail(sid):
-                    crawl_bangumi_subject(sid)
-                    detail_crawled += 1
-                else:
-                    detail_skipped += 1
-
-                should_crawl_episodes, reason = _should_crawl_episodes(sid)
-                if should_crawl_episodes:
-                    crawl_bangumi_episodes(sid)
-                    episode_crawled += 1
-                else:
-                    episode_skipped += 1
-                    skip_reason_counter[reason] += 1
-                    logger.info("【章节】跳过：subject_id=%s reason=%s", sid, reason)
+                subject_ids = crawl_bangumi_calendar()
             except Exception as exc:
+                run_failed = True
+                errors.append(f"calendar_failed: {exc}")
+                logger.exception("【调度】日历爬取失败：%s", exc)
+                subject_ids = []
+            outcomes = _iter_subject_outcomes(subject_ids, worker_count)
+
+        # 计数统一在调度线程中汇总，并发模式下无需加锁
+        for outcome in outcomes:
+            if outcome.detail_crawled:
+                detail_crawled += 1
+            elif outcome.detail_not_modified:
+                detail_not_modified += 1
+            elif outcome.detail_unchanged:
+                detail_unchanged += 1
+            elif outcome.detail_skipped:
+                detail_skipped += 1
+            if outcome.episode_crawled:
+                episode_crawled += 1
+            elif outcome.episode_not_modified:
+                episode_not_modified += 1
+            elif outcome.episode_unchanged:
+                episode_unchanged += 1
+            elif outcome.episode_skip_reason:
+                episode_skipped += 1
+                skip_reason_counter[outcome.episode_skip_reason] += 1
+            if outcome.error is not None:
                 run_failed = True
                 subject_failed += 1
                 if len(errors) < 5:
-                    errors.append(f"subject_id={sid}: {exc}")
-                logger.exception("【调度】处理 subject_id=%s 失败：%s", sid, exc)
+                    errors.append(f"subject_id={outcome.subject_id}: {outcome.error}")
     finally:
         finished_at = datetime.now(timezone.utc)
         duration_ms = max(
@@ -386,12 +393,19 @@ def run_crawler_once(
         )
         status_cn = "失败" if status == "failed" else "成功"
         skip_reason_text = _format_skip_reason_counter(skip_reason_counter)
+        connection_text = format_connection_stats()
+        http_cache_text = format_http_cache_stats()
+        # 连接池只在单次运行内复用，两次调度间隔 12 小时，keep-alive 早已失效
+        close_session()
         summary = (
             f"番剧总数={len(subject_ids)}；"
-            f"详情抓取={detail_crawled}，详情跳过={detail_skipped}；"
-            f"章节抓取={episode_crawled}，章节跳过={episode_skipped}；"
+            f"详情抓取={detail_crawled}，详情未变更={detail_not_modified}，详情跳过={detail_skipped}；"
+            f"章节抓取={episode_crawled}，章节未变更={episode_not_modified}，章节跳过={episode_skipped}；"
+            f"内容未变跳过写入=详情{detail_unchanged}/章节{episode_unchanged}；"
             f"处理失败={subject_failed}；"
-            f"章节跳过原因={skip_reason_text}"
+            f"章节跳过原因={skip_reason_text}；"
+            f"条件请求={http_cache_text}；"
+            f"连接复用={connection_text}"
         )
         error_message = "; ".join(errors) if errors else None
 
@@ -412,6 +426,7 @@ def run_crawler_once(
         crawler_root_logger = logging.getLogger("app.services.anime_crawler")
         crawler_root_logger.removeHandler(file_handler)
         file_handler.close()
+        _notify_crawl_complete()
         _cleanup_old_run_logs(crawler_name="anime_guide", retention_days=LOG_RETENTION_DAYS)
 
 
@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+# 新番爬虫相关的环境变量统一在此读取，其余模块只引用常量。
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value >= minimum else default
+
+
+def _env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+    return value if value >= minimum else default
+
+
+# HTTP 连接池：缓存的 host 连接池数量 / 每个 host 保持的 keep-alive 连接数
+HTTP_POOL_CONNECTIONS = _env_int("BANGUMI_HTTP_POOL_CONNECTIONS", 4)
+HTTP_POOL_MAXSIZE = _env_int("BANGUMI_HTTP_POOL_MAXSIZE", 10)
+
+# 礼貌抓取：同一 host 最多同时进行的请求数，以及相邻两次请求的最小间隔（秒）
+HTTP_PER_HOST_LIMIT = _env_int("BANGUMI_HTTP_PER_HOST_LIMIT", 2)
+HTTP_MIN_INTERVAL_SECONDS = _env_float("BANGUMI_HTTP_MIN_INTERVAL_SECONDS", 0.0)
+
+# 详情/章节抓取并发数，1 表示按顺序逐个处理
+CRAWLER_WORKERS = _env_int("ANIME_CRAWLER_WORKERS", 1)
+
+# 抓取引擎：sync = requests + 线程池；async = httpx.AsyncClient 单线程事件循环
+CRAWLER_ENGINE = os.getenv("ANIME_CRAWLER_ENGINE", "sync").strip().lower() or "sync"
+
+# async 引擎：最大在途请求数 / 令牌桶速率（次/秒）与桶容量
+ASYNC_CONCURRENCY = _env_int("BANGUMI_ASYNC_CONCURRENCY", 8)
+ASYNC_RATE_PER_SECOND = _env_float("BANGUMI_ASYNC_RATE_PER_SECOND", 10.0, minimum=0.1)
+ASYNC_BURST = _env_int("BANGUMI_ASYNC_BURST", 10)
+
+# 条件请求缓存（ETag / Last-Modified），默认放在挂载的 logs 目录下以便容器重建后保留
+HTTP_CACHE_ENABLED = os.getenv("BANGUMI_HTTP_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+HTTP_CACHE_DIR = Path(
+    os.getenv("BANGUMI_HTTP_CACHE_DIR")
+    or Path(__file__).resolve().parents[3] / "logs" / "anime_crawler_http_cache"
+)
+
+# HTML 解析后端：auto / html.parser / lxml / selectolax（selectolax 先裁剪出目标节点再交给 BeautifulSoup）
+HTML_PARSER = os.getenv("BANGUMI_HTML_PARSER", "auto").strip().lower() or "auto"
+
+# Bangumi 站点地址：基准测试时指向本地 fixture 服务器，生产环境保持默认
+BASE_URL = (os.getenv("BANGUMI_BASE_URL") or "https://bangumi.tv").rstrip("/")
+FALLBACK_BASE_URL = (os.getenv("BANGUMI_FALLBACK_BASE_URL") or "https://bgm.tv").rstrip("/")
@@ -1,52 +1,33 @@
 import logging
-import os
 import re
 from datetime import datetime
 
-import requests
 from bs4 import BeautifulSoup
 from sqlalchemy import text
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
-from .db import get_conn
+from .content_hash import compute_content_hash
+from .db import fetch_one, get_conn
+from .html_parser import make_soup
+from .http_cache import remember
+from .http_client import fetch_page
+from .outcome import WriteStatus
+from .settings import BASE_URL
 
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://bangumi.tv"
+# 内容未变化或 304 时只刷新抓取时间（不动 updated_at），调度据此判断详情刷新窗口
+TOUCH_SUBJECT_SQL = (
+    "UPDATE anime SET last_crawled_at = :last_crawled_at WHERE bgm_subject_id = :bgm_subject_id"
+)
 
-
-def _build_session() -> requests.Session:
-    session = requests.Session()
-    session.trust_env = False
-    verify_env = os.getenv("BANGUMI_SSL_VERIFY", "1").lower()
-    if verify_env in ("0", "false", "no"):
-        session.verify = False
-    ca_bundle = os.getenv("BANGUMI_CA_BUNDLE")
-    if ca_bundle:
-        session.verify = ca_bundle
-
-    retries = Retry(
-        total=3,
-        backoff_factor=0.5,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
-    )
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    return session
-
-
-def _get_html(url: str) -> str:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; galileocat-webtool/1.0; +https://bangumi.tv)",
-        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-    }
-    session = _build_session()
-    resp = session.get(url, headers=headers, timeout=20)
-    resp.raise_for_status()
-    return resp.content.decode("utf-8", errors="ignore")
+SUBJECT_KEEP_SELECTORS = (
+    "#infobox",
+    "#subject_summary",
+    ".global_score",
+    "#panelInterest",
+    '[property="v:votes"]',
+    "#ChartWarpper",
+)
 
 
 def _parse_infobox(soup: BeautifulSoup) -> dict:
@@ -77,12 +58,8 @@ def _normalize_date(value: str | None) -> str | None:
     return None
 
 
-def crawl_bangumi_subject(subject_id: int) -> None:
-    url = f"{BASE_URL}/subject/{subject_id}"
-    logger.info("【详情】开始爬取：%s", url)
-
-    html = _get_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def parse_subject(html: str, subject_id: int) -> dict:
+    soup = make_soup(html, SUBJECT_KEEP_SELECTORS)
     info = _parse_infobox(soup)
 
     title_zh = info.get("中文名") or info.get("中文")
@@ -141,8 +118,25 @@ def crawl_bangumi_subject(subject_id: int) -> None:
         "rating_count": rating_count,
         "last_crawled_at": datetime.utcnow().isoformat(),
     }
+    return payload
 
+
+def save_subject(payload: dict) -> WriteStatus:
+    # last_crawled_at 每次都会变化，不参与内容哈希
+    content_hash = compute_content_hash(
+        {key: value for key, value in payload.items() if key != "last_crawled_at"}
+    )
     with get_conn() as conn:
+        row = fetch_one(
+            conn,
+            "SELECT detail_content_hash FROM anime WHERE bgm_subject_id = :sid LIMIT 1",
+            {"sid": payload["bgm_subject_id"]},
+        )
+        if row and row.get("detail_content_hash") == content_hash:
+            conn.execute(text(TOUCH_SUBJECT_SQL), payload)
+            logger.info("【详情】内容未变化，跳过写入：subject_id=%s", payload["bgm_subject_id"])
+            return "unchanged"
+
         conn.execute(
             text(
                 "UPDATE anime\n"
@@ -153,11 +147,34 @@ def crawl_bangumi_subject(subject_id: int) -> None:
                 "    total_episodes = COALESCE(:total_episodes, total_episodes),\n"
                 "    rating = COALESCE(:rating, rating),\n"
                 "    rating_count = COALESCE(:rating_count, rating_count),\n"
+                "    detail_content_hash = :detail_content_hash,\n"
                 "    last_crawled_at = :last_crawled_at,\n"
                 "    updated_at = NOW()\n"
                 "WHERE bgm_subject_id = :bgm_subject_id\n"
             ),
-            payload,
+            {**payload, "detail_content_hash": content_hash},
         )
 
-    logger.info("【详情】更新完成：subject_id=%s", subject_id)
+    logger.info("【详情】更新完成：subject_id=%s", payload["bgm_subject_id"])
+    return "updated"
+
+
+def mark_subject_crawled(subject_id: int) -> WriteStatus:
+    with get_conn() as conn:
+        conn.execute(
+            text(TOUCH_SUBJECT_SQL),
+            {"bgm_subject_id": subject_id, "last_crawled_at": datetime.utcnow().isoformat()},
+        )
+    logger.info("【详情】页面未变更（304），跳过写入：subject_id=%s", subject_id)
+    return "not_modified"
+
+
+def crawl_bangumi_subject(subject_id: int) -> WriteStatus:
+    url = f"{BASE_URL}/subject/{subject_id}"
+    logger.info("【详情】开始爬取：%s", url)
+    page = fetch_page(url)
+    if page.not_modified:
+        return mark_subject_crawled(subject_id)
+    status = save_subject(parse_subject(page.html or "", subject_id))
+    remember(page)
+    return status
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.services.anime_crawler.batch_writer import BatchUpsert
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (key INTEGER PRIMARY KEY, name TEXT, score INTEGER)"))
+    return engine
+
+
+@pytest.fixture
+def statements(sqlite_engine) -> list[str]:
+    # 记录之后执行的 INSERT，用来确认每批只发一条语句
+    recorded: list[str] = []
+
+    @event.listens_for(sqlite_engine, "before_cursor_execute")
+    def _record(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        if statement.lstrip().startswith("INSERT"):
+            recorded.append(statement)
+
+    return recorded
+
+
+def _upsert(page_size: int = 500, returning: str | None = None) -> BatchUpsert:
+    return BatchUpsert(
+        "item",
+        ["key", "name", "score"],
+        ["key"],
+        "name = EXCLUDED.name,\n    score = EXCLUDED.score",
+        returning=returning,
+        page_size=page_size,
+    )
+
+
+def _rows(engine) -> list[tuple]:
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text("SELECT key, name, score FROM item ORDER BY key"))]
+
+
+def test_duplicate_keys_keep_last_row(sqlite_engine, statements):
+    upsert = _upsert()
+    upsert.add({"key": 1, "name": "a", "score": 1})
+    upsert.add({"key": 2, "name": "b", "score": 2})
+    upsert.add({"key": 1, "name": "a2", "score": 3})
+    assert len(upsert) == 2
+
+    with sqlite_engine.begin() as conn:
+        upsert.flush(conn)
+    assert _rows(sqlite_engine) == [(1, "a2", 3), (2, "b", 2)]
+    assert len(statements) == 1
+    assert len(upsert) == 0
+
+
+def test_flush_pages_rows_and_collects_returning(sqlite_engine, statements):
+    with sqlite_engine.begin() as conn:
+        conn.execute(text("INSERT INTO item (key, name, score) VALUES (3, 'old', 0)"))
+    statements.clear()
+
+    upsert = _upsert(page_size=2, returning="key, name")
+    for key in range(1, 6):
+        # 缺失的列按 None 写入
+        upsert.add({"key": key, "name": f"n{key}"})
+    with sqlite_engine.begin() as conn:
+        returned = upsert.flush(conn)
+
+    assert len(statements) == 3
+    assert sorted((row["key"], row["name"]) for row in returned) == [(key, f"n{key}") for key in range(1, 6)]
+    assert _rows(sqlite_engine) == [(key, f"n{key}", None) for key in range(1, 6)]
+
+
+def test_flush_without_rows_executes_nothing(sqlite_engine, statements):
+    with sqlite_engine.begin() as conn:
+        assert _upsert().flush(conn) == []
+    assert statements == []
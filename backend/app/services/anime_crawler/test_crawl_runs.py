@@ -0,0 +1,174 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.api import anime_guide  # noqa: F401  导入时注册爬虫完成回调（生成快照、清空缓存）
+from app.services import anime_guide_snapshot
+from app.services.anime_crawler import http_cache
+from app.services.anime_crawler.calendar import week_start_of
+from app.services.anime_crawler.conftest import reset_crawl_state, run_crawl, subject_ids
+from app.services.anime_crawler.planner import plan_crawl
+
+
+def _age_crawl_stamps(engine, days: int) -> None:
+    stamp = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE anime SET last_crawled_at = :stamp, episodes_crawled_at = :stamp"),
+            {"stamp": stamp},
+        )
+
+
+@pytest.mark.parametrize("engine_name", ["sync", "async"])
+@pytest.mark.parametrize(
+    ("cache_enabled", "label"),
+    # 关闭条件请求缓存时第二次运行拿到完整页面，走内容哈希未变化分支；开启时走 304 分支
+    [(False, "内容未变跳过写入=详情{detail}/章节{episode}"), (True, "详情未变更={detail}")],
+)
+def test_unchanged_recrawl_refreshes_crawl_stamps(
+    crawler_db, monkeypatch, engine_name, cache_enabled, label
+):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", cache_enabled)
+    status, _ = run_crawl(engine_name)
+    assert status == "success"
+    sids = subject_ids(crawler_db)
+    assert sids
+
+    _age_crawl_stamps(crawler_db, days=8)
+    before = plan_crawl(sids)
+    assert all(plan.crawl_detail for plan in before.values())
+    episode_sids = [sid for sid, plan in before.items() if plan.crawl_episodes]
+    assert episode_sids
+
+    status, summary = run_crawl(engine_name)
+    assert status == "success"
+    assert label.format(detail=len(sids), episode=len(episode_sids)) in summary
+    if cache_enabled:
+        assert f"章节未变更={len(episode_sids)}" in summary
+
+    # 内容未变也刷新了抓取时间：下一次运行不再重复抓取
+    after = plan_crawl(sids)
+    assert not any(plan.crawl_detail for plan in after.values())
+    assert all(after[sid].episode_reason == "already_crawled_today" for sid in episode_sids)
+
+
+
+def test_crawl_writes_anime_guide_snapshot(crawler_db):
+    status, _ = run_crawl()
+    assert status == "success"
+
+    # 爬虫结束回调生成快照；生成失败时只记日志并清空目录，这里确认确实写出
+    manifest = json.loads((anime_guide_snapshot.SNAPSHOT_DIR / anime_guide_snapshot.MANIFEST_NAME).read_text())
+    assert manifest["generation"] == anime_guide_snapshot.read_generation()
+    key = anime_guide_snapshot.snapshot_key
+    crawl_status = anime_guide_snapshot.read_snapshot(key("crawl-status", ()))
+    assert crawl_status["lastCrawledAt"]
+    sid = subject_ids(crawler_db)[0]
+    detail = anime_guide_snapshot.read_snapshot(key("detail", (sid,)))
+    assert detail["detail"]["id"] == str(sid)
+    assert detail["detail"]["startDate"]
+
+
+def test_snapshot_week_matches_crawled_air_dates(crawler_db):
+    status, _ = run_crawl()
+    assert status == "success"
+    # 每日放送表写入的本周放送日（章节页写入的历史放送日不在这个窗口内）
+    today = date.today()
+    with crawler_db.connect() as conn:
+        air_dates = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT DISTINCT air_date FROM anime_airing_calendar WHERE air_date BETWEEN :s AND :e"),
+                {"s": (today - timedelta(days=6)).isoformat(), "e": (today + timedelta(days=6)).isoformat()},
+            )
+        }
+    assert len(air_dates) > 1
+
+    week_start = week_start_of(today)
+    key = anime_guide_snapshot.snapshot_key
+    week = anime_guide_snapshot.read_snapshot(
+        key("updates-range", (week_start.isoformat(), (week_start + timedelta(days=6)).isoformat()))
+    )
+    assert week is not None
+    # 爬虫写入的放送日全部落在快照的本周区间内，逐日快照都有内容
+    assert air_dates <= {day["date"] for day in week["days"]}
+    for air_date in air_dates:
+        assert anime_guide_snapshot.read_snapshot(key("updates", (air_date,)))["items"]
+
+
+def _table_state(engine) -> dict[str, list[tuple]]:
+    # 只比较抓取内容，忽略主键与时间戳
+    queries = {
+        "anime": (
+            "SELECT bgm_subject_id, title, title_zh, start_date, weekday, total_episodes, rating,"
+            " rating_count, cover_image_url, detail_content_hash, episode_content_hash,"
+            " latest_episode_no, episode_count FROM anime ORDER BY bgm_subject_id"
+        ),
+        "anime_episode": (
+            "SELECT a.bgm_subject_id, e.episode_no, e.title, e.air_date FROM anime_episode e"
+            " JOIN anime a ON a.id = e.anime_id ORDER BY a.bgm_subject_id, e.episode_no"
+        ),
+        "anime_airing_calendar": (
+            "SELECT a.bgm_subject_id, c.air_date, c.weekday, c.episode_no FROM anime_airing_calendar c"
+            " JOIN anime a ON a.id = c.anime_id ORDER BY a.bgm_subject_id, c.air_date"
+        ),
+    }
+    with engine.connect() as conn:
+        return {table: [tuple(row) for row in conn.execute(text(sql))] for table, sql in queries.items()}
+
+
+def test_worker_pool_and_async_engine_match_sequential_crawl(crawler_db, engine):
+    states = {}
+    for engine_name, workers in [("sync", 1), ("sync", 4), ("async", None)]:
+        # 每种配置都从空库开始
+        reset_crawl_state(engine)
+        status, summary = run_crawl(engine_name, workers=workers)
+        assert status == "success", summary
+        assert "处理失败=0" in summary
+        states[(engine_name, workers)] = _table_state(engine)
+
+    sequential = states[("sync", 1)]
+    assert sequential["anime"] and sequential["anime_episode"] and sequential["anime_airing_calendar"]
+    for key, state in states.items():
+        assert state == sequential, key
+
+
+def test_changed_subject_page_is_rewritten(crawler_db, fixture_server, monkeypatch):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", False)
+    status, _ = run_crawl()
+    assert status == "success"
+    sids = subject_ids(crawler_db)
+    changed = sids[0]
+
+    # 语料只录制了一份详情页，所有番剧都回退到它；只给第一个番剧换上改过评分的页面
+    body = fixture_server.corpus.subjects[400602]
+    monkeypatch.setitem(
+        fixture_server.corpus.subjects, changed, body.replace(b">8.9</span>", b">9.1</span>")
+    )
+    _age_crawl_stamps(crawler_db, days=8)
+    status, summary = run_crawl()
+    assert status == "success"
+    assert f"内容未变跳过写入=详情{len(sids) - 1}/" in summary
+    with crawler_db.connect() as conn:
+        rating = conn.execute(
+            text("SELECT rating FROM anime WHERE bgm_subject_id = :sid"), {"sid": changed}
+        ).scalar_one()
+    assert rating == 9.1
+
+
+def test_crawl_run_invalidates_anime_guide_cache(crawler_db):
+    from app.services import anime_guide_cache
+
+    loads = []
+
+    def _loader():
+        loads.append(1)
+        return {"items": len(loads)}
+
+    assert anime_guide_cache.get_or_load("weekday", (1,), _loader) == {"items": 1}
+    assert anime_guide_cache.get_or_load("weekday", (1,), _loader) == {"items": 1}
+    status, _ = run_crawl()
+    assert status == "success"
+    assert anime_guide_cache.get_or_load("weekday", (1,), _loader) == {"items": 2}
@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.services.anime_crawler.planner import _decide_detail, _decide_episodes
+
+# 2026-10-18 是周日（weekday 映射为 0）
+TODAY = date(2026, 10, 18)
+
+
+def _ago(**kwargs) -> str:
+    return (datetime.now(timezone.utc) - timedelta(**kwargs)).isoformat()
+
+
+@pytest.mark.parametrize(
+    ("row", "expected"),
+    [
+        (None, True),
+        ({"last_crawled_at": None}, True),
+        ({"last_crawled_at": "not-a-date"}, True),
+        ({"last_crawled_at": _ago(days=8)}, True),
+        ({"last_crawled_at": _ago(days=1)}, False),
+        ({"last_crawled_at": datetime.now() - timedelta(days=3)}, False),
+    ],
+)
+def test_decide_detail(row, expected):
+    assert _decide_detail(row, threshold_days=7) is expected
+
+
+def _episode_row(**overrides) -> dict:
+    row = {
+        "weekday": 0,
+        "episode_count": 12,
+        "episodes_crawled_at": _ago(days=2),
+        "week_episode_count": 0,
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.parametrize(
+    ("row", "expected"),
+    [
+        (None, (True, "anime_not_found")),
+        (_episode_row(episode_count=0), (True, "no_episode_data")),
+        (_episode_row(episodes_crawled_at=_ago(seconds=1)), (False, "already_crawled_today")),
+        (_episode_row(weekday=3), (False, "outside_update_window")),
+        # 更新日次日仍在窗口内
+        (_episode_row(weekday=6), (True, "need_refresh")),
+        (_episode_row(weekday=None, episodes_crawled_at=_ago(days=2)), (False, "unknown_weekday_cooldown")),
+        (_episode_row(weekday=None, episodes_crawled_at=_ago(days=4)), (True, "need_refresh")),
+        (_episode_row(week_episode_count=1), (False, "episode_known_this_week")),
+        (_episode_row(), (True, "need_refresh")),
+    ],
+)
+def test_decide_episodes(row, expected):
+    assert _decide_episodes(row, TODAY) == expected
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.core.config import ANIME_GUIDE_CACHE_MAX_ENTRIES, ANIME_GUIDE_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 新番导视只读接口的进程内响应缓存：按 (接口, 参数) 缓存，TTL 过期 + LRU 限制条目数。
+# 数据只在爬虫运行结束后变化，爬虫完成时整体清空（见 scheduler.add_crawl_complete_hook）。
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expire_at: float
+
+
+_LOCK = threading.Lock()
+_ENTRIES: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+_STATS = {"hit": 0, "miss": 0, "evicted": 0}
+# 每次清空递增；加载期间发生过清空的结果不再写入，避免爬虫结束前读到的旧数据被缓存
+_EPOCH = 0
+
+
+def _now() -> float:
+    return time.monotonic()
+
+
+_MISS = object()
+
+
+def _lookup(key: tuple) -> tuple[Any, int]:
+    now = _now()
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry and entry.expire_at > now:
+            _ENTRIES.move_to_end(key)
+            _STATS["hit"] += 1
+            return entry.value, _EPOCH
+        if entry:
+            _ENTRIES.pop(key, None)
+        _STATS["miss"] += 1
+        return _MISS, _EPOCH
+
+
+def _store(key: tuple, value: Any, epoch: int) -> None:
+    with _LOCK:
+        if epoch != _EPOCH:
+            return
+        _ENTRIES[key] = _CacheEntry(value=value, expire_at=_now() + ANIME_GUIDE_CACHE_TTL_SECONDS)
+        _ENTRIES.move_to_end(key)
+        while len(_ENTRIES) > ANIME_GUIDE_CACHE_MAX_ENTRIES:
+            _ENTRIES.popitem(last=False)
+            _STATS["evicted"] += 1
+
+
+def get_or_load(endpoint: str, params: tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+    if ANIME_GUIDE_CACHE_TTL_SECONDS <= 0:
+        return loader()
+
+    key = (endpoint, params)
+    value, epoch = _lookup(key)
+    if value is not _MISS:
+        return value
+    # 查询在锁外执行；并发未命中时允许重复查询，结果以后写入者为准
+    value = loader()
+    _store(key, value, epoch)
+    return value
+
+
+async def get_or_load_async(
+    endpoint: str, params: tuple[Hashable, ...], loader: Callable[[], Awaitable[Any]]
+) -> Any:
+    # async 接口使用：锁只保护字典操作，不跨 await 持有
+    if ANIME_GUIDE_CACHE_TTL_SECONDS <= 0:
+        return await loader()
+
+    key = (endpoint, params)
+    value, epoch = _lookup(key)
+    if value is not _MISS:
+        return value
+    value = await loader()
+    _store(key, value, epoch)
+    return value
+
+
+def invalidate() -> None:
+    global _EPOCH
+    with _LOCK:
+        _EPOCH += 1
+        cleared = len(_ENTRIES)
+        _ENTRIES.clear()
+        stats = dict(_STATS)
+    logger.info(
+        "【缓存】新番导视缓存已清空：条目=%s，累计命中=%s，未命中=%s，淘汰=%s",
+        cleared,
+        stats["hit"],
+        stats["miss"],
+        stats["evicted"],
+    )
+
+
+def get_stats() -> dict[str, int]:
+    with _LOCK:
+        return {**_STATS, "entries": len(_ENTRIES)}
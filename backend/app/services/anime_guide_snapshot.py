@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Hashable
+
+from app.core.config import ANIME_GUIDE_SNAPSHOT_DIR, ANIME_GUIDE_SNAPSHOT_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# 新番导视静态快照：爬虫结束时把只读接口的响应预先渲染为 gzip JSON，
+# 接口按 (接口, 参数) 直接读文件，不访问数据库；文件不存在时由调用方回退实时查询。
+#
+# 目录结构：
+#   manifest.json                     -> 生成时间、数据版本（ETag）、文件数
+#   <endpoint>/<params>.json.gz       -> 例如 weekday/3.json.gz、detail/400602.json.gz
+#   <endpoint>.json.gz                -> 无参数接口，例如 crawl-status.json.gz
+
+SNAPSHOT_DIR = Path(
+    ANIME_GUIDE_SNAPSHOT_DIR
+    or Path(__file__).resolve().parents[2] / "logs" / "anime_guide_snapshot"
+)
+MANIFEST_NAME = "manifest.json"
+
+# 参数来自查询字符串，只允许安全字符，避免拼出目录穿越路径
+_SAFE_KEY = re.compile(r"^[a-z][a-z-]*(/[0-9A-Za-z_-]+)?$")
+
+
+def snapshot_key(endpoint: str, params: tuple[Hashable, ...]) -> str:
+    if not params:
+        return endpoint
+    return f"{endpoint}/{'_'.join(str(param) for param in params)}"
+
+
+def _snapshot_path(root: Path, key: str) -> Path:
+    return root / f"{key}.json.gz"
+
+
+def read_snapshot(key: str) -> Any | None:
+    if not ANIME_GUIDE_SNAPSHOT_ENABLED or not _SAFE_KEY.match(key):
+        return None
+    path = _snapshot_path(SNAPSHOT_DIR, key)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("【快照】读取失败 key=%s err=%s", key, exc)
+        return None
+
+
+def read_generation() -> str | None:
+    if not ANIME_GUIDE_SNAPSHOT_ENABLED:
+        return None
+    try:
+        with (SNAPSHOT_DIR / MANIFEST_NAME).open("r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("【快照】读取清单失败 err=%s", exc)
+        return None
+    return manifest.get("generation") or None
+
+
+def write_snapshots(payloads: dict[str, Any], generation: str) -> Path | None:
+    if not ANIME_GUIDE_SNAPSHOT_ENABLED:
+        return None
+
+    # 先写到临时目录再整体替换，读取方不会看到新旧混杂的快照；
+    # 替换瞬间文件缺失的请求会回退实时查询
+    staging = SNAPSHOT_DIR.with_name(f"{SNAPSHOT_DIR.name}.tmp-{os.getpid()}")
+    previous = SNAPSHOT_DIR.with_name(f"{SNAPSHOT_DIR.name}.old-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    written = 0
+    total_bytes = 0
+    for key, payload in payloads.items():
+        if not _SAFE_KEY.match(key):
+            logger.warning("【快照】跳过非法 key=%s", key)
+            continue
+        path = _snapshot_path(staging, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with gzip.open(path, "wb", compresslevel=6) as file:
+            file.write(data)
+        written += 1
+        total_bytes += path.stat().st_size
+
+    manifest = {
+        "generation": generation,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "files": written,
+    }
+    with (staging / MANIFEST_NAME).open("w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False)
+
+    if SNAPSHOT_DIR.exists():
+        shutil.rmtree(previous, ignore_errors=True)
+        SNAPSHOT_DIR.rename(previous)
+    staging.rename(SNAPSHOT_DIR)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    logger.info(
+        "【快照】新番导视快照已生成：文件=%s，压缩后=%sKB，目录=%s",
+        written,
+        total_bytes // 1024,
+        SNAPSHOT_DIR,
+    )
+    return SNAPSHOT_DIR
+
+
+def clear() -> None:
+    # 快照生成失败时删除旧快照，避免继续提供与数据库不一致的内容
+    shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
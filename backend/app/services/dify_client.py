@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import requests
+from fastapi import HTTPException, status
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import (
+    DIFY_HTTP_CONNECT_TIMEOUT_SECONDS,
+    DIFY_HTTP_POOL_MAXSIZE,
+    DIFY_HTTP_READ_TIMEOUT_SECONDS,
+    DIFY_HTTP_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Dify API 共享客户端：每个 base URL 一个 requests.Session（keep-alive 连接池），
+# 只对幂等的 GET 做有限重试（连接错误 / 429 / 502 / 503 / 504，遵循 Retry-After），
+# 并按工作流统计请求数、失败数与耗时，按 base URL 统计连接复用情况（/health/dify）。
+
+
+@dataclass
+class _WorkflowStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_status: int | None = None
+    last_error: str | None = None
+    by_path: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+# 异常信息中的完整 URL 与查询串（含 user 等参数）不进入统计与日志
+_URL_PATTERN = re.compile(r"https?://[^\s'\"]+")
+_QUERY_PATTERN = re.compile(r"\?[^\s'\")]*")
+
+_lock = threading.Lock()
+_sessions: dict[str, requests.Session] = {}
+_pools: dict[str, list[Any]] = defaultdict(list)
+_stats: dict[str, _WorkflowStats] = defaultdict(_WorkflowStats)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    retries = Retry(
+        total=DIFY_HTTP_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        # 重试用尽后返回最后一次响应，由调用方按状态码报错
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DIFY_HTTP_POOL_MAXSIZE, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _get_session(base_url: str) -> requests.Session:
+    with _lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = _build_session()
+            _sessions[base_url] = session
+        return session
+
+
+def _redact(message: str) -> str:
+    return _QUERY_PATTERN.sub("", _URL_PATTERN.sub("<url>", message))
+
+
+def _record(
+    workflow_id: str,
+    base_url: str,
+    path: str,
+    elapsed_ms: float,
+    response: requests.Response | None,
+    error: str | None,
+) -> None:
+    pool = getattr(getattr(response, "raw", None), "_pool", None)
+    retry_history = getattr(getattr(getattr(response, "raw", None), "retries", None), "history", ()) or ()
+    with _lock:
+        stats = _stats[workflow_id]
+        stats.requests += 1
+        stats.by_path[path] += 1
+        stats.retries += len(retry_history)
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.last_status = response.status_code if response is not None else None
+        if error:
+            stats.errors += 1
+            stats.last_error = error
+        if pool is not None and all(item is not pool for item in _pools[base_url]):
+            _pools[base_url].append(pool)
+
+
+def get_json(
+    base_url: str,
+    api_key: str,
+    path: str,
+    params: dict[str, Any],
+    workflow_id: Any = "",
+) -> dict:
+    # 失败统一转为 502，detail 与接口原有报错保持一致
+    base_url = base_url.rstrip("/")
+    started_at = time.perf_counter()
+    response: requests.Response | None = None
+    error: str | None = None
+    try:
+        try:
+            response = _get_session(base_url).get(
+                f"{base_url}{path}",
+                headers={"Authorization": f"Bearer {api_key}"},
+                params=params,
+                timeout=(DIFY_HTTP_CONNECT_TIMEOUT_SECONDS, DIFY_HTTP_READ_TIMEOUT_SECONDS),
+            )
+        except requests.RequestException as exc:
+            error = f"{type(exc).__name__}: {_redact(str(exc))}"
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to call Dify {path}"
+            ) from exc
+
+        if response.status_code >= 400:
+            error = f"HTTP {response.status_code}"
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Dify {path} failed: HTTP {response.status_code}"
+            )
+
+        try:
+            result = response.json()
+        except ValueError as exc:
+            error = "invalid JSON"
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Invalid JSON from Dify {path}"
+            ) from exc
+        if not isinstance(result, dict):
+            error = "invalid payload"
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Invalid JSON from Dify {path}"
+            )
+        return result
+    finally:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        _record(str(workflow_id), base_url, path, elapsed_ms, response, error)
+        if error:
+            logger.warning(
+                "【Dify】请求失败 workflow=%s path=%s 耗时=%.0fms err=%s", workflow_id, path, elapsed_ms, error
+            )
+
+
+def get_stats() -> dict:
+    with _lock:
+        workflows = {
+            workflow_id: {
+                "requests": item.requests,
+                "errors": item.errors,
+                "retries": item.retries,
+                "avg_ms": round(item.total_ms / item.requests, 2) if item.requests else 0.0,
+                "max_ms": round(item.max_ms, 2),
+                "last_status": item.last_status,
+                "last_error": item.last_error,
+                "by_path": dict(item.by_path),
+            }
+            for workflow_id, item in _stats.items()
+        }
+        pools = {base_url: list(items) for base_url, items in _pools.items()}
+
+    connections: dict[str, dict[str, int]] = {}
+    for base_url, items in pools.items():
+        # num_requests 含重试；num_connections 为实际新建的 TCP/TLS 连接数
+        request_count = sum(getattr(pool, "num_requests", 0) for pool in items)
+        connection_count = sum(getattr(pool, "num_connections", 0) for pool in items)
+        connections[base_url] = {
+            "requests": request_count,
+            "connections": connection_count,
+            "reused": max(request_count - connection_count, 0),
+        }
+    return {"workflows": workflows, "connections": connections}
+
+
+def close_sessions() -> None:
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+        _pools.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+from fastapi import HTTPException
+
+from app.core.config import DIFY_LISTING_CACHE_MAX_ENTRIES, DIFY_LISTING_CACHE_TTL_SECONDS
+
+# Dify 会话 / 消息列表的短 TTL 缓存：前端浏览历史时会反复轮询同样的列表。
+# 按 (工作流, dify_user, 参数) 缓存几秒；同一 key 的并发请求合并为一次上游调用，
+# 其余请求等待首个请求的结果（失败时各自收到一个由原错误派生的新异常，失败结果不缓存）。
+# 用户追加 / 同步会话或管理员修改工作流时按工作流（+ 用户）失效。
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expire_at: float
+
+
+@dataclass
+class _Inflight:
+    event: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+_LOCK = threading.Lock()
+_ENTRIES: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+_INFLIGHT: dict[tuple, _Inflight] = {}
+_STATS = {"hit": 0, "miss": 0, "coalesced": 0, "evicted": 0, "invalidated": 0}
+# 每次失效递增；加载期间发生过失效的结果不再写入
+_EPOCH = 0
+
+
+def _now() -> float:
+    return time.monotonic()
+
+
+def _waiter_error(error: BaseException) -> BaseException:
+    # 合并等待的请求在各自线程里抛出新异常，不共用（并改写）首个请求的异常对象与 traceback；
+    # HTTPException 保留状态码与详情，接口照常返回上游错误
+    if isinstance(error, HTTPException):
+        return HTTPException(status_code=error.status_code, detail=error.detail, headers=error.headers)
+    return RuntimeError(f"Dify listing load failed: {type(error).__name__}: {error}")
+
+
+def get_or_load(
+    workflow_id: Any,
+    dify_user: str,
+    params: tuple[Hashable, ...],
+    loader: Callable[[], Any],
+) -> Any:
+    if DIFY_LISTING_CACHE_TTL_SECONDS <= 0:
+        return loader()
+
+    key = ((str(workflow_id), dify_user), params)
+    now = _now()
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry and entry.expire_at > now:
+            _ENTRIES.move_to_end(key)
+            _STATS["hit"] += 1
+            return entry.value
+        if entry:
+            _ENTRIES.pop(key, None)
+        inflight = _INFLIGHT.get(key)
+        leader = inflight is None
+        if leader:
+            inflight = _Inflight()
+            _INFLIGHT[key] = inflight
+            _STATS["miss"] += 1
+        else:
+            _STATS["coalesced"] += 1
+        epoch = _EPOCH
+
+    if not leader:
+        inflight.event.wait()
+        if inflight.error is not None:
+            raise _waiter_error(inflight.error) from inflight.error
+        return inflight.value
+
+    try:
+        value = loader()
+    except BaseException as exc:
+        inflight.error = exc
+        raise
+    else:
+        inflight.value = value
+        with _LOCK:
+            if epoch == _EPOCH:
+                _ENTRIES[key] = _CacheEntry(value=value, expire_at=_now() + DIFY_LISTING_CACHE_TTL_SECONDS)
+                _ENTRIES.move_to_end(key)
+                while len(_ENTRIES) > DIFY_LISTING_CACHE_MAX_ENTRIES:
+                    _ENTRIES.popitem(last=False)
+                    _STATS["evicted"] += 1
+        return value
+    finally:
+        with _LOCK:
+            if _INFLIGHT.get(key) is inflight:
+                del _INFLIGHT[key]
+        inflight.event.set()
+
+
+def invalidate(workflow_id: Any, dify_user: str | None = None) -> None:
+    # dify_user 为空时失效该工作流下所有用户的列表
+    global _EPOCH
+    workflow_key = str(workflow_id)
+
+    def _matches(key: tuple) -> bool:
+        scope = key[0]
+        return scope[0] == workflow_key and (dify_user is None or scope[1] == dify_user)
+
+    with _LOCK:
+        _EPOCH += 1
+        stale = [key for key in _ENTRIES if _matches(key)]
+        for key in stale:
+            del _ENTRIES[key]
+        _STATS["invalidated"] += len(stale)
+        # 之后到达的请求不再合并到失效前发起的上游调用
+        for key in [key for key in _INFLIGHT if _matches(key)]:
+            del _INFLIGHT[key]
+
+
+def get_stats() -> dict[str, int]:
+    with _LOCK:
+        return {**_STATS, "entries": len(_ENTRIES), "inflight": len(_INFLIGHT)}
@@ -0,0 +1,99 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "../.."))
+if CURRENT_DIR in sys.path:
+    sys.path.remove(CURRENT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from app.services import ai_workflow_session_log as session_log  # noqa: E402
+
+# 会话日志迁移：把 logs/ai_workflow_sessions/**/*.json（旧格式，整体 JSON）转换为只追加的 JSONL。
+#
+#   python app/services/migrate_ai_workflow_sessions.py --dry-run
+#   python app/services/migrate_ai_workflow_sessions.py
+#   python app/services/migrate_ai_workflow_sessions.py --keep-legacy   # 旧文件保留为 .json.bak
+#   python app/services/migrate_ai_workflow_sessions.py --import-to-store sqlite   # 再导入到会话存储
+#
+# 服务运行中也可以执行：转换持有旧文件的排他锁，与接口的自动转换互不冲突。
+
+
+def import_to_store(root: Path, backend: str) -> int:
+    from app.services.ai_workflow_session_store import create_store
+
+    store = create_store(backend)
+    imported = skipped = failed = 0
+    for path in sorted(root.glob(f"*/*{session_log.SESSION_SUFFIX}")):
+        header = session_log.read_header(path)
+        if not header or not header.get("workflow_id") or not header.get("session_id"):
+            failed += 1
+            print(f"  [失败] {path.relative_to(root)}：缺少 header")
+            continue
+        # 会话日志按用户目录存放，以目录名为准
+        header = {**header, "user": path.parent.name}
+        if store.read_messages(header["user"], header["workflow_id"], header["session_id"], 0, 1):
+            skipped += 1
+            continue
+        count = store.append(header, list(session_log.iter_messages(path)))
+        imported += 1
+        print(f"  [导入] {path.relative_to(root)}：{count} 条消息")
+    print(f"导入 {backend}：会话={imported} 已存在跳过={skipped} 失败={failed}")
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI 工作流会话日志 JSON -> JSONL 迁移")
+    parser.add_argument("--root", type=Path, default=session_log.SESSION_LOG_ROOT, help="会话日志根目录")
+    parser.add_argument("--dry-run", action="store_true", help="只列出待转换文件，不写入")
+    parser.add_argument("--keep-legacy", action="store_true", help="保留旧文件为 .json.bak")
+    parser.add_argument(
+        "--import-to-store",
+        choices=["sqlite", "postgres"],
+        help="转换后把全部 JSONL 会话导入该存储（已存在消息的会话跳过）",
+    )
+    args = parser.parse_args()
+
+    legacy_files = sorted(args.root.glob(f"*/*{session_log.LEGACY_SUFFIX}"))
+    print(f"目录={args.root} 待转换={len(legacy_files)}")
+
+    converted = skipped = failed = 0
+    for legacy in legacy_files:
+        if args.dry_run:
+            print(f"  [待转换] {legacy.relative_to(args.root)}")
+            continue
+        try:
+            expected = len(json.loads(legacy.read_text(encoding="utf-8") or "{}").get("messages") or [])
+            target = session_log.migrate_file(legacy, keep_legacy=args.keep_legacy)
+        except (OSError, ValueError, AttributeError) as exc:
+            failed += 1
+            print(f"  [失败] {legacy.relative_to(args.root)}：{exc}")
+            continue
+        if target is None:
+            skipped += 1
+            print(f"  [跳过] {legacy.relative_to(args.root)}：已转换或目标已存在")
+            continue
+
+        # 流式回读校验消息条数
+        actual = sum(1 for _ in session_log.iter_messages(target))
+        if actual != expected:
+            failed += 1
+            print(f"  [校验失败] {target.relative_to(args.root)}：期望 {expected} 条，实际 {actual} 条")
+            continue
+        converted += 1
+        print(f"  [完成] {target.relative_to(args.root)}：{actual} 条消息")
+
+    if not args.dry_run:
+        print(f"\n完成：转换={converted} 跳过={skipped} 失败={failed}")
+        if args.import_to_store:
+            failed += import_to_store(args.root, args.import_to_store)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
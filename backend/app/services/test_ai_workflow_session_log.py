@@ -0,0 +1,61 @@
+import json
+
+from app.services import ai_workflow_session_log as session_log
+
+HEADER = session_log.build_header(
+    workflow_id="wf", workflow_name="demo", user="u1", session_id="s1", created_at="2026-01-01T00:00:00Z"
+)
+
+
+def _message(content: str, dify_message_id: str | None = None) -> dict:
+    return session_log.build_message("user", content, "2026-01-01T00:00:00Z", dify_message_id)
+
+
+def test_append_writes_header_once_and_streams_messages(tmp_path):
+    path = tmp_path / "wf_s1.jsonl"
+    assert session_log.append_messages(path, HEADER, [_message("a")]) == 1
+    cursor = session_log.build_cursor("c1", "m2")
+    assert session_log.append_messages(path, HEADER, [_message("b", "m2")], cursor) == 1
+    assert session_log.append_messages(path, HEADER, []) == 0
+
+    records = list(session_log.iter_records(path))
+    assert [record["type"] for record in records] == ["header", "message", "message", "cursor"]
+    assert session_log.read_header(path)["session_id"] == "s1"
+    assert [message["content"] for message in session_log.iter_messages(path)] == ["a", "b"]
+
+
+def test_torn_last_line_is_skipped_and_not_merged(tmp_path):
+    path = tmp_path / "wf_s1.jsonl"
+    session_log.append_messages(path, HEADER, [_message("a")])
+    # 模拟写入中断留下的半行
+    with path.open("a", encoding="utf-8") as file:
+        file.write('{"type":"message","role":"user","cont')
+    session_log.append_messages(path, HEADER, [_message("b")])
+
+    assert [message["content"] for message in session_log.iter_messages(path)] == ["a", "b"]
+
+
+def test_legacy_json_is_converted_on_first_append(tmp_path):
+    legacy = tmp_path / "wf_s1.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "workflow_id": "wf",
+                "workflow_name": "demo",
+                "user": "u1",
+                "session_id": "s1",
+                "created_at": "2025-12-31T00:00:00Z",
+                "messages": [{"role": "user", "content": "old"}, {"role": "assistant", "content": "reply"}],
+            }
+        ),
+        encoding="utf-8",
+    )
+    path = tmp_path / "wf_s1.jsonl"
+    session_log.append_messages(path, HEADER, [_message("new")])
+
+    assert not legacy.exists()
+    assert session_log.read_header(path)["created_at"] == "2025-12-31T00:00:00Z"
+    messages = list(session_log.iter_messages(path))
+    assert [message["content"] for message in messages] == ["old", "reply", "new"]
+    # 旧消息没有时间戳时沿用会话创建时间
+    assert messages[0]["ts"] == "2025-12-31T00:00:00Z"
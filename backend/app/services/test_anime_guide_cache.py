@@ -0,0 +1,39 @@
+import pytest
+
+from app.services import anime_guide_cache
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    anime_guide_cache.invalidate()
+    yield
+
+
+def _counting_loader(prefix: str = "v"):
+    calls: list[int] = []
+
+    def _load():
+        calls.append(1)
+        return f"{prefix}{len(calls)}"
+
+    return _load, calls
+
+
+def test_anime_guide_cache_hits_until_invalidated():
+    load, calls = _counting_loader()
+    assert anime_guide_cache.get_or_load("weekday", (1,), load) == "v1"
+    assert anime_guide_cache.get_or_load("weekday", (1,), load) == "v1"
+    assert anime_guide_cache.get_or_load("weekday", (2,), load) == "v2"
+    anime_guide_cache.invalidate()
+    assert anime_guide_cache.get_or_load("weekday", (1,), load) == "v3"
+    assert len(calls) == 3
+
+
+def test_anime_guide_cache_drops_result_loaded_across_invalidation():
+    # 加载期间爬虫结束并清空缓存：旧结果照常返回，但不写入缓存
+    def _stale():
+        anime_guide_cache.invalidate()
+        return "stale"
+
+    assert anime_guide_cache.get_or_load("weekday", (1,), _stale) == "stale"
+    assert anime_guide_cache.get_or_load("weekday", (1,), lambda: "fresh") == "fresh"
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import dify_listing_cache
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    dify_listing_cache.invalidate("wf")
+    dify_listing_cache.invalidate("other")
+    yield
+
+
+def _counting_loader(prefix: str = "v"):
+    calls: list[int] = []
+
+    def _load():
+        calls.append(1)
+        return f"{prefix}{len(calls)}"
+
+    return _load, calls
+
+
+def test_dify_listing_cache_invalidates_by_workflow_and_user():
+    load, calls = _counting_loader()
+    assert dify_listing_cache.get_or_load("wf", "alice", ("conversations",), load) == "v1"
+    assert dify_listing_cache.get_or_load("wf", "bob", ("conversations",), load) == "v2"
+    assert dify_listing_cache.get_or_load("other", "alice", ("conversations",), load) == "v3"
+
+    dify_listing_cache.invalidate("wf", "alice")
+    assert dify_listing_cache.get_or_load("wf", "alice", ("conversations",), load) == "v4"
+    assert dify_listing_cache.get_or_load("wf", "bob", ("conversations",), load) == "v2"
+
+    dify_listing_cache.invalidate("wf")
+    assert dify_listing_cache.get_or_load("wf", "bob", ("conversations",), load) == "v5"
+    assert dify_listing_cache.get_or_load("other", "alice", ("conversations",), load) == "v3"
+    assert len(calls) == 5
+
+
+def test_dify_listing_cache_coalesces_concurrent_loads():
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[int] = []
+
+    def _slow_load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "page"
+
+    results: list[str] = []
+    leader = threading.Thread(
+        target=lambda: results.append(dify_listing_cache.get_or_load("wf", "alice", ("m",), _slow_load))
+    )
+    leader.start()
+    assert started.wait(5)
+    coalesced = dify_listing_cache.get_stats()["coalesced"]
+    follower = threading.Thread(
+        target=lambda: results.append(dify_listing_cache.get_or_load("wf", "alice", ("m",), _slow_load))
+    )
+    follower.start()
+    # 等第二个请求挂到在途的上游调用上再放行
+    deadline = time.monotonic() + 5
+    while dify_listing_cache.get_stats()["coalesced"] == coalesced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == ["page", "page"]
+    assert len(calls) == 1
+    assert dify_listing_cache.get_stats()["coalesced"] == coalesced + 1
+
+
+def test_dify_listing_cache_does_not_cache_errors():
+    def _fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        dify_listing_cache.get_or_load("wf", "alice", ("m",), _fail)
+    assert dify_listing_cache.get_or_load("wf", "alice", ("m",), lambda: "ok") == "ok"
+
+
+def test_dify_listing_cache_waiters_get_their_own_error():
+    started = threading.Event()
+    release = threading.Event()
+    upstream = HTTPException(status_code=502, detail="Dify request failed")
+
+    def _failing_load():
+        started.set()
+        release.wait(5)
+        raise upstream
+
+    errors: list[BaseException] = []
+
+    def _request():
+        try:
+            dify_listing_cache.get_or_load("wf", "alice", ("m",), _failing_load)
+        except BaseException as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=_request)
+    leader.start()
+    assert started.wait(5)
+    coalesced = dify_listing_cache.get_stats()["coalesced"]
+    followers = [threading.Thread(target=_request) for _ in range(2)]
+    for follower in followers:
+        follower.start()
+    deadline = time.monotonic() + 5
+    while dify_listing_cache.get_stats()["coalesced"] < coalesced + 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(errors) == 3
+    waiter_errors = [exc for exc in errors if exc is not upstream]
+    # 每个等待方拿到独立的异常对象，状态码与详情不变，并链到首个请求的原始错误
+    assert len(waiter_errors) == 2 and waiter_errors[0] is not waiter_errors[1]
+    for exc in waiter_errors:
+        assert isinstance(exc, HTTPException)
+        assert (exc.status_code, exc.detail) == (502, "Dify request failed")
+        assert exc.__cause__ is upstream
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services import user_cache
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    user_cache.clear()
+    yield
+
+
+def _counting_loader(prefix: str = "v"):
+    calls: list[int] = []
+
+    def _load():
+        calls.append(1)
+        return f"{prefix}{len(calls)}"
+
+    return _load, calls
+
+
+def test_user_cache_invalidate_reloads_user():
+    load, calls = _counting_loader()
+    user = lambda: {"id": "u1", "name": load()}  # noqa: E731
+    assert user_cache.get_or_load("u1", user)["name"] == "v1"
+    cached = user_cache.get_or_load("u1", user)
+    cached["name"] = "changed"
+    # 返回副本：调用方修改不会污染缓存
+    assert user_cache.get_or_load("u1", user)["name"] == "v1"
+
+    user_cache.invalidate("u1")
+    assert user_cache.get_or_load("u1", user)["name"] == "v2"
+    assert len(calls) == 2
+
+
+def test_user_cache_does_not_cache_missing_user_or_stale_version():
+    assert user_cache.get_or_load("gone", lambda: None) is None
+    assert user_cache.get_or_load("gone", lambda: {"id": "gone"}) == {"id": "gone"}
+
+    assert user_cache.get_token_version("u1", lambda: 1) == 1
+    assert user_cache.get_token_version("u1", lambda: 2) == 1
+    user_cache.invalidate("u1")
+    assert user_cache.get_token_version("u1", lambda: 2) == 2
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from app.core.config import (
+    AUTH_USER_CACHE_MAX_ENTRIES,
+    AUTH_USER_CACHE_TTL_SECONDS,
+    JWT_TOKEN_VERSION_CHECK_SECONDS,
+)
+
+# 鉴权用户缓存：get_current_user 按 JWT sub 缓存用户行，避免每个请求都查询 app_users。
+# 用户资料 / 密码 / 权限组变更与删除时由 user_service 主动失效；
+# 多进程部署时其它进程依赖 TTL 过期，因此 TTL 保持较短。
+# JWT claims 模式下只缓存用户的令牌版本号（token_version），用于吊销校验。
+
+
+@dataclass
+class _CacheEntry:
+    value: dict
+    expire_at: float
+
+
+@dataclass
+class _VersionEntry:
+    version: int
+    expire_at: float
+
+
+_LOCK = threading.Lock()
+_ENTRIES: OrderedDict[str, _CacheEntry] = OrderedDict()
+_VERSIONS: OrderedDict[str, _VersionEntry] = OrderedDict()
+_STATS = {"hit": 0, "miss": 0, "evicted": 0, "invalidated": 0, "version_hit": 0, "version_miss": 0}
+# 每次失效递增；加载期间发生过失效的结果不再写入，避免把变更前读到的用户行缓存下来
+_EPOCH = 0
+
+
+def _now() -> float:
+    return time.monotonic()
+
+
+_MISS = object()
+
+
+def _lookup_user(user_id: str) -> tuple[Any, int]:
+    now = _now()
+    with _LOCK:
+        entry = _ENTRIES.get(user_id)
+        if entry and entry.expire_at > now:
+            _ENTRIES.move_to_end(user_id)
+            _STATS["hit"] += 1
+            # 返回副本，调用方修改不会污染缓存
+            return dict(entry.value), _EPOCH
+        if entry:
+            _ENTRIES.pop(user_id, None)
+        _STATS["miss"] += 1
+        return _MISS, _EPOCH
+
+
+def _store_user(user_id: str, user: Optional[Mapping[str, Any]], epoch: int) -> Optional[dict]:
+    if not user:
+        # 不缓存不存在的用户，已删除账号始终返回 401
+        return None
+    value = dict(user)
+    with _LOCK:
+        if epoch != _EPOCH:
+            return dict(value)
+        _ENTRIES[user_id] = _CacheEntry(value=value, expire_at=_now() + AUTH_USER_CACHE_TTL_SECONDS)
+        _ENTRIES.move_to_end(user_id)
+        while len(_ENTRIES) > AUTH_USER_CACHE_MAX_ENTRIES:
+            _ENTRIES.popitem(last=False)
+            _STATS["evicted"] += 1
+    return dict(value)
+
+
+def get_or_load(user_id: str, loader: Callable[[], Optional[Mapping[str, Any]]]) -> Optional[dict]:
+    if AUTH_USER_CACHE_TTL_SECONDS <= 0:
+        user = loader()
+        return dict(user) if user else None
+
+    cached, epoch = _lookup_user(user_id)
+    if cached is not _MISS:
+        return cached
+    return _store_user(user_id, loader(), epoch)
+
+
+async def get_or_load_async(
+    user_id: str, loader: Callable[[], Awaitable[Optional[Mapping[str, Any]]]]
+) -> Optional[dict]:
+    # async 依赖使用：锁只保护字典操作，不跨 await 持有
+    if AUTH_USER_CACHE_TTL_SECONDS <= 0:
+        user = await loader()
+        return dict(user) if user else None
+
+    cached, epoch = _lookup_user(user_id)
+    if cached is not _MISS:
+        return cached
+    return _store_user(user_id, await loader(), epoch)
+
+
+def _lookup_version(user_id: str) -> tuple[Any, int]:
+    now = _now()
+    with _LOCK:
+        entry = _VERSIONS.get(user_id)
+        if entry and entry.expire_at > now:
+            _VERSIONS.move_to_end(user_id)
+            _STATS["version_hit"] += 1
+            return entry.version, _EPOCH
+        if entry:
+            _VERSIONS.pop(user_id, None)
+        _STATS["version_miss"] += 1
+        return _MISS, _EPOCH
+
+
+def _store_version(user_id: str, version: Optional[int], epoch: int) -> Optional[int]:
+    if version is None or JWT_TOKEN_VERSION_CHECK_SECONDS <= 0:
+        return version
+    with _LOCK:
+        if epoch != _EPOCH:
+            return version
+        _VERSIONS[user_id] = _VersionEntry(version=version, expire_at=_now() + JWT_TOKEN_VERSION_CHECK_SECONDS)
+        _VERSIONS.move_to_end(user_id)
+        while len(_VERSIONS) > AUTH_USER_CACHE_MAX_ENTRIES:
+            _VERSIONS.popitem(last=False)
+    return version
+
+
+def get_token_version(user_id: str, loader: Callable[[], Optional[int]]) -> Optional[int]:
+    cached, epoch = _lookup_version(user_id)
+    if cached is not _MISS:
+        return cached
+    return _store_version(user_id, loader(), epoch)
+
+
+async def get_token_version_async(
+    user_id: str, loader: Callable[[], Awaitable[Optional[int]]]
+) -> Optional[int]:
+    cached, epoch = _lookup_version(user_id)
+    if cached is not _MISS:
+        return cached
+    return _store_version(user_id, await loader(), epoch)
+
+
+def invalidate(user_id: Any) -> None:
+    global _EPOCH
+    with _LOCK:
+        _EPOCH += 1
+        _VERSIONS.pop(str(user_id), None)
+        if _ENTRIES.pop(str(user_id), None) is not None:
+            _STATS["invalidated"] += 1
+
+
+def clear() -> None:
+    global _EPOCH
+    with _LOCK:
+        _EPOCH += 1
+        _STATS["invalidated"] += len(_ENTRIES)
+        _ENTRIES.clear()
+        _VERSIONS.clear()
+
+
+def get_stats() -> dict[str, float]:
+    with _LOCK:
+        stats: dict[str, float] = {**_STATS, "entries": len(_ENTRIES), "version_entries": len(_VERSIONS)}
+    lookups = stats["hit"] + stats["miss"]
+    stats["hit_rate"] = round(stats["hit"] / lookups, 4) if lookups else 0.0
+    version_lookups = stats["version_hit"] + stats["version_miss"]
+    stats["version_hit_rate"] = (
+        round(stats["version_hit"] / version_lookups, 4) if version_lookups else 0.0
+    )
+    return stats
@@ -1,8 +1,16 @@
 from typing import Optional
 
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import JWT_CLAIMS_MODE
+from app.services import user_cache
+
+# claims 模式下用户名 / 邮箱 / 密码 / 权限组变更时递增令牌版本号，使已签发的令牌失效；
+# minimal 模式不依赖该列，未执行迁移的库也能正常运行
+_BUMP_TOKEN_VERSION = ",\n                token_version = token_version + 1" if JWT_CLAIMS_MODE == "claims" else ""
+
 
 def get_user_by_identifier(db: Session, identifier: str) -> Optional[dict]:
     result = db.execute(
@@ -20,18 +28,28 @@ def get_user_by_identifier(db: Session, identifier: str) -> Optional[dict]:
     return result.mappings().first()
 
 
+_USER_BY_ID_SQL = """
+    select id, username, email, role_group
+    from app_users
+    where id = :user_id
+    limit 1
+"""
+
+_TOKEN_VERSION_SQL = """
+    select token_version
+    from app_users
+    where id = :user_id
+    limit 1
+"""
+
+
 def get_user_by_id(db: Session, user_id: str) -> Optional[dict]:
-    result = db.execute(
-        text(
-            """
-            select id, username, email, role_group
-            from app_users
-            where id = :user_id
-            limit 1
-            """
-        ),
-        {"user_id": user_id}
-    )
+    result = db.execute(text(_USER_BY_ID_SQL), {"user_id": user_id})
+    return result.mappings().first()
+
+
+async def get_user_by_id_async(db: AsyncSession, user_id: str) -> Optional[dict]:
+    result = await db.execute(text(_USER_BY_ID_SQL), {"user_id": user_id})
     return result.mappings().first()
 
 
@@ -50,14 +68,24 @@ def get_user_with_password(db: Session, user_id: str) -> Optional[dict]:
     return result.mappings().first()
 
 
+def get_user_token_version(db: Session, user_id: str) -> Optional[int]:
+    row = db.execute(text(_TOKEN_VERSION_SQL), {"user_id": user_id}).first()
+    return int(row[0]) if row else None
+
+
+async def get_user_token_version_async(db: AsyncSession, user_id: str) -> Optional[int]:
+    row = (await db.execute(text(_TOKEN_VERSION_SQL), {"user_id": user_id})).first()
+    return int(row[0]) if row else None
+
+
 def update_user_account(db: Session, user_id: str, username: str, email: str) -> Optional[dict]:
     result = db.execute(
         text(
-            """
+            f"""
             update app_users
             set username = :username,
                 email = :email,
-                updated_at = now()
+                updated_at = now(){_BUMP_TOKEN_VERSION}
             where id = :user_id
             returning id, username, email, role_group
             """
@@ -65,22 +93,24 @@ def update_user_account(db: Session, user_id: str, username: str, email: str) ->
         {"user_id": user_id, "username": username, "email": email}
     )
     db.commit()
+    user_cache.invalidate(user_id)
     return result.mappings().first()
 
 
 def update_user_password(db: Session, user_id: str, password_hash: str) -> None:
     db.execute(
         text(
-            """
+            f"""
             update app_users
             set password_hash = :password_hash,
-                updated_at = now()
+                updated_at = now(){_BUMP_TOKEN_VERSION}
             where id = :user_id
             """
         ),
         {"user_id": user_id, "password_hash": password_hash}
     )
     db.commit()
+    user_cache.invalidate(user_id)
 
 
 def list_users(db: Session, query: str | None = None) -> list[dict]:
@@ -148,13 +178,13 @@ def update_user(
     password_hash: Optional[str],
 ) -> Optional[dict]:
     if password_hash:
-        sql = """
+        sql = f"""
             update app_users
             set username = :username,
                 email = :email,
                 role_group = :role_group,
                 password_hash = :password_hash,
-                updated_at = now()
+                updated_at = now(){_BUMP_TOKEN_VERSION}
             where id = :user_id
             returning id, username, email, role_group, created_at, updated_at
         """
@@ -166,12 +196,13 @@ def update_user(
             "password_hash": password_hash
         }
     else:
-        sql = """
+        # 令牌里携带了 role_group，管理员修改用户后同样吊销旧令牌
+        sql = f"""
             update app_users
             set username = :username,
                 email = :email,
                 role_group = :role_group,
-                updated_at = now()
+                updated_at = now(){_BUMP_TOKEN_VERSION}
             where id = :user_id
             returning id, username, email, role_group, created_at, updated_at
         """
@@ -184,6 +215,7 @@ def update_user(
 
     result = db.execute(text(sql), params)
     db.commit()
+    user_cache.invalidate(user_id)
     return result.mappings().first()
 
 
@@ -198,4 +230,5 @@ def delete_user(db: Session, user_id: str) -> bool:
         {"user_id": user_id}
     )
     db.commit()
+    user_cache.invalidate(user_id)
     return result.rowcount > 0
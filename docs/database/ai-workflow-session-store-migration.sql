@@ -0,0 +1,57 @@
+-- AI workflow session store (AI_SESSION_STORE=postgres)
+-- Run in Supabase SQL Editor.
+-- This script is idempotent (safe to rerun).
+
+begin;
+
+-- 1) 会话：(用户, 工作流, 会话) 唯一；message_count 同时作为下一条消息的 seq
+create table if not exists public.ai_workflow_session (
+  id bigserial primary key,
+  user_identifier text not null,
+  workflow_id uuid not null,
+  session_id text not null,
+  workflow_name text,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now(),
+  message_count int not null default 0,
+  constraint uq_ai_workflow_session unique (user_identifier, workflow_id, session_id)
+);
+
+-- 2) 按用户列出会话（最近更新在前）
+create index if not exists idx_ai_workflow_session_user_updated_at
+  on public.ai_workflow_session (user_identifier, updated_at desc);
+
+-- 3) 消息：(会话, seq) 主键，分页读取直接走主键范围扫描；
+--    从 Dify 同步的消息记录来源 Dify 消息 ID（去重）
+create table if not exists public.ai_workflow_session_message (
+  session_pk bigint not null references public.ai_workflow_session(id) on delete cascade,
+  seq int not null,
+  role text not null,
+  content text not null,
+  ts text,
+  dify_message_id text,
+  primary key (session_pk, seq)
+);
+
+-- 4) Dify 增量同步：按 Dify 消息 ID 去重，每个 (会话, conversation) 一个游标
+-- 同步时按本批 Dify 消息 ID 查询已导入的消息
+create index if not exists idx_ai_workflow_session_message_dify_id
+  on public.ai_workflow_session_message (session_pk, dify_message_id)
+  where dify_message_id is not null;
+
+create table if not exists public.ai_workflow_session_sync_cursor (
+  session_pk bigint not null references public.ai_workflow_session(id) on delete cascade,
+  conversation_id text not null,
+  last_message_id text not null,
+  updated_at timestamptz not null default now(),
+  primary key (session_pk, conversation_id)
+);
+
+comment on table public.ai_workflow_session is 'AI workflow chat sessions (one row per user/workflow/session)';
+comment on column public.ai_workflow_session.message_count is 'Number of messages; the next appended message gets seq = message_count';
+comment on table public.ai_workflow_session_message is 'AI workflow chat messages, ordered by seq within a session';
+comment on column public.ai_workflow_session_message.ts is 'Message timestamp as received (ISO string from the app or Dify)';
+comment on column public.ai_workflow_session_message.dify_message_id is 'Source Dify message id for synced messages (dedup key)';
+comment on table public.ai_workflow_session_sync_cursor is 'Last imported Dify message id per session and Dify conversation';
+
+commit;
@@ -0,0 +1,33 @@
+-- Anime crawler content-hash change detection
+-- Run in Supabase SQL Editor.
+-- This script is idempotent (safe to rerun).
+
+begin;
+
+-- 详情页 / 章节列表解析结果的归一化哈希（sha256 hex），未变化时爬虫跳过写库
+alter table public.anime
+  add column if not exists detail_content_hash text,
+  add column if not exists episode_content_hash text;
+
+comment on column public.anime.detail_content_hash is 'Hash of normalized subject detail payload; crawler skips UPDATE when unchanged';
+comment on column public.anime.episode_content_hash is 'Hash of normalized episode list; crawler skips episode UPSERTs when unchanged';
+
+-- 跳过写库时仍需记录抓取时间：last_crawled_at（详情）/ episodes_crawled_at（章节页），
+-- 调度的刷新窗口与“今日已抓取”判断读取这两列，而不是行的 updated_at
+alter table public.anime
+  add column if not exists episodes_crawled_at timestamptz;
+
+comment on column public.anime.episodes_crawled_at is 'Last time the episode page was fetched (200 or 304), even when nothing was written';
+
+-- 回填：沿用此前的判断依据 MAX(anime_episode.updated_at)
+update public.anime a
+set episodes_crawled_at = s.last_updated_at
+from (
+  select anime_id, max(updated_at) as last_updated_at
+  from public.anime_episode
+  group by anime_id
+) s
+where s.anime_id = a.id
+  and a.episodes_crawled_at is null;
+
+commit;
@@ -0,0 +1,29 @@
+-- Anime per-subject episode summary (denormalized)
+-- Run in Supabase SQL Editor.
+-- This script is idempotent (safe to rerun).
+
+begin;
+
+-- 爬虫写入章节时同步维护，读接口不再逐行 LATERAL MAX(episode_no)
+alter table public.anime
+  add column if not exists latest_episode_no int,
+  add column if not exists episode_count int not null default 0;
+
+comment on column public.anime.latest_episode_no is 'MAX(anime_episode.episode_no); maintained by crawler on episode writes';
+comment on column public.anime.episode_count is 'COUNT(anime_episode); maintained by crawler on episode writes';
+
+-- 回填已有数据
+update public.anime a
+set
+  latest_episode_no = s.latest_episode_no,
+  episode_count = s.episode_count
+from (
+  select anime_id, max(episode_no) as latest_episode_no, count(1) as episode_count
+  from public.anime_episode
+  group by anime_id
+) s
+where s.anime_id = a.id
+  and (a.latest_episode_no is distinct from s.latest_episode_no
+       or a.episode_count is distinct from s.episode_count);
+
+commit;
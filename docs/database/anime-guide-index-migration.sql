@@ -0,0 +1,44 @@
+-- Anime guide / crawler hot-query indexes
+-- Run in Supabase SQL Editor.
+-- This script is idempotent (safe to rerun).
+-- 表规模较小，直接在事务内建索引；数据量很大时可改为逐条 create index concurrently（不能放在事务中）。
+-- 建完后可用 backend/app/services/anime_crawler/explain_queries.py 检查执行计划。
+
+begin;
+
+-- 1) 某天 / 日期区间更新列表、日历日期：按 air_date 过滤，覆盖 JOIN 与输出所需列，
+--    已有的 (anime_id, air_date) 唯一约束无法用于按日期查询
+create index if not exists idx_anime_airing_calendar_air_date
+  on public.anime_airing_calendar (air_date)
+  include (anime_id, weekday, episode_no);
+
+-- 2) 星期列表：weekday 过滤 + rating 排序，避免排序节点；覆盖列表输出列，可走 index-only scan
+create index if not exists idx_anime_weekday_rating
+  on public.anime (weekday, rating desc nulls last)
+  include (bgm_subject_id, title, title_zh, cover_image_url, latest_episode_no);
+
+-- 3) 更新列表按 (anime_id, air_date) 关联章节取集数
+create index if not exists idx_anime_episode_anime_air_date
+  on public.anime_episode (anime_id, air_date)
+  include (episode_no);
+
+-- 4) 数据版本（ETag）：MAX(updated_at) 直接取索引末端
+create index if not exists idx_anime_updated_at
+  on public.anime (updated_at desc);
+
+create index if not exists idx_anime_episode_updated_at
+  on public.anime_episode (updated_at desc);
+
+-- 5) 爬虫日志：按 crawler_name 过滤 + started_at 排序 / MAX / 分页 / 过期清理
+create index if not exists idx_crawler_run_logs_name_started_at
+  on public.crawler_run_logs (crawler_name, started_at desc);
+
+-- 单列 crawler_name 索引已被上面的组合索引前缀覆盖
+drop index if exists public.idx_crawler_run_logs_crawler_name;
+
+analyze public.anime;
+analyze public.anime_episode;
+analyze public.anime_airing_calendar;
+analyze public.crawler_run_logs;
+
+commit;
@@ -0,0 +1,14 @@
+-- App users token version (JWT claims mode revocation)
+-- Run in Supabase SQL Editor.
+-- This script is idempotent (safe to rerun).
+
+begin;
+
+-- JWT_CLAIMS_MODE=claims 时令牌携带 ver，后端只比对该版本号；
+-- 修改密码 / 管理员修改用户时递增，使已签发的令牌失效
+alter table public.app_users
+  add column if not exists token_version int not null default 0;
+
+comment on column public.app_users.token_version is 'Incremented on password / role changes; JWTs carrying an older ver are rejected in claims mode';
+
+commit;
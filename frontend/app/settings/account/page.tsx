@@ -9,6 +9,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { fetchJSON } from "@/lib/api";
+import { setToken } from "@/lib/auth";
 
 type UserInfo = {
   id: string;
@@ -17,6 +18,10 @@ type UserInfo = {
   role_group: string;
 };
 
+type UpdateAccountResponse = UserInfo & {
+  access_token?: string | null;
+};
+
 export default function AccountSettingsPage() {
   const [username, setUsername] = useState("");
   const [email, setEmail] = useState("");
@@ -43,10 +48,14 @@ export default function AccountSettingsPage() {
     setStatus(null);
 
     try {
-      await fetchJSON<UserInfo>("/settings/account", {
+      const data = await fetchJSON<UpdateAccountResponse>("/settings/account", {
         method: "PUT",
         json: { username, email }
       });
+      // claims 模式下旧令牌已失效，换用返回的新令牌
+      if (data.access_token) {
+        setToken(data.access_token);
+      }
       setStatus("已保存");
     } catch (error) {
       const message = error instanceof Error ? error.message : "保存失败";
@@ -9,6 +9,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { fetchJSON } from "@/lib/api";
+import { setToken } from "@/lib/auth";
 
 export default function PasswordSettingsPage() {
   const [oldPassword, setOldPassword] = useState("");
@@ -23,7 +24,7 @@ export default function PasswordSettingsPage() {
     setStatus(null);
 
     try {
-      await fetchJSON<{ ok: boolean }>("/settings/password", {
+      const data = await fetchJSON<{ ok: boolean; access_token?: string | null }>("/settings/password", {
         method: "PUT",
         json: {
           old_password: oldPassword,
@@ -31,6 +32,10 @@ export default function PasswordSettingsPage() {
           new_password_confirm: confirmPassword
         }
       });
+      // claims 模式下旧令牌已失效，换用返回的新令牌
+      if (data.access_token) {
+        setToken(data.access_token);
+      }
       setStatus("已修改");
       setOldPassword("");
       setNewPassword("");
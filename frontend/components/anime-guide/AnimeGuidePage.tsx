@@ -39,10 +39,9 @@ export function AnimeGuidePage() {
   const effectiveDateString = formatDateString(selectedDate);
 
   const weekRange = useMemo(() => {
-    const day = selectedDate.getDay();
-    const offset = (day + 6) % 7; // Monday as start
+    // Sunday as start, same week as the crawler calendar and backend snapshots
     const start = new Date(selectedDate);
-    start.setDate(selectedDate.getDate() - offset);
+    start.setDate(selectedDate.getDate() - selectedDate.getDay());
     const end = new Date(start);
     end.setDate(start.getDate() + 6);
     return { start, end };
@@ -130,18 +129,13 @@ export function AnimeGuidePage() {
 
   useEffect(() => {
     const loadWeekItems = async () => {
-      const dates = Array.from({ length: 7 }).map((_, index) => {
-        const date = new Date(weekRange.start);
-        date.setDate(weekRange.start.getDate() + index);
-        return formatDateString(date);
-      });
+      const start = formatDateString(weekRange.start);
+      const end = formatDateString(weekRange.end);
       try {
-        const responses = await Promise.all(
-          dates.map((date) =>
-            fetchJSON<{ items: AnimeGuideApiItem[] }>(`/tools/anime-guide/updates?date=${date}`)
-          )
+        const data = await fetchJSON<{ days: { date: string; items: AnimeGuideApiItem[] }[] }>(
+          `/tools/anime-guide/updates/range?start=${start}&end=${end}`
         );
-        const items = responses.flatMap((response) => response.items ?? []);
+        const items = (data.days ?? []).flatMap((day) => day.items ?? []);
         const uniqueMap = new Map(items.map((item) => [item.id, item]));
         setWeekItems(Array.from(uniqueMap.values()));
       } catch (error) {